@@ -1,55 +1,133 @@
+import time
+_import_started = time.perf_counter()
+
+import argparse
 import arcade
-import pymunk
 import random
 import math
-import numpy as np
-from opensimplex import OpenSimplex
-from perlin_noise import PerlinNoise
-from scipy.interpolate import interp1d
-import json
 import os
-# Removed complex image processing imports
+import sys
+import numpy as np
+from pyglet.graphics import Batch
+from snake_engine import SnakeEngine, SnapshotError, SCREEN_WIDTH, SCREEN_HEIGHT, GRID_SIZE, GRID_WIDTH, GRID_HEIGHT, FOOD_POINTS, BONUS_POINTS
+from highscores import get_high_score_store
+from replay import Replay, ReplayError, ReplayRecorder
+from savestate import SaveState
+from event_log import EventLog, EVENT_LOG_FILE
+from autopilot import Autopilot, parse_board
+from chunk_index import SegmentIndex, CHUNK_CELLS, chunks_in_rect
+from arena import ArenaEngine, GreedyBot, bot_directions
+# Heavier helpers (PIL drawing, terrain noise) are imported by the code that uses them
 
-SCREEN_WIDTH = 1024
-SCREEN_HEIGHT = 768
-GRID_SIZE = 35
-GRID_WIDTH = SCREEN_WIDTH // GRID_SIZE
-GRID_HEIGHT = (SCREEN_HEIGHT - 150) // GRID_SIZE
-HIGH_SCORE_FILE = "snake_highscore.json"
+_import_finished = time.perf_counter()
 
-def load_high_score():
-    try:
-        if os.path.exists(HIGH_SCORE_FILE):
-            with open(HIGH_SCORE_FILE, 'r') as f:
-                return json.load(f).get('high_score', 0)
-    except:
-        pass
-    return 0
+# Default time-to-first-frame budget checked by --profile-startup
+STARTUP_BUDGET_MS = 2000
 
-def save_high_score(score):
+DIFFICULTIES = [
+    {"name": "EASY", "speed": 5, "color": (0, 255, 0)},
+    {"name": "NORMAL", "speed": 8, "color": (255, 255, 0)},
+    {"name": "HARD", "speed": 12, "color": (255, 165, 0)},
+    {"name": "INSANE", "speed": 16, "color": (255, 0, 0)}
+]
+
+def difficulty_name(speed):
+    for diff in DIFFICULTIES:
+        if diff["speed"] == speed:
+            return diff["name"]
+    return f"SPEED {speed}"
+
+def remove_file(path):
+    # Gone already, or out of our hands, is as good as removed
     try:
-        with open(HIGH_SCORE_FILE, 'w') as f:
-            json.dump({'high_score': score}, f)
-    except:
+        os.remove(path)
+    except OSError:
         pass
 
+# Breathing animation steps baked into the snake textures
+BREATH_STEPS = 16
+
+# Pre-rendered snake pieces, shared by every snake and keyed by look
+_snake_textures = {}
+
+def _circle(draw, x, y, radius, color):
+    # PIL's box is inclusive, so this covers 2 * radius pixels around (x, y)
+    draw.ellipse((x - radius, y - radius, x + radius - 1, y + radius - 1), fill=color)
+
+def _recolor(image, channels):
+    # Shuffle the colour bands, e.g. "GRB" turns the green snake red
+    if channels == "RGB":
+        return image
+    from PIL import Image
+    bands = dict(zip("RGBA", image.split()))
+    return Image.merge("RGBA", [bands[c] for c in channels] + [bands["A"]])
+
+def head_texture(head_size, channels="RGB"):
+    key = ("head", head_size, channels)
+    texture = _snake_textures.get(key)
+    if texture is None:
+        from PIL import Image, ImageDraw
+        # Canvas is centred on the head; PIL's y axis points down
+        c = head_size + 6
+        image = Image.new("RGBA", (2 * c, 2 * c))
+        draw = ImageDraw.Draw(image)
+        _circle(draw, c + 3, c + 3, head_size + 2, (0, 60, 0))
+        _circle(draw, c, c, head_size, (50, 200, 50))
+        _circle(draw, c, c, head_size - 4, (80, 255, 80))
+        for i in range(8):
+            angle = i * math.pi / 4
+            _circle(draw, c + (head_size - 8) * math.cos(angle), c - (head_size - 8) * math.sin(angle),
+                    3, (100, 255, 100))
+        texture = arcade.Texture(_recolor(image, channels), hash=f"snake-head-{head_size}-{channels}",
+                                 hit_box_algorithm=arcade.hitbox.algo_bounding_box)
+        _snake_textures[key] = texture
+    return texture
+
+def segment_texture(segment_size, body_green, dotted, channels="RGB"):
+    key = ("segment", segment_size, body_green, dotted, channels)
+    texture = _snake_textures.get(key)
+    if texture is None:
+        from PIL import Image, ImageDraw
+        c = segment_size + 5
+        image = Image.new("RGBA", (2 * c, 2 * c))
+        draw = ImageDraw.Draw(image)
+        _circle(draw, c + 2, c + 2, segment_size + 2, (0, 80, 0))
+        _circle(draw, c, c, segment_size, (40, body_green, 40))
+        _circle(draw, c, c, segment_size - 3, (60, body_green + 40, 60))
+        if dotted:
+            for i in range(6):
+                angle = i * math.pi / 3
+                _circle(draw, c + (segment_size - 6) * math.cos(angle), c - (segment_size - 6) * math.sin(angle),
+                        2, (80, body_green + 60, 80))
+        _circle(draw, c - 2, c - 2, segment_size // 3, (120, 255, 120))
+        texture = arcade.Texture(_recolor(image, channels),
+                                 hash=f"snake-segment-{segment_size}-{body_green}-{int(dotted)}-{channels}",
+                                 hit_box_algorithm=arcade.hitbox.algo_bounding_box)
+        _snake_textures[key] = texture
+    return texture
+
 class RealisticSnake:
-    def __init__(self, start_pos):
-        self.segments = [start_pos]
-        self.direction = (1, 0)
-        self.target_direction = (1, 0)
-        self.physics_segments = []
-        self.segment_angles = [0]
+    def __init__(self, engine, channels="RGB"):
+        # Body positions are owned by the engine; this class only draws them
+        self.engine = engine
+        # Colour band order of the textures, see _recolor
+        self.channels = channels
+        self.direction = engine.direction
+        self.target_direction = engine.direction
         self.breathing_phase = 0
         self.eye_blink = 0
         self.tongue_phase = 0
-        self.skin_noise = OpenSimplex(seed=42)
-        self.movement_smoothing = 0.8
         
-        # Physics properties
-        self.segment_mass = 1.0
-        self.joint_stiffness = 0.9
-        self.skin_elasticity = 0.1
+        # Body segments drawn as one batch; refreshed when the body or the
+        # quantized breathing phase changes
+        self.body_sprites = arcade.SpriteList()
+        self.synced_state = None
+        self.placed_state = None
+        self.centers = None
+        self.indices = None
+        self.shake_camera = None
+        # Fraction of the way from the previous tick's cells to the current ones
+        self.alpha = 1.0
         
     def update_physics(self, dt):
         # Only update animation phases, not positions
@@ -60,22 +138,10 @@ class RealisticSnake:
         # Update direction for visuals only
         self.direction = self.target_direction
     
-    def move(self):
-        head = self.segments[0]
-        new_head = (head[0] + self.target_direction[0], head[1] + self.target_direction[1])
-        self.segments.insert(0, new_head)
-        self.segment_angles.insert(0, math.atan2(self.target_direction[1], self.target_direction[0]))
-        
-    def grow(self):
-        # Add new segment at tail
-        tail = self.segments[-1]
-        self.segments.append(tail)
-        self.segment_angles.append(self.segment_angles[-1])
-        
-    def shrink(self):
-        if len(self.segments) > 1:
-            self.segments.pop()
-            self.segment_angles.pop()
+    @property
+    def segments(self):
+        # SnakeBody ring buffer; segments.view() is a zero-copy NumPy array
+        return self.engine.segments
     
     def set_direction(self, direction):
         # Prevent 180-degree turns
@@ -83,33 +149,88 @@ class RealisticSnake:
             self.target_direction = direction
     
     def draw_realistic(self, shake_x=0, shake_y=0):
-        for i, (x, y) in enumerate(self.segments):
-            screen_x = x * GRID_SIZE + GRID_SIZE//2 + shake_x
-            screen_y = y * GRID_SIZE + GRID_SIZE//2 + shake_y
-            
-            if i == 0:  # Head - ultra realistic
-                self.draw_head(screen_x, screen_y)
-            else:  # Body segments with physics
-                self.draw_body_segment(screen_x, screen_y, i)
+        self.sync_body_sprites()
+        if shake_x or shake_y:
+            # Shake through the camera instead of moving every sprite
+            if self.shake_camera is None:
+                self.shake_camera = arcade.camera.Camera2D()
+            self.shake_camera.position = (SCREEN_WIDTH / 2 - shake_x, SCREEN_HEIGHT / 2 - shake_y)
+            with self.shake_camera.activate():
+                self.draw_batched()
+        else:
+            self.draw_batched()
     
-    def draw_head(self, x, y):
-        # Simple breathing effect
-        breath_scale = 1 + 0.03 * math.sin(self.breathing_phase)
-        head_size = int(GRID_SIZE * 0.8 * breath_scale)
+    def draw_batched(self):
+        # Head: one textured quad plus eyes and tongue, then the whole body in one call
+        x, y = self.centers[0].tolist()
+        self.draw_head(x, y)
+        self.body_sprites.draw()
+    
+    def quantized_breathing_phase(self):
+        step = 2 * math.pi / BREATH_STEPS
+        return round(self.breathing_phase / step) % BREATH_STEPS * step
+    
+    def segment_centers(self, indices=None):
+        # Pixel centres of the given body indices (all by default), each drawn
+        # between the cell it held a tick ago (the next segment's cell, or the
+        # vacated one for the tail) and its current cell
+        view = self.segments.view()
+        cells = (view if indices is None else view[indices]).astype(np.float32)
+        if self.alpha < 1:
+            last = len(view) - 1
+            if indices is None:
+                indices = np.arange(len(view))
+            previous = view[np.minimum(indices + 1, last)].astype(np.float32)
+            tail = self.engine.vacated_tail
+            if tail is not None:
+                previous[indices == last] = tail
+            cells = previous + (cells - previous) * self.alpha
+        return cells * GRID_SIZE + GRID_SIZE // 2
+    
+    def sync_body_sprites(self, indices=None):
+        # indices: sorted body indices to draw, head first; the whole body by
+        # default. A culled set changes with the camera, so it is never cached.
+        culled = indices is not None
+        placement = (self.engine.ticks, len(self.segments), self.alpha)
+        if culled or placement != self.placed_state:
+            self.placed_state = None if culled else placement
+            self.indices = indices if culled else np.arange(len(self.segments))
+            self.centers = self.segment_centers(indices)
+            for sprite, (x, y) in zip(self.body_sprites, self.centers[1:].tolist()):
+                sprite.position = (x, y)
         
-        # Head shadow
-        arcade.draw_circle_filled(x + 3, y - 3, head_size + 2, (0, 60, 0))
+        phase = self.quantized_breathing_phase()
+        state = (self.engine.ticks, len(self.segments), phase)
+        if not culled and state == self.synced_state:
+            return
+        self.synced_state = None if culled else state
         
-        # Main head - bright green
-        arcade.draw_circle_filled(x, y, head_size, (50, 200, 50))
-        arcade.draw_circle_filled(x, y, head_size - 4, (80, 255, 80))
+        index = self.indices[1:]
+        count = len(index)
+        sprites = self.body_sprites
+        while len(sprites) > count:
+            sprites.pop()
+        while len(sprites) < count:
+            sprites.append(arcade.Sprite(segment_texture(10, 200, False)))
+        if not count:
+            return
         
-        # Simple scale pattern
-        for i in range(8):
-            angle = i * math.pi / 4
-            scale_x = x + (head_size - 8) * math.cos(angle)
-            scale_y = y + (head_size - 8) * math.sin(angle)
-            arcade.draw_circle_filled(scale_x, scale_y, 3, (100, 255, 100))
+        # Clean, simple body segments shrinking towards the tail with a subtle breathing
+        scale = np.maximum(0.4, 1 - index * 0.05)
+        sizes = (GRID_SIZE * 0.7 * scale).astype(int)
+        sizes = (sizes * (1 + 0.02 * np.sin(phase + index * 0.2))).astype(int)
+        greens = (120 + 80 * scale).astype(int)
+        for i, sprite, (x, y), size, green in zip(index.tolist(), sprites, self.centers[1:].tolist(),
+                                                 sizes.tolist(), greens.tolist()):
+            sprite.texture = segment_texture(size, green, i % 2 == 0, self.channels)
+            sprite.position = (x, y)
+    
+    def draw_head(self, x, y):
+        # Simple breathing effect
+        breath_scale = 1 + 0.03 * math.sin(self.quantized_breathing_phase())
+        head_size = int(GRID_SIZE * 0.8 * breath_scale)
+        texture = head_texture(head_size, self.channels)
+        arcade.draw_texture_rect(texture, arcade.XYWH(x, y, texture.width, texture.height))
         
         # Clean eyes
         self.draw_simple_eyes(x, y)
@@ -152,324 +273,945 @@ class RealisticSnake:
                         tip_y + fork_size * math.sin(direction_angle + 0.3), (255, 0, 0), 2)
         arcade.draw_line(tip_x, tip_y, tip_x + fork_size * math.cos(direction_angle - 0.3), 
                         tip_y + fork_size * math.sin(direction_angle - 0.3), (255, 0, 0), 2)
+
+class ParticleSystem:
+    """Fixed-capacity particle pool stored as NumPy arrays.
+
+    Dead particles are compacted out with an alive mask after each update,
+    so the live ones always fill the first `count` slots and are drawn as a
+    single batch of points. Emits beyond capacity are dropped.
+    """
+    # Velocities and lifetimes are in per-frame units of a 60 FPS display
+    FRAME_RATE = 60
+    
+    def __init__(self, capacity=1024, color=(255, 215, 0), size=6, rng=None):
+        self.capacity = capacity
+        self.color = color
+        self.size = size
+        self.rng = rng or np.random.default_rng()
+        self.positions = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocities = np.zeros((capacity, 2), dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)
+        self.count = 0
+    
+    def __len__(self):
+        return self.count
+    
+    def emit(self, x, y, amount, speed_range, life):
+        amount = min(amount, self.capacity - self.count)
+        if amount <= 0:
+            return
+        new = slice(self.count, self.count + amount)
+        angles = self.rng.uniform(0, 2 * math.pi, amount)
+        speeds = self.rng.uniform(speed_range[0], speed_range[1], amount)
+        self.positions[new] = (x, y)
+        self.velocities[new, 0] = speeds * np.cos(angles)
+        self.velocities[new, 1] = speeds * np.sin(angles)
+        self.life[new] = life
+        self.count += amount
+    
+    def update(self, dt):
+        n = self.count
+        if not n:
+            return
+        frames = dt * self.FRAME_RATE
+        self.positions[:n] += self.velocities[:n] * frames
+        self.life[:n] -= frames
+        alive = self.life[:n] > 0
+        alive_count = int(np.count_nonzero(alive))
+        if alive_count != n:
+            self.positions[:alive_count] = self.positions[:n][alive]
+            self.velocities[:alive_count] = self.velocities[:n][alive]
+            self.life[:alive_count] = self.life[:n][alive]
+            self.count = alive_count
+    
+    def clear(self):
+        self.count = 0
+    
+    def draw(self):
+        # Same path as arcade.draw_points, fed straight from the position array
+        if not self.count:
+            return
+        ctx = arcade.get_window().ctx
+        program = ctx.shape_rectangle_filled_unbuffered_program
+        buffer = ctx.shape_rectangle_filled_unbuffered_buffer
+        buffer.orphan(size=self.count * 8)
+        buffer.write(data=self.positions[:self.count].tobytes())
+        program["color"] = arcade.types.Color.from_iterable(self.color).normalized
+        program["shape"] = self.size, self.size, 0
+        ctx.enable(ctx.BLEND)
+        ctx.shape_rectangle_filled_unbuffered_geometry.render(program, instances=self.count)
+        ctx.disable(ctx.BLEND)
+
+class StaticLayer:
+    """Geometry that never changes, baked into one vertex buffer.
+
+    Shapes are added as triangles in painter's order and build() uploads them
+    once; draw() then costs a single draw call no matter how many shapes.
+    """
+    def __init__(self):
+        self.points = []
+        self.colors = []
+        self.shape = None
+    
+    def add_rectangle(self, left, right, bottom, top, color):
+        self.points += [(left, bottom), (right, bottom), (right, top),
+                        (left, bottom), (right, top), (left, top)]
+        self.colors += [color] * 6
+    
+    def add_rectangle_outline(self, left, right, bottom, top, color, border_width=1):
+        half = border_width / 2
+        self.add_rectangle(left - half, right + half, bottom - half, bottom + half, color)
+        self.add_rectangle(left - half, right + half, top - half, top + half, color)
+        self.add_rectangle(left - half, left + half, bottom + half, top - half, color)
+        self.add_rectangle(right - half, right + half, bottom + half, top - half, color)
+    
+    def add_triangle(self, x1, y1, x2, y2, x3, y3, color):
+        self.points += [(x1, y1), (x2, y2), (x3, y3)]
+        self.colors += [color] * 3
+    
+    def add_circle(self, x, y, radius, color, segments=24):
+        previous = (x + radius, y)
+        for i in range(1, segments + 1):
+            angle = i * 2 * math.pi / segments
+            point = (x + radius * math.cos(angle), y + radius * math.sin(angle))
+            self.points += [(x, y), previous, point]
+            previous = point
+        self.colors += [color] * (3 * segments)
     
-    def draw_body_segment(self, x, y, index):
-        # Clean, simple body segments
-        scale = max(0.4, 1 - index * 0.05)
-        segment_size = int(GRID_SIZE * 0.7 * scale)
+    def build(self):
+        # An empty layer has nothing to upload and draws nothing
+        if self.points:
+            self.shape = arcade.shape_list.create_triangles_filled_with_colors(self.points, self.colors)
+        self.points = []
+        self.colors = []
+        return self
+    
+    def draw(self):
+        if self.shape is not None:
+            self.shape.draw()
+
+class GradientBackground:
+    """Full-screen horizontal bands whose brightness ripples with a phase.
+
+    Each band is a quad in one vertex buffer uploaded once. The vertex shader
+    colours a band tint * (base + amplitude * sin(y * frequency + phase)) / 255,
+    so animating it only updates the phase uniform and every pixel is a flat fill.
+    """
+    VERTEX_SHADER = """
+        #version 330
+        uniform float phase;
+        uniform float base;
+        uniform float amplitude;
+        uniform float frequency;
+        uniform vec3 tint;
+        in vec2 in_vert;
+        in float in_band;
+        flat out vec3 v_color;
+        void main() {
+            gl_Position = vec4(in_vert / vec2(%d, %d) * 2.0 - 1.0, 0.0, 1.0);
+            float value = floor(base + amplitude * sin(in_band * frequency + phase));
+            v_color = tint * value / 255.0;
+        }
+    """ % (SCREEN_WIDTH, SCREEN_HEIGHT)
+    FRAGMENT_SHADER = """
+        #version 330
+        flat in vec3 v_color;
+        out vec4 fragColor;
+        void main() {
+            fragColor = vec4(v_color, 1.0);
+        }
+    """
+
+    # The program and band meshes are compiled and uploaded once per GL context and
+    # shared by every background; each sets its own uniforms when it draws
+    _programs = {}
+    _geometries = {}
+    
+    def __init__(self, band, base, amplitude, frequency, tint):
+        self.band = band
+        self.uniforms = {"base": base, "amplitude": amplitude, "frequency": frequency, "tint": tint}
+        self.program = None
+        self.geometry = None
+    
+    def build(self):
+        ctx = arcade.get_window().ctx
+        if ctx not in self._programs:
+            self._programs[ctx] = ctx.program(vertex_shader=self.VERTEX_SHADER, fragment_shader=self.FRAGMENT_SHADER)
+        if (ctx, self.band) not in self._geometries:
+            # x, y and the band's bottom edge for the six corners of every band
+            bottoms = np.arange(0, SCREEN_HEIGHT, self.band, dtype=np.float32)
+            vertices = np.zeros((len(bottoms), 6, 3), dtype=np.float32)
+            vertices[:, :, 0] = (0, SCREEN_WIDTH, SCREEN_WIDTH, 0, SCREEN_WIDTH, 0)
+            vertices[:, :, 1] = bottoms[:, None] + np.array((0, 0, 1, 0, 1, 1), dtype=np.float32) * self.band
+            vertices[:, :, 2] = bottoms[:, None]
+            buffer = ctx.buffer(data=vertices.tobytes())
+            self._geometries[ctx, self.band] = ctx.geometry(
+                [arcade.gl.BufferDescription(buffer, "2f 1f", ("in_vert", "in_band"))], mode=ctx.TRIANGLES)
+        self.program = self._programs[ctx]
+        self.geometry = self._geometries[ctx, self.band]
+    
+    def draw(self, phase):
+        if self.program is None:
+            self.build()
+        for name, value in self.uniforms.items():
+            self.program[name] = value
+        self.program["phase"] = phase
+        self.geometry.render(self.program)
+
+class GameHud:
+    """In-game labels kept as persistent Text objects drawn from one batch.
+
+    A label's string is only reassigned when the value it shows changes, so
+    glyph layout happens on score, growth or countdown changes instead of
+    on every frame.
+    """
+    def __init__(self, autopilot=False):
+        self.batch = Batch()
+        self.pause_batch = Batch()
+        self.background = None
+        self.pause_box = None
+        self.shown = {}
+        
+        self.title = arcade.Text("Q_SNAKE", SCREEN_WIDTH//2, SCREEN_HEIGHT-20, (255, 255, 255), 36,
+                                 anchor_x="center", anchor_y="center", batch=self.batch)
+        self.score = arcade.Text("", 30, SCREEN_HEIGHT-90, (255, 215, 0), 32, batch=self.batch)
+        self.high_score = arcade.Text("", 30, SCREEN_HEIGHT-125, (255, 255, 255), 24, batch=self.batch)
+        self.length = arcade.Text("", 350, SCREEN_HEIGHT-90, (0, 255, 255), 28, batch=self.batch)
+        self.bonus_active = arcade.Text("BONUS ACTIVE!", 650, SCREEN_HEIGHT-90, (255, 215, 0), 26, batch=self.batch)
+        self.bonus_countdown = arcade.Text("", 0, 0, (255, 255, 255), 16, batch=self.batch)
+        if autopilot:
+            self.autopilot = arcade.Text("AUTOPILOT", 650, SCREEN_HEIGHT-125, (0, 255, 255), 18, batch=self.batch)
+        self.paused = arcade.Text("PAUSED", SCREEN_WIDTH//2, SCREEN_HEIGHT-175, (255, 255, 0), 24,
+                                  anchor_x="center", anchor_y="center", batch=self.pause_batch)
+    
+    def set(self, label, name, value, fmt):
+        # Only touch the label when what it shows actually changed
+        if self.shown.get(name) != value:
+            self.shown[name] = value
+            label.text = fmt.format(value)
+    
+    def show(self, label, name, visible):
+        key = name + ".visible"
+        if self.shown.get(key) != visible:
+            self.shown[key] = visible
+            label.visible = visible
+    
+    def update(self, score, high_score, length, bonus_position=None, bonus_time_left=0.0):
+        self.set(self.score, "score", score, "SCORE: {}")
+        self.set(self.high_score, "high_score", high_score, "HIGH: {}")
+        self.set(self.length, "length", length, "LENGTH: {}")
+        self.show(self.bonus_active, "bonus_active", bonus_position is not None)
+        self.show(self.bonus_countdown, "bonus_countdown", bonus_position is not None)
+        if bonus_position is not None:
+            # Countdown at 0.1 s resolution, floating above the golden apple
+            self.set(self.bonus_countdown, "bonus_countdown", round(bonus_time_left, 1), "{:.1f}")
+            if self.shown.get("bonus_position") != bonus_position:
+                self.shown["bonus_position"] = bonus_position
+                self.bonus_countdown.position = bonus_position
+    
+    def draw(self, paused=False):
+        if self.background is None:
+            self.background = StaticLayer()
+            # UI background
+            self.background.add_rectangle(0, SCREEN_WIDTH, SCREEN_HEIGHT-150, SCREEN_HEIGHT, (0, 0, 0))
+            # Title bar at top
+            self.background.add_rectangle(0, SCREEN_WIDTH, SCREEN_HEIGHT-40, SCREEN_HEIGHT, (0, 0, 0))
+            self.background.add_rectangle(0, SCREEN_WIDTH, SCREEN_HEIGHT-45, SCREEN_HEIGHT-40, (50, 50, 50))
+            self.background.build()
+        self.background.draw()
+        self.batch.draw()
         
-        # Subtle breathing
-        breath_effect = 1 + 0.02 * math.sin(self.breathing_phase + index * 0.2)
-        segment_size = int(segment_size * breath_effect)
+        # Small pause indicator when paused
+        if paused:
+            if self.pause_box is None:
+                # Semi-transparent overlay at top
+                self.pause_box = StaticLayer()
+                self.pause_box.add_rectangle(SCREEN_WIDTH//2 - 100, SCREEN_WIDTH//2 + 100,
+                                             SCREEN_HEIGHT-200, SCREEN_HEIGHT-150, (0, 0, 0, 180))
+                self.pause_box.add_rectangle_outline(SCREEN_WIDTH//2 - 100, SCREEN_WIDTH//2 + 100,
+                                                     SCREEN_HEIGHT-200, SCREEN_HEIGHT-150, (255, 255, 0), 2)
+                self.pause_box.build()
+            self.pause_box.draw()
+            self.pause_batch.draw()
+
+class ProfilerOverlay:
+    """F3 overlay with rolling p50/p95/p99 per phase from a FrameProfiler.
+    
+    The table is recomputed a few times a second rather than every frame.
+    """
+    REFRESH_SECONDS = 0.25
+    LINE_HEIGHT = 16
+    COLUMN_WIDTH = 65
+    
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.batch = Batch()
+        self.next_refresh = 0
+        rows = ("phase",) + profiler.phases + ("total", "draw calls")
+        left = SCREEN_WIDTH - 320
+        top = SCREEN_HEIGHT - 160
+        bottom = top - 10 - len(rows) * self.LINE_HEIGHT
+        self.background = StaticLayer()
+        self.background.add_rectangle(left, SCREEN_WIDTH - 30, bottom - 6, top, (0, 0, 0, 190))
+        self.background.build()
         
-        # Shadow
-        arcade.draw_circle_filled(x + 2, y - 2, segment_size + 2, (0, 80, 0))
+        # One label for the phase name, then right-aligned percentile columns
+        self.names = []
+        self.cells = []
+        for i, name in enumerate(rows):
+            y = top - 10 - (i + 1) * self.LINE_HEIGHT + 4
+            self.names.append(arcade.Text(name, left + 10, y, (255, 255, 255), 11, batch=self.batch))
+            row = [arcade.Text("", SCREEN_WIDTH - 40 - (2 - c) * self.COLUMN_WIDTH, y, (255, 255, 255), 11,
+                               anchor_x="right", batch=self.batch) for c in range(3)]
+            self.cells.append(row)
+        for cell, header in zip(self.cells[0], ("p50 ms", "p95", "p99")):
+            cell.text = header
+    
+    def refresh(self):
+        for row, (name, values) in zip(self.cells[1:], self.profiler.summary().items()):
+            fmt = "{:.0f}" if name == "draw calls" else "{:.2f}"
+            for cell, value in zip(row, values):
+                cell.text = fmt.format(value)
+    
+    def draw(self):
+        now = time.perf_counter()
+        if now >= self.next_refresh:
+            self.next_refresh = now + self.REFRESH_SECONDS
+            self.refresh()
+        self.background.draw()
+        self.batch.draw()
+
+class GrassRenderer:
+    """Animated grass blades written into one vertex buffer and drawn in one call."""
+    def __init__(self):
+        self.vertices = np.zeros((0, 6), dtype=np.float32)
+        self.buffer = None
+        self.geometry = None
+    
+    def draw(self, positions, time):
+        # positions: (n, 3) float32 array of blade root x, y and scale
+        count = len(positions) * 6
+        if not count:
+            return
+        if len(self.vertices) < count:
+            # Grow geometrically so a slowly rising blade count rarely reallocates
+            self.vertices = np.zeros((max(count, 2 * len(self.vertices)), 6), dtype=np.float32)
+            self.vertices[:, 5] = 255
+            self.geometry = None
         
-        # Main body - gradient green
-        body_green = int(120 + 80 * scale)
-        arcade.draw_circle_filled(x, y, segment_size, (40, body_green, 40))
-        arcade.draw_circle_filled(x, y, segment_size - 3, (60, body_green + 40, 60))
+        x, y, scale = positions.T
+        sway = 2 * np.sin(time * 2 + x * 0.01)
+        red = 20 + (10 * np.sin(time + x * 0.1)).astype(int)
+        green = 80 + (20 * np.sin(time + y * 0.1)).astype(int)
         
-        # Simple scale pattern
-        if index % 2 == 0:
-            for i in range(6):
-                angle = i * math.pi / 3
-                scale_x = x + (segment_size - 6) * math.cos(angle)
-                scale_y = y + (segment_size - 6) * math.sin(angle)
-                arcade.draw_circle_filled(scale_x, scale_y, 2, (80, body_green + 60, 80))
+        # Each blade is a thick line from its root to its swaying tip, as two triangles
+        tip_x = x + sway
+        tip_y = y + 8 * scale
+        dx, dy = tip_x - x, tip_y - y
+        half_width = (2 * scale).astype(int) / 2 / np.hypot(dx, dy)
+        nx, ny = -dy * half_width, dx * half_width
+        corners_x = np.stack([x + nx, x - nx, tip_x - nx, x + nx, tip_x - nx, tip_x + nx], axis=1)
+        corners_y = np.stack([y + ny, y - ny, tip_y - ny, y + ny, tip_y - ny, tip_y + ny], axis=1)
+        vertices = self.vertices[:count]
+        vertices[:, 0] = corners_x.ravel()
+        vertices[:, 1] = corners_y.ravel()
+        vertices[:, 2] = np.repeat(red, 6)
+        vertices[:, 3] = np.repeat(green, 6)
+        vertices[:, 4] = 20
         
-        # Highlight
-        arcade.draw_circle_filled(x - 2, y + 2, segment_size // 3, (120, 255, 120))
+        ctx = arcade.get_window().ctx
+        if self.geometry is None:
+            self.buffer = ctx.buffer(reserve=self.vertices.nbytes)
+            self.geometry = ctx.geometry([arcade.gl.BufferDescription(
+                self.buffer, "2f 4f", ("in_vert", "in_color"))])
+        self.buffer.write(vertices.tobytes())
+        self.geometry.render(ctx.line_generic_with_colors_program, mode=ctx.TRIANGLES, vertices=count)
+
+def build_rock_layer(rock_positions):
+    layer = StaticLayer()
+    for x, y, size in rock_positions:
+        layer.add_circle(x + 2, y - 2, size + 1, (30, 30, 30))  # Shadow
+        layer.add_circle(x, y, size, (60, 60, 70))              # Rock
+        layer.add_circle(x - 1, y + 1, size - 2, (80, 80, 90))  # Highlight
+    return layer.build()
 
 class ProceduralEnvironment:
-    def __init__(self):
-        self.terrain_noise = PerlinNoise(octaves=4, seed=123)
-        self.grass_positions = []
+    def __init__(self, seed=123, density=100):
+        from terrain import noise_field, TERRAIN_STEP, TERRAIN_VARIANTS
+        
+        # Noise for the whole board comes from a cached grid, not per point
+        self.terrain_noise = noise_field(seed % TERRAIN_VARIANTS, SCREEN_WIDTH, SCREEN_HEIGHT - 150)
         self.rock_positions = []
+        self.rock_layer = None
         self.time = 0
+        rng = random.Random(seed)
+        grass = []
         
         # Generate environment within frame
-        for _ in range(100):
-            x = random.randint(30, SCREEN_WIDTH - 30)
-            y = random.randint(30, SCREEN_HEIGHT - 180)
-            if self.terrain_noise([x * 0.01, y * 0.01]) > 0.3:
-                self.grass_positions.append((x, y, random.uniform(0.5, 2.0)))
-            elif self.terrain_noise([x * 0.01, y * 0.01]) < -0.3:
-                self.rock_positions.append((x, y, random.uniform(3, 8)))
+        for _ in range(density):
+            x = rng.randint(30, SCREEN_WIDTH - 30)
+            y = rng.randint(30, SCREEN_HEIGHT - 180)
+            value = self.terrain_noise[y // TERRAIN_STEP, x // TERRAIN_STEP]
+            if value > 0.3:
+                grass.append((x, y, rng.uniform(0.5, 2.0)))
+            elif value < -0.3:
+                self.rock_positions.append((x, y, rng.uniform(3, 8)))
+        
+        # Grass blades as columns so the sway is computed for all of them at once
+        self.grass_positions = np.array(grass, dtype=np.float32).reshape(-1, 3)
+        self.grass = GrassRenderer()
     
     def update(self, dt):
         self.time += dt
     
     def draw(self):
-        # Animated grass
-        for x, y, scale in self.grass_positions:
-            sway = 2 * math.sin(self.time * 2 + x * 0.01)
-            grass_color = (20 + int(10 * math.sin(self.time + x * 0.1)), 
-                          80 + int(20 * math.sin(self.time + y * 0.1)), 20)
-            arcade.draw_line(x, y, x + sway, y + 8 * scale, grass_color, int(2 * scale))
-        
-        # Static rocks with shadows
-        for x, y, size in self.rock_positions:
-            arcade.draw_circle_filled(x + 2, y - 2, size + 1, (30, 30, 30))  # Shadow
-            arcade.draw_circle_filled(x, y, size, (60, 60, 70))              # Rock
-            arcade.draw_circle_filled(x - 1, y + 1, size - 2, (80, 80, 90))  # Highlight
+        # Animated grass, one draw call for every blade
+        self.grass.draw(self.grass_positions, self.time)
+        
+        # Static rocks with shadows, baked on first draw
+        if self.rock_layer is None:
+            self.rock_layer = build_rock_layer(self.rock_positions)
+        self.rock_layer.draw()
+
+class WorldEnvironment:
+    """Grass and rocks for a board larger than the screen, made one chunk at a time.
+    
+    A chunk's props are generated the first time it comes into view, from
+    the world seed and the chunk's position, so it always looks the same.
+    Grass or rock is decided by terrain noise sampled once per cell.
+    """
+    PROPS_PER_CHUNK = 50
+    
+    def __init__(self, seed, width, height):
+        from terrain import perlin_grid
+        
+        self.seed = seed
+        self.width = width
+        self.height = height
+        # Features about five cells apart
+        self.terrain_noise = perlin_grid(width, height, seed, frequency=0.2, step=1)
+        self.chunks = {}
+        self.time = 0
+        self.grass = GrassRenderer()
+    
+    def update(self, dt):
+        self.time += dt
+    
+    def chunk(self, key):
+        if key not in self.chunks:
+            self.chunks[key] = self.generate_chunk(*key)
+        return self.chunks[key]
+    
+    def generate_chunk(self, cx, cy):
+        rng = random.Random(f"{self.seed}:{cx}:{cy}")
+        left, bottom = cx * CHUNK_CELLS, cy * CHUNK_CELLS
+        right = min(left + CHUNK_CELLS, self.width - 1)
+        top = min(bottom + CHUNK_CELLS, self.height - 1)
+        grass = []
+        rocks = []
+        if right > max(left, 1) and top > max(bottom, 1):
+            for _ in range(self.PROPS_PER_CHUNK):
+                # Anywhere inside the frame ring
+                x = rng.uniform(max(left, 1), right) * GRID_SIZE
+                y = rng.uniform(max(bottom, 1), top) * GRID_SIZE
+                value = self.terrain_noise[int(y // GRID_SIZE), int(x // GRID_SIZE)]
+                if value > 0.3:
+                    grass.append((x, y, rng.uniform(0.5, 2.0)))
+                elif value < -0.3:
+                    rocks.append((x, y, rng.uniform(3, 8)))
+        grass = np.array(grass, dtype=np.float32).reshape(-1, 3)
+        return grass, build_rock_layer(rocks)
+    
+    def draw(self, left, bottom, right, top):
+        # Only the chunks overlapping the visible cell rectangle
+        visible = [self.chunk(key) for key in chunks_in_rect(left, bottom, right, top)]
+        grass = [blades for blades, _ in visible if len(blades)]
+        if grass:
+            self.grass.draw(np.concatenate(grass), self.time)
+        for _, rocks in visible:
+            rocks.draw()
+
+class FixedTimestep:
+    """Turns variable frame times into a whole number of fixed simulation ticks.
+    
+    Leftover time carries over to the next frame, so the tick rate matches
+    the configured speed whatever the frame rate. A frame never owes more
+    than max_catch_up seconds of ticks; anything beyond that is dropped so a
+    stall cannot snowball into ever longer catch-up frames. alpha is how far
+    the current time lies between the last tick and the next one.
+    """
+    def __init__(self, step, max_catch_up=0.25):
+        self.step = step
+        self.max_catch_up = max_catch_up
+        self.accumulator = 0.0
+    
+    def advance(self, dt):
+        # Number of ticks to run for a frame that took dt seconds
+        self.accumulator = min(self.accumulator + dt, max(self.max_catch_up, self.step))
+        ticks = int(self.accumulator / self.step)
+        self.accumulator -= ticks * self.step
+        return ticks
+    
+    @property
+    def alpha(self):
+        return min(1.0, self.accumulator / self.step)
+
+def build_ornate_frame():
+    layer = StaticLayer()
+    frame_width = 25
+    
+    # Outer frame background
+    layer.add_rectangle(0, SCREEN_WIDTH, 0, SCREEN_HEIGHT-150, (40, 30, 20))
+    
+    # Multi-layer frame with gradient
+    for i in range(frame_width):
+        progress = i / frame_width
+        gold = int(255 * (1 - progress * 0.6))
+        brown = int(139 * (1 - progress * 0.4))
+        frame_color = (gold, int(gold * 0.8), brown)
+        
+        # Frame borders
+        layer.add_rectangle(i, SCREEN_WIDTH-i, SCREEN_HEIGHT-150-i-1, SCREEN_HEIGHT-150-i, frame_color)
+        layer.add_rectangle(i, SCREEN_WIDTH-i, i, i+1, frame_color)
+        layer.add_rectangle(i, i+1, i, SCREEN_HEIGHT-150-i, frame_color)
+        layer.add_rectangle(SCREEN_WIDTH-i-1, SCREEN_WIDTH-i, i, SCREEN_HEIGHT-150-i, frame_color)
+    
+    # Inner highlight
+    layer.add_rectangle_outline(23, SCREEN_WIDTH-23, 23, SCREEN_HEIGHT-173, (255, 255, 200), 2)
+    
+    # Corner ornaments
+    for corner_x, corner_y in [(30, 30), (SCREEN_WIDTH-30, 30), (30, SCREEN_HEIGHT-180), (SCREEN_WIDTH-30, SCREEN_HEIGHT-180)]:
+        for i in range(4):
+            layer.add_circle(corner_x, corner_y, 12-i*2, (255, 215, 0))
+    
+    # Decorative triangles
+    decoration_color = (200, 150, 50)
+    for x in range(80, SCREEN_WIDTH-80, 60):
+        layer.add_triangle(x, SCREEN_HEIGHT-160, x-8, SCREEN_HEIGHT-145, x+8, SCREEN_HEIGHT-145, decoration_color)
+        layer.add_triangle(x, 10, x-8, 25, x+8, 25, decoration_color)
+    return layer.build()
+
+class WorldView:
+    """Camera and culling for a board larger than the screen.
+    
+    The camera follows the interpolated head and stops at the edges of the
+    world. Each frame works out which cells are on screen (plus a one-cell
+    margin) and draws only the snake segments and scenery chunks there, so
+    frame cost follows the view, not the world size or the snake length.
+    """
+    MARGIN = 1
+    
+    def __init__(self, engine, index_segments=True):
+        # engine: anything with width, height and seed; index_segments also
+        # needs its single snake body (arenas cull whole snakes instead)
+        self.engine = engine
+        self.play_height = SCREEN_HEIGHT - 150
+        self.camera = arcade.camera.Camera2D(viewport=arcade.LBWH(0, 0, SCREEN_WIDTH, self.play_height))
+        self.segment_index = SegmentIndex(engine) if index_segments else None
+        self.environment = WorldEnvironment(engine.seed, engine.width, engine.height)
+        self.frame_layer = None
+        self.look_at(engine.width * GRID_SIZE / 2, engine.height * GRID_SIZE / 2)
+    
+    def follow(self, snake, shake_x=0, shake_y=0):
+        # Centre on the interpolated head
+        x, y = snake.segment_centers(np.array([0]))[0].tolist()
+        self.look_at(x, y, shake_x, shake_y)
+    
+    def look_at(self, x, y, shake_x=0, shake_y=0):
+        # Clamped so the camera never looks past the world
+        x = self.clamp(x, SCREEN_WIDTH / 2, self.engine.width * GRID_SIZE)
+        y = self.clamp(y, self.play_height / 2, self.engine.height * GRID_SIZE)
+        self.camera.position = (x - shake_x, y - shake_y)
+        
+        left = int((x - SCREEN_WIDTH / 2) // GRID_SIZE) - self.MARGIN
+        bottom = int((y - self.play_height / 2) // GRID_SIZE) - self.MARGIN
+        right = int((x + SCREEN_WIDTH / 2) // GRID_SIZE) + self.MARGIN
+        top = int((y + self.play_height / 2) // GRID_SIZE) + self.MARGIN
+        self.cells = (max(left, 0), max(bottom, 0),
+                      min(right, self.engine.width - 1), min(top, self.engine.height - 1))
+    
+    @staticmethod
+    def clamp(center, half_view, world_size):
+        if world_size <= 2 * half_view:
+            return world_size / 2
+        return min(max(center, half_view), world_size - half_view)
+    
+    def is_visible(self, pos, reach=0):
+        # reach: also true if pos is that many cells off screen
+        left, bottom, right, top = self.cells
+        return left - reach <= pos[0] <= right + reach and bottom - reach <= pos[1] <= top + reach
+    
+    def to_screen(self, x, y):
+        # World pixels to window pixels, pinned inside the play area so a
+        # label for something off screen waits at the edge nearest to it
+        cam_x, cam_y = self.camera.position
+        x = x - cam_x + SCREEN_WIDTH / 2
+        y = y - cam_y + self.play_height / 2
+        return (min(max(x, 10), SCREEN_WIDTH - 40), min(max(y, 10), self.play_height - 20))
+    
+    def draw_frame(self):
+        if self.frame_layer is None:
+            self.frame_layer = self.build_frame()
+        self.frame_layer.draw()
+    
+    def build_frame(self):
+        # Ground plus a gold border over the wall ring; a fixed number of
+        # shapes whatever the world size
+        layer = StaticLayer()
+        right = self.engine.width * GRID_SIZE
+        top = self.engine.height * GRID_SIZE
+        layer.add_rectangle(0, right, 0, top, (40, 30, 20))
+        for i in range(GRID_SIZE):
+            progress = i / GRID_SIZE
+            gold = int(255 * (1 - progress * 0.6))
+            brown = int(139 * (1 - progress * 0.4))
+            color = (gold, int(gold * 0.8), brown)
+            layer.add_rectangle(i, right - i, top - i - 1, top - i, color)
+            layer.add_rectangle(i, right - i, i, i + 1, color)
+            layer.add_rectangle(i, i + 1, i, top - i, color)
+            layer.add_rectangle(right - i - 1, right - i, i, top - i, color)
+        layer.add_rectangle_outline(GRID_SIZE, right - GRID_SIZE, GRID_SIZE, top - GRID_SIZE,
+                                    (255, 255, 200), 2)
+        return layer.build()
+    
+    def draw_environment(self):
+        self.environment.draw(*self.cells)
+    
+    def draw_snake(self, snake):
+        snake.sync_body_sprites(self.segment_index.visible(*self.cells))
+        snake.draw_batched()
 
 class GameView(arcade.View):
-    def __init__(self, speed):
+    def __init__(self, speed, seed=None, replay=None, playback_speed=1.0, autopilot=False, world=None,
+                 save_state=None):
         super().__init__()
+        # A replay drives the snake instead of the keyboard, at playback_speed x real time
+        self.replay = replay
+        if replay:
+            speed = replay.speed
+            self.engine = replay.new_engine()
+            self.replay_directions = replay.directions()
+            self.recorder = None
+        elif save_state:
+            # Resume a suspended game, board size, autopilot and all
+            self.engine = save_state.engine
+            speed = self.engine.speed
+            autopilot = save_state.autopilot
+            self.recorder = ReplayRecorder(self.engine, save_state.replay)
+        else:
+            # world: (width, height) in cells for a board bigger than the screen
+            width, height = world or (GRID_WIDTH, GRID_HEIGHT)
+            self.engine = SnakeEngine(speed, seed, width, height)
+            self.recorder = ReplayRecorder(self.engine)
         self.speed = speed
-        self.snake = RealisticSnake((GRID_WIDTH//2, GRID_HEIGHT//2))
-        self.environment = ProceduralEnvironment()
-        self.food_pos = self.spawn_food()
-        self.score = 0
-        self.move_timer = 0
-        self.move_delay = 1.0 / self.speed
+        self.difficulty = difficulty_name(speed)
+        self.high_scores = get_high_score_store()
+        self.snake = RealisticSnake(self.engine)
+        if (self.engine.width, self.engine.height) != (GRID_WIDTH, GRID_HEIGHT):
+            self.world = WorldView(self.engine)
+            self.environment = self.world.environment
+        else:
+            self.world = None
+            self.environment = ProceduralEnvironment(self.engine.seed)
+        self.move_delay = self.engine.tick_seconds / playback_speed
+        self.timestep = FixedTimestep(self.move_delay)
         self.paused = False
-        self.particles = []
+        if save_state:
+            self.snake.direction = self.snake.target_direction = save_state.direction
+            self.timestep.accumulator = save_state.accumulator
+            # Wait for the player before moving again
+            self.paused = True
+        # Seeded like the engine so a seeded game draws the same frames every run
+        self.particles = ParticleSystem(rng=np.random.default_rng(self.engine.seed))
         self.screen_shake = 0
-        self.bonus_food = None
-        self.bonus_timer = 0
-        self.bonus_spawn_time = random.uniform(10, 20)
-        
-    def spawn_food(self):
-        attempts = 0
-        while attempts < 100:
-            # Spawn within frame boundaries (avoid edges)
-            pos = (random.randint(2, GRID_WIDTH-3), random.randint(2, GRID_HEIGHT-3))
-            snake_positions = [(int(round(x)), int(round(y))) for x, y in self.snake.segments]
-            if pos not in snake_positions:
-                return pos
-            attempts += 1
-        # Fallback: find any empty spot within boundaries
-        for x in range(2, GRID_WIDTH-2):
-            for y in range(2, GRID_HEIGHT-2):
-                pos = (x, y)
-                snake_positions = [(int(round(x)), int(round(y))) for x, y in self.snake.segments]
-                if pos not in snake_positions:
-                    return pos
-        return (5, 5)  # Safe fallback
+        self.frame_layer = None
+        # The autopilot steers through set_direction in place of the arrow keys
+        self.autopilot = Autopilot(self.engine) if autopilot and not replay else None
+        self.hud = GameHud(autopilot=self.autopilot is not None)
+        self.profiler_overlay = None
+        
+        # Gameplay events go to the window's EventLog, if any, never to stdout
+        self.event_log = getattr(self.window, "event_log", None)
+        self.game_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{self.engine.seed}"
+        self.started = time.perf_counter()
+        mode = "replay" if replay else "autopilot" if self.autopilot else "player"
+        self.log_event("game_start", mode=mode, resumed=bool(save_state), difficulty=self.difficulty,
+                       speed=speed, seed=self.engine.seed, board=(self.engine.width, self.engine.height))
+        self.log_event("spawn", item="food", cell=self.food_pos)
+    
+    @property
+    def score(self):
+        return self.engine.score
+    
+    @property
+    def food_pos(self):
+        return self.engine.food_pos
+    
+    @property
+    def bonus_food(self):
+        return self.engine.bonus_food
     
     def on_draw(self):
+        # Phase timings only when a FrameProfiler is installed on the window
+        profiler = getattr(self.window, "profiler", None)
+        if profiler:
+            profiler.start()
         self.clear()
+        if profiler:
+            profiler.lap("clear")
         
         # Screen shake
         shake_x = random.randint(-self.screen_shake, self.screen_shake) if self.screen_shake > 0 else 0
         shake_y = random.randint(-self.screen_shake, self.screen_shake) if self.screen_shake > 0 else 0
         self.screen_shake = max(0, self.screen_shake - 1)
+        self.snake.alpha = self.timestep.alpha
+        world = self.world
+        if world:
+            # The camera shakes the whole scene, so nothing is offset by hand
+            world.follow(self.snake, shake_x, shake_y)
+            world.camera.use()
+            shake_x = shake_y = 0
         
         # Draw beautiful ornate frame
-        self.draw_ornate_frame()
+        if world:
+            world.draw_frame()
+        else:
+            self.draw_ornate_frame()
+        if profiler:
+            profiler.lap("frame")
         
         # Draw environment
-        self.environment.draw()
+        if world:
+            world.draw_environment()
+        else:
+            self.environment.draw()
+        if profiler:
+            profiler.lap("environment")
         
-        # Draw realistic snake
-        self.snake.draw_realistic(shake_x, shake_y)
+        # Draw realistic snake, part way between its last two cells
+        if world:
+            world.draw_snake(self.snake)
+        else:
+            self.snake.draw_realistic(shake_x, shake_y)
+        if profiler:
+            profiler.lap("snake")
         
-        # Enhanced food
-        food_x = self.food_pos[0] * GRID_SIZE + GRID_SIZE//2 + shake_x
-        food_y = self.food_pos[1] * GRID_SIZE + GRID_SIZE//2 + shake_y
-        
-        # Food with realistic apple texture
-        arcade.draw_circle_filled(food_x, food_y, 15, (180, 20, 20))
-        arcade.draw_circle_filled(food_x - 3, food_y + 3, 12, (220, 60, 60))
-        arcade.draw_circle_filled(food_x - 5, food_y + 5, 6, (255, 150, 150))
-        
-        # Apple stem
-        arcade.draw_line(food_x, food_y + 15, food_x, food_y + 20, (101, 67, 33), 3)
+        # Enhanced food (absent only while the board is full)
+        if self.food_pos and (not world or world.is_visible(self.food_pos)):
+            food_x = self.food_pos[0] * GRID_SIZE + GRID_SIZE//2 + shake_x
+            food_y = self.food_pos[1] * GRID_SIZE + GRID_SIZE//2 + shake_y
+            
+            # Food with realistic apple texture
+            arcade.draw_circle_filled(food_x, food_y, 15, (180, 20, 20))
+            arcade.draw_circle_filled(food_x - 3, food_y + 3, 12, (220, 60, 60))
+            arcade.draw_circle_filled(food_x - 5, food_y + 5, 6, (255, 150, 150))
+            
+            # Apple stem
+            arcade.draw_line(food_x, food_y + 15, food_x, food_y + 20, (101, 67, 33), 3)
         
         # Bonus food (golden apple)
         if self.bonus_food:
             bonus_x = self.bonus_food[0] * GRID_SIZE + GRID_SIZE//2 + shake_x
             bonus_y = self.bonus_food[1] * GRID_SIZE + GRID_SIZE//2 + shake_y
             
-            # Pulsing golden glow
-            glow_size = 20 + 8 * math.sin(self.bonus_timer * 5)
-            for r in range(int(glow_size), 10, -2):
-                alpha = 100 - r * 3
-                arcade.draw_circle_filled(bonus_x, bonus_y, r, (255, 215, 0))
-            
-            # Golden apple
-            arcade.draw_circle_filled(bonus_x, bonus_y, 15, (255, 215, 0))
-            arcade.draw_circle_filled(bonus_x - 3, bonus_y + 3, 12, (255, 255, 100))
-            arcade.draw_circle_filled(bonus_x - 5, bonus_y + 5, 6, (255, 255, 200))
-            
-            # Golden stem
-            arcade.draw_line(bonus_x, bonus_y + 15, bonus_x, bonus_y + 20, (184, 134, 11), 4)
+            if not world or world.is_visible(self.bonus_food):
+                # Pulsing golden glow
+                glow_size = 20 + 8 * math.sin(self.engine.clock * 5)
+                for r in range(int(glow_size), 10, -2):
+                    alpha = 100 - r * 3
+                    arcade.draw_circle_filled(bonus_x, bonus_y, r, (255, 215, 0))
+                
+                # Golden apple
+                arcade.draw_circle_filled(bonus_x, bonus_y, 15, (255, 215, 0))
+                arcade.draw_circle_filled(bonus_x - 3, bonus_y + 3, 12, (255, 255, 100))
+                arcade.draw_circle_filled(bonus_x - 5, bonus_y + 5, 6, (255, 255, 200))
+                
+                # Golden stem
+                arcade.draw_line(bonus_x, bonus_y + 15, bonus_x, bonus_y + 20, (184, 134, 11), 4)
+        if profiler:
+            profiler.lap("food")
             
-            # Timer indicator
-            time_left = max(0, 8 - (self.bonus_timer - self.bonus_spawn_time))
-            arcade.draw_text(f"{time_left:.1f}", bonus_x - 10, bonus_y + 25, (255, 255, 255), 16)
-        
         # Particles
-        for particle in self.particles[:]:
-            particle[0] += particle[2]
-            particle[1] += particle[3]
-            particle[4] -= 1
-            if particle[4] <= 0:
-                self.particles.remove(particle)
-            else:
-                arcade.draw_circle_filled(particle[0], particle[1], 3, (255, 215, 0))
-        
-        # UI background
-        arcade.draw_lrbt_rectangle_filled(0, SCREEN_WIDTH, SCREEN_HEIGHT-150, SCREEN_HEIGHT, (0, 0, 0))
-        
-        # Title bar at top
-        arcade.draw_lrbt_rectangle_filled(0, SCREEN_WIDTH, SCREEN_HEIGHT-40, SCREEN_HEIGHT, (0, 0, 0))
-        arcade.draw_lrbt_rectangle_filled(0, SCREEN_WIDTH, SCREEN_HEIGHT-45, SCREEN_HEIGHT-40, (50, 50, 50))
-        arcade.draw_text("Q_SNAKE", SCREEN_WIDTH//2, SCREEN_HEIGHT-20, (255, 255, 255), 36, anchor_x="center", anchor_y="center")
-        
-        # Stats row below title
-        high_score = load_high_score()
+        self.particles.draw()
+        if profiler:
+            profiler.lap("particles")
+        if world:
+            self.window.default_camera.use()
         
-        # Left side stats
-        arcade.draw_text(f"SCORE: {self.score}", 30, SCREEN_HEIGHT-90, (255, 215, 0), 32)
-        arcade.draw_text(f"HIGH: {high_score}", 30, SCREEN_HEIGHT-125, (255, 255, 255), 24)
-        
-        # Center stats
-        arcade.draw_text(f"LENGTH: {len(self.snake.segments)}", 350, SCREEN_HEIGHT-90, (0, 255, 255), 28)
-        
-        # Right side status
+        # HUD and bonus timer indicator
+        bonus_label_pos = None
         if self.bonus_food:
-            arcade.draw_text("BONUS ACTIVE!", 650, SCREEN_HEIGHT-90, (255, 215, 0), 26)
-        
-        # Small pause indicator when paused
-        if self.paused:
-            # Semi-transparent overlay at top
-            arcade.draw_lrbt_rectangle_filled(SCREEN_WIDTH//2 - 100, SCREEN_WIDTH//2 + 100, 
-                                           SCREEN_HEIGHT-200, SCREEN_HEIGHT-150, (0, 0, 0, 180))
-            arcade.draw_lrbt_rectangle_outline(SCREEN_WIDTH//2 - 100, SCREEN_WIDTH//2 + 100, 
-                                            SCREEN_HEIGHT-200, SCREEN_HEIGHT-150, (255, 255, 0), 2)
-            arcade.draw_text("PAUSED", SCREEN_WIDTH//2, SCREEN_HEIGHT-175, (255, 255, 0), 24, anchor_x="center", anchor_y="center")
+            bonus_label_pos = (bonus_x - 10, bonus_y + 25)
+            if world:
+                bonus_label_pos = world.to_screen(*bonus_label_pos)
+        self.hud.update(self.score, self.high_scores.high_score, len(self.snake.segments),
+                        bonus_label_pos, self.engine.bonus_time_left())
+        self.hud.draw(self.paused)
+        if profiler:
+            profiler.lap("hud")
+            profiler.end_frame()
+            if profiler.overlay_visible:
+                if self.profiler_overlay is None:
+                    self.profiler_overlay = ProfilerOverlay(profiler)
+                self.profiler_overlay.draw()
+                # The overlay's own draw calls are not billed to the next frame
+                profiler.draw_counter.take()
     
     def draw_ornate_frame(self):
-        frame_width = 25
-        
-        # Outer frame background
-        arcade.draw_lrbt_rectangle_filled(0, SCREEN_WIDTH, 0, SCREEN_HEIGHT-150, (40, 30, 20))
-        
-        # Multi-layer frame with gradient
-        for i in range(frame_width):
-            progress = i / frame_width
-            gold = int(255 * (1 - progress * 0.6))
-            brown = int(139 * (1 - progress * 0.4))
-            frame_color = (gold, int(gold * 0.8), brown)
-            
-            # Frame borders
-            arcade.draw_lrbt_rectangle_filled(i, SCREEN_WIDTH-i, SCREEN_HEIGHT-150-i-1, SCREEN_HEIGHT-150-i, frame_color)
-            arcade.draw_lrbt_rectangle_filled(i, SCREEN_WIDTH-i, i, i+1, frame_color)
-            arcade.draw_lrbt_rectangle_filled(i, i+1, i, SCREEN_HEIGHT-150-i, frame_color)
-            arcade.draw_lrbt_rectangle_filled(SCREEN_WIDTH-i-1, SCREEN_WIDTH-i, i, SCREEN_HEIGHT-150-i, frame_color)
-        
-        # Inner highlight
-        arcade.draw_lrbt_rectangle_outline(23, SCREEN_WIDTH-23, 23, SCREEN_HEIGHT-173, (255, 255, 200), 2)
-        
-        # Corner ornaments
-        for corner_x, corner_y in [(30, 30), (SCREEN_WIDTH-30, 30), (30, SCREEN_HEIGHT-180), (SCREEN_WIDTH-30, SCREEN_HEIGHT-180)]:
-            for i in range(4):
-                arcade.draw_circle_filled(corner_x, corner_y, 12-i*2, (255, 215, 0))
-        
-        # Decorative triangles
-        decoration_color = (200, 150, 50)
-        for x in range(80, SCREEN_WIDTH-80, 60):
-            arcade.draw_triangle_filled(x, SCREEN_HEIGHT-160, x-8, SCREEN_HEIGHT-145, x+8, SCREEN_HEIGHT-145, decoration_color)
-            arcade.draw_triangle_filled(x, 10, x-8, 25, x+8, 25, decoration_color)
+        # The frame never changes, so it is built once per view
+        if self.frame_layer is None:
+            self.frame_layer = self.build_ornate_frame()
+        self.frame_layer.draw()
+    
+    def build_ornate_frame(self):
+        return build_ornate_frame()
     
     def on_update(self, delta_time):
+        profiler = getattr(self.window, "profiler", None)
+        if profiler:
+            profiler.start()
+            self.advance(delta_time)
+            profiler.lap("update")
+        else:
+            self.advance(delta_time)
+    
+    def advance(self, delta_time):
         if not self.paused:
             # Disable physics updates to prevent position drift
             # self.snake.update_physics(delta_time)
             self.environment.update(delta_time)
-            self.move_timer += delta_time
-            self.bonus_timer += delta_time
+            self.particles.update(delta_time)
             
-            # Spawn bonus food
-            if not self.bonus_food and self.bonus_timer >= self.bonus_spawn_time:
-                attempts = 0
-                while attempts < 50:
-                    pos = (random.randint(2, GRID_WIDTH-3), random.randint(2, GRID_HEIGHT-3))
-                    snake_positions = [(int(round(x)), int(round(y))) for x, y in self.snake.segments]
-                    if pos not in snake_positions and pos != self.food_pos:
-                        self.bonus_food = pos
-                        break
-                    attempts += 1
+            # Every tick owed since the last frame, not just one
+            for _ in range(self.timestep.advance(delta_time)):
+                if not self.tick():
+                    return
+    
+    def tick(self):
+        # One engine step; False once the game is over
+        if self.replay:
+            direction = next(self.replay_directions, False)
+            if direction is False:
+                self.game_over()
+                return False
+        else:
+            if self.autopilot:
+                self.snake.set_direction(self.autopilot.choose())
+            direction = self.snake.target_direction
+            self.recorder.record(direction)
+        
+        result = self.engine.step(direction)
+        if result.bonus_spawned:
+            self.log_event("spawn", item="bonus", cell=result.bonus_spawned)
+        if result.bonus_expired:
+            self.log_event("bonus_expire")
+        if not result.alive:
+            self.game_over()
+            return False
+        if self.world:
+            self.world.segment_index.update(result)
+        
+        # Check regular food collision
+        if result.ate_food:
+            self.screen_shake = 5
             
-            # Remove bonus food after 8 seconds
-            if self.bonus_food and self.bonus_timer >= self.bonus_spawn_time + 8:
-                self.bonus_food = None
-                self.bonus_spawn_time = self.bonus_timer + random.uniform(15, 25)
+            # Particle explosion
+            food_x = result.ate_food[0] * GRID_SIZE + GRID_SIZE//2
+            food_y = result.ate_food[1] * GRID_SIZE + GRID_SIZE//2
+            self.particles.emit(food_x, food_y, 15, (2, 6), 30)
             
-            if self.move_timer >= self.move_delay:
-                self.move_timer = 0
-                
-                # Use integer positions for collision detection
-                head_x, head_y = int(self.snake.segments[0][0]), int(self.snake.segments[0][1])
-                new_head = (head_x + self.snake.target_direction[0], head_y + self.snake.target_direction[1])
-                
-                # Convert snake body to integer positions
-                snake_body_positions = [(int(x), int(y)) for x, y in self.snake.segments]
-                
-                # Check collision - adjusted top boundary
-                if (new_head[0] < 1 or new_head[0] >= GRID_WIDTH-1 or 
-                    new_head[1] < 1 or new_head[1] > GRID_HEIGHT-2 or 
-                    new_head in snake_body_positions):
-                    game_over_view = GameOverView(self.score, len(self.snake.segments))
-                    self.window.show_view(game_over_view)
-                    return
-                
-                # Move snake with integer positions
-                self.snake.segments.insert(0, new_head)
-                self.snake.segment_angles.insert(0, math.atan2(self.snake.target_direction[1], self.snake.target_direction[0]))
-                
-                head_grid_pos = new_head
-                
-                # Check regular food collision
-                if head_grid_pos == self.food_pos:
-                    self.snake.grow()
-                    self.score += 10
-                    self.screen_shake = 5
-                    
-                    # Particle explosion
-                    food_x = self.food_pos[0] * GRID_SIZE + GRID_SIZE//2
-                    food_y = self.food_pos[1] * GRID_SIZE + GRID_SIZE//2
-                    for _ in range(15):
-                        angle = random.uniform(0, 2 * math.pi)
-                        speed = random.uniform(2, 6)
-                        self.particles.append([food_x, food_y, 
-                                             speed * math.cos(angle), speed * math.sin(angle), 30])
-                    
-                    self.food_pos = self.spawn_food()
-                    print(f"Food eaten! New food at {self.food_pos}, Score: {self.score}")
-                
-                # Check bonus food collision
-                elif self.bonus_food and head_grid_pos == self.bonus_food:
-                    self.snake.grow()
-                    self.snake.grow()  # Double growth for bonus
-                    self.score += 50
-                    self.screen_shake = 10
-                    
-                    # Golden particle explosion
-                    bonus_x = self.bonus_food[0] * GRID_SIZE + GRID_SIZE//2
-                    bonus_y = self.bonus_food[1] * GRID_SIZE + GRID_SIZE//2
-                    for _ in range(25):
-                        angle = random.uniform(0, 2 * math.pi)
-                        speed = random.uniform(3, 8)
-                        self.particles.append([bonus_x, bonus_y, 
-                                             speed * math.cos(angle), speed * math.sin(angle), 40])
-                    
-                    self.bonus_food = None
-                    self.bonus_spawn_time = self.bonus_timer + random.uniform(15, 25)
-                    print(f"BONUS FOOD! +50 points, Score: {self.score}")
-                
-                # Remove tail if no food eaten
-                if head_grid_pos != self.food_pos and (not self.bonus_food or head_grid_pos != self.bonus_food):
-                    self.snake.segments.pop()
-                    self.snake.segment_angles.pop()
+            self.log_event("eat", item="food", cell=result.ate_food, points=FOOD_POINTS,
+                           score=self.score, length=result.length)
+            self.log_event("spawn", item="food", cell=self.food_pos)
+        
+        # Check bonus food collision
+        elif result.ate_bonus:
+            self.screen_shake = 10
+            
+            # Golden particle explosion
+            bonus_x = result.ate_bonus[0] * GRID_SIZE + GRID_SIZE//2
+            bonus_y = result.ate_bonus[1] * GRID_SIZE + GRID_SIZE//2
+            self.particles.emit(bonus_x, bonus_y, 25, (3, 8), 40)
+            
+            self.log_event("eat", item="bonus", cell=result.ate_bonus, points=BONUS_POINTS,
+                           score=self.score, length=result.length)
+        return True
+    
+    def save_state(self):
+        return SaveState(self.engine, self.snake.target_direction, self.timestep.accumulator, self.recorder.replay,
+                         autopilot=self.autopilot is not None)
+    
+    def suspend(self):
+        # With --suspend-file, save the game for the next start
+        suspend_path = getattr(self.window, "suspend_path", None)
+        if suspend_path and not self.replay and self.engine.alive:
+            self.save_state().save(suspend_path)
+    
+    def discard_suspended(self):
+        suspend_path = getattr(self.window, "suspend_path", None)
+        if suspend_path and not self.replay:
+            remove_file(suspend_path)
+    
+    def on_deactivate(self):
+        # Losing focus pauses the game and saves it
+        if self.replay or not self.engine.alive:
+            return
+        self.paused = True
+        self.suspend()
+    
+    def on_close(self):
+        # Closing the window mid-game keeps it for the next start
+        self.suspend()
+    
+    def on_hide_view(self):
+        # Leaving for the game over screen or the menu ends the game, so it is not resumed
+        self.discard_suspended()
+    
+    def game_over(self):
+        if self.recorder:
+            self.save_replay(self.recorder.finish())
+        # Decision latency of the autopilot rides along with the game over event
+        self.log_event("game_over", cause=self.engine.death_cause, difficulty=self.difficulty, score=self.score,
+                       length=self.engine.length, ticks=self.engine.ticks,
+                       seconds=round(time.perf_counter() - self.started, 3), game_seconds=round(self.engine.clock, 3),
+                       autopilot=self.autopilot.stats() if self.autopilot else None)
+        # Replays and autopilot games never reach the leaderboard
+        game_over_view = GameOverView(self.score, len(self.snake.segments), self.difficulty,
+                                      submit=not self.replay and not self.autopilot)
+        self.window.show_view(game_over_view)
+    
+    def log_event(self, event, **fields):
+        if self.event_log:
+            self.event_log.log(event, game=self.game_id, **fields)
+    
+    def toggle_profiler_overlay(self):
+        # F3 profiles only while the overlay shows, unless --profile-export is recording anyway
+        profiler = getattr(self.window, "profiler", None)
+        if profiler is None:
+            from frame_profiler import FrameProfiler
+            profiler = self.window.profiler = self.window.overlay_profiler = FrameProfiler().install()
+        profiler.overlay_visible = not profiler.overlay_visible
+        if not profiler.overlay_visible and profiler is getattr(self.window, "overlay_profiler", None):
+            profiler.uninstall()
+            self.window.profiler = self.window.overlay_profiler = None
+            self.profiler_overlay = None
+    
+    def save_replay(self, replay):
+        # Only when a replay directory was given on the command line
+        replay_dir = getattr(self.window, "replay_dir", None)
+        if not replay_dir:
+            return
+        os.makedirs(replay_dir, exist_ok=True)
+        name = time.strftime("%Y%m%d-%H%M%S") + f"-{replay.seed}.qsr"
+        replay.save(os.path.join(replay_dir, name))
     
     def on_key_press(self, key, modifiers):
-        if key == arcade.key.SPACE:
+        if key == arcade.key.F3:
+            self.toggle_profiler_overlay()
+        elif key == arcade.key.SPACE:
             self.paused = not self.paused
-        elif not self.paused:
+        elif not self.paused and not self.replay and not self.autopilot:
             if key == arcade.key.UP:
                 self.snake.set_direction((0, 1))
             elif key == arcade.key.DOWN:
@@ -479,16 +1221,206 @@ class GameView(arcade.View):
             elif key == arcade.key.RIGHT:
                 self.snake.set_direction((1, 0))
 
+class ArenaView(arcade.View):
+    """The player against other snakes on one board, with food everywhere.
+    
+    Locally, snake 0 is the player and the rest are GreedyBots that respawn a
+    few seconds after dying. With a client (snake_server.SnapshotClient) the
+    arena is a mirror of a server's, advanced only by the snapshots it sends.
+    Dead snakes leave their bodies behind as food. Boards bigger than the
+    screen get a camera that follows the player.
+    """
+    # Texture colour bands for the other snakes: red, blue, yellow, magenta, cyan
+    OTHER_CHANNELS = ("GRB", "RBG", "GGR", "GRG", "RGG")
+    
+    def __init__(self, bots=3, speed=8, seed=None, autopilot=False, world=None, client=None):
+        super().__init__()
+        self.client = client
+        if client:
+            self.engine = client.mirror
+            self.player = self.engine.snakes[self.engine.player]
+            self.bots = []
+            autopilot = False
+        else:
+            width, height = world or (GRID_WIDTH, GRID_HEIGHT)
+            self.engine = ArenaEngine(bots + 1, humans=1, speed=speed, seed=seed, width=width, height=height,
+                                      food=bots + 2, respawn_ticks=3 * speed)
+            self.player = self.engine.snakes[0]
+            self.bots = [GreedyBot(self.engine, snake) for snake in self.engine.snakes[0 if autopilot else 1:]]
+        self.player_length = self.player.length
+        self.autopilot = autopilot
+        self.snakes = [RealisticSnake(snake, "RGB" if snake is self.player else
+                                      self.OTHER_CHANNELS[snake.index % len(self.OTHER_CHANNELS)])
+                       for snake in self.engine.snakes]
+        if (self.engine.width, self.engine.height) != (GRID_WIDTH, GRID_HEIGHT):
+            self.world = WorldView(self.engine, index_segments=False)
+            self.environment = self.world.environment
+        else:
+            self.world = None
+            self.environment = ProceduralEnvironment(self.engine.seed)
+        self.timestep = FixedTimestep(self.engine.tick_seconds)
+        self.particles = ParticleSystem()
+        self.hud = GameHud(autopilot=autopilot)
+        self.frame_layer = None
+        self.food_layer = None
+        self.food_version = None
+        self.screen_shake = 0
+        self.paused = False
+    
+    def on_draw(self):
+        self.clear()
+        shake_x = random.randint(-self.screen_shake, self.screen_shake) if self.screen_shake > 0 else 0
+        shake_y = random.randint(-self.screen_shake, self.screen_shake) if self.screen_shake > 0 else 0
+        self.screen_shake = max(0, self.screen_shake - 1)
+        alpha = self.timestep.alpha
+        for snake in self.snakes:
+            snake.alpha = alpha
+        world = self.world
+        if world:
+            if self.player.alive:
+                world.follow(self.snakes[self.player.index], shake_x, shake_y)
+            world.camera.use()
+            shake_x = shake_y = 0
+            world.draw_frame()
+            world.draw_environment()
+        else:
+            if self.frame_layer is None:
+                self.frame_layer = build_ornate_frame()
+            self.frame_layer.draw()
+            self.environment.draw()
+        
+        # All food is one layer, rebuilt only when some was eaten or dropped
+        if self.food_version != self.engine.food_version:
+            self.food_version = self.engine.food_version
+            self.food_layer = self.build_food_layer()
+        self.food_layer.draw()
+        
+        for snake in self.snakes:
+            body = snake.engine
+            # A body never reaches further from its head than its length
+            if body.alive and (not world or world.is_visible(body.segments[0], body.length)):
+                snake.draw_realistic(shake_x, shake_y)
+        self.particles.draw()
+        if world:
+            self.window.default_camera.use()
+        
+        best = max(snake.score for snake in self.engine.snakes)
+        self.hud.update(self.player.score, best, self.player.length)
+        self.hud.draw(self.paused)
+    
+    def build_food_layer(self):
+        layer = StaticLayer()
+        width = self.engine.width
+        for cell in self.engine.food_cells.cells:
+            x = cell % width * GRID_SIZE + GRID_SIZE // 2
+            y = cell // width * GRID_SIZE + GRID_SIZE // 2
+            if self.engine.food[cell] == FOOD_POINTS:
+                layer.add_circle(x, y, 15, (180, 20, 20))
+                layer.add_circle(x - 3, y + 3, 12, (220, 60, 60))
+                layer.add_circle(x - 5, y + 5, 6, (255, 150, 150))
+                layer.add_rectangle(x - 1.5, x + 1.5, y + 15, y + 20, (101, 67, 33))
+            else:
+                # Leftovers of a dead snake
+                layer.add_circle(x, y, 8, (120, 90, 40))
+                layer.add_circle(x - 2, y + 2, 5, (170, 130, 60))
+        return layer.build()
+    
+    def on_update(self, delta_time):
+        # Paused, everything holds still as in GameView; an online game never pauses
+        if self.paused:
+            return
+        self.environment.update(delta_time)
+        self.particles.update(delta_time)
+        if self.client:
+            self.receive(delta_time)
+            return
+        for _ in range(self.timestep.advance(delta_time)):
+            if not self.tick():
+                return
+    
+    def tick(self):
+        # One arena step for every snake; False once the player is dead
+        directions = [None] * len(self.engine.snakes)
+        if not self.autopilot:
+            directions[0] = self.snakes[0].target_direction
+        result = self.engine.step(bot_directions(self.engine, self.bots, directions))
+        self.show_tick(result.eaten)
+        
+        if not self.player.alive:
+            # Arena games never reach the leaderboard
+            self.window.show_view(GameOverView(self.player.score, self.player_length, "ARENA", submit=False))
+            return False
+        self.player_length = self.player.length
+        return True
+    
+    def receive(self, delta_time):
+        # Apply whatever the server sent since the last frame; the snakes are
+        # drawn part way to their next cell until the next delta arrives
+        timestep = self.timestep
+        timestep.accumulator = min(timestep.accumulator + delta_time, timestep.step)
+        for payload in self.client.poll():
+            self.show_tick(self.engine.apply(payload))
+            timestep.accumulator = 0.0
+        if not self.client.connected:
+            self.window.show_view(GameOverView(self.player.score, self.player_length, "ONLINE", submit=False))
+        elif self.player.alive:
+            self.player_length = self.player.length
+    
+    def show_tick(self, eaten):
+        for snake in self.snakes:
+            snake.direction = snake.target_direction = snake.engine.direction
+        for index, (x, y), points in eaten:
+            self.particles.emit(x * GRID_SIZE + GRID_SIZE // 2, y * GRID_SIZE + GRID_SIZE // 2,
+                                15 if points == FOOD_POINTS else 5, (2, 6), 30)
+            if index == self.player.index:
+                self.screen_shake = 5
+    
+    def on_hide_view(self):
+        if self.client:
+            self.client.close()
+    
+    def on_key_press(self, key, modifiers):
+        if key == arcade.key.SPACE:
+            # Online the game never pauses; SPACE brings a dead snake back
+            if self.client:
+                if not self.player.alive:
+                    self.client.request_respawn()
+            else:
+                self.paused = not self.paused
+        elif not self.paused and not self.autopilot:
+            if key == arcade.key.UP:
+                self.steer((0, 1))
+            elif key == arcade.key.DOWN:
+                self.steer((0, -1))
+            elif key == arcade.key.LEFT:
+                self.steer((-1, 0))
+            elif key == arcade.key.RIGHT:
+                self.steer((1, 0))
+    
+    def steer(self, direction):
+        self.snakes[self.player.index].set_direction(direction)
+        if self.client:
+            # The server has the final say; the local turn only guards against reversing
+            self.client.send_direction(direction)
+
+def new_game_view(window, speed):
+    # The autopilot, board size and arena mode are kept on the window between games
+    autopilot = getattr(window, "autopilot", False)
+    bots = getattr(window, "arena", None)
+    world = getattr(window, "world", None)
+    if bots:
+        return ArenaView(bots, speed, autopilot=autopilot, world=world)
+    return GameView(speed, autopilot=autopilot, world=world)
+
 class GameOverView(arcade.View):
-    def __init__(self, score, length):
+    def __init__(self, score, length, difficulty="NORMAL", submit=True):
         super().__init__()
         self.score = score
         self.length = length
-        self.high_score = load_high_score()
-        self.is_new_high_score = score > self.high_score
-        if self.is_new_high_score:
-            save_high_score(score)
-            self.high_score = score
+        # Replays are shown with the stored results but never resubmitted
+        high_scores = get_high_score_store()
+        self.is_new_high_score = submit and high_scores.submit(score, length, difficulty)
+        self.high_score = high_scores.high_score
         self.messages = [
             "Oops! Your snake got a little too excited! 🐍💥",
             "Well, that escalated quickly! Snake.exe has stopped working 😵",
@@ -503,161 +1435,314 @@ class GameOverView(arcade.View):
         ]
         self.funny_message = random.choice(self.messages)
         self.glow_phase = 0
-    
-    def on_draw(self):
-        self.clear()
-        self.glow_phase += 0.1
         
         # Dramatic background
-        for i in range(0, SCREEN_HEIGHT, 20):
-            intensity = int(20 + 15 * math.sin(i * 0.05 + self.glow_phase))
-            arcade.draw_lrbt_rectangle_filled(0, SCREEN_WIDTH, i, i+20, (intensity, 0, 0))
+        self.background = GradientBackground(band=20, base=20, amplitude=15, frequency=0.05, tint=(1, 0, 0))
         
+        # Every label is laid out once; the animation only recolours two of them
+        self.batch = Batch()
+        self.labels = []
         # Game Over title with glow
-        glow_offset = int(10 * math.sin(self.glow_phase))
         for offset in range(8, 0, -1):
-            arcade.draw_text("GAME OVER", SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 150 + offset, 
-                           (255-offset*20, 0, 0), 72, anchor_x="center")
-        arcade.draw_text("GAME OVER", SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 150, 
-                        (255, min(255, 100 + glow_offset), min(255, 100 + glow_offset)), 72, anchor_x="center")
+            self.add_label("GAME OVER", SCREEN_HEIGHT//2 + 150 + offset, (255-offset*20, 0, 0), 72)
+        self.title = self.add_label("GAME OVER", SCREEN_HEIGHT//2 + 150, (255, 100, 100), 72)
         
         # Funny message with more space
-        arcade.draw_text(self.funny_message, SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 80, 
-                        (255, 255, 150), 24, anchor_x="center")
+        self.add_label(self.funny_message, SCREEN_HEIGHT//2 + 80, (255, 255, 150), 24)
         
         # Stats with better spacing
         stats_y = SCREEN_HEIGHT//2
         if self.is_new_high_score:
-            arcade.draw_text("🎉 NEW HIGH SCORE! 🎉", SCREEN_WIDTH//2, stats_y, 
-                            (255, 215, 0), 32, anchor_x="center")
+            self.add_label("🎉 NEW HIGH SCORE! 🎉", stats_y, (255, 215, 0), 32)
             stats_y -= 50
-        
-        arcade.draw_text(f"Final Score: {self.score}", SCREEN_WIDTH//2, stats_y, 
-                        (255, 215, 0), 28, anchor_x="center")
-        arcade.draw_text(f"High Score: {self.high_score}", SCREEN_WIDTH//2, stats_y - 40, 
-                        (255, 255, 255), 24, anchor_x="center")
-        arcade.draw_text(f"Snake Length: {self.length}", SCREEN_WIDTH//2, stats_y - 80, 
-                        (0, 255, 255), 24, anchor_x="center")
+        self.add_label(f"Final Score: {self.score}", stats_y, (255, 215, 0), 28)
+        self.add_label(f"High Score: {self.high_score}", stats_y - 40, (255, 255, 255), 24)
+        self.add_label(f"Snake Length: {self.length}", stats_y - 80, (0, 255, 255), 24)
         
         # Instructions with better spacing
+        self.retry = self.add_label("Press SPACE to try again", stats_y - 140, (150, 255, 150), 22)
+        self.add_label("Press ESC for menu", stats_y - 180, (200, 200, 200), 20)
+    
+    def add_label(self, text, y, color, size):
+        label = arcade.Text(text, SCREEN_WIDTH//2, y, color, size, anchor_x="center", batch=self.batch)
+        self.labels.append(label)
+        return label
+    
+    def on_draw(self):
+        self.clear()
+        self.glow_phase += 0.1
+        self.background.draw(self.glow_phase)
+        
+        glow_offset = int(10 * math.sin(self.glow_phase))
+        self.title.color = (255, min(255, 100 + glow_offset), min(255, 100 + glow_offset))
         pulse = int(50 + 50 * math.sin(self.glow_phase * 2))
-        arcade.draw_text("Press SPACE to try again", SCREEN_WIDTH//2, stats_y - 140, 
-                        (min(255, 100 + pulse), 255, min(255, 100 + pulse)), 22, anchor_x="center")
-        arcade.draw_text("Press ESC for menu", SCREEN_WIDTH//2, stats_y - 180, 
-                        (200, 200, 200), 20, anchor_x="center")
+        self.retry.color = (min(255, 100 + pulse), 255, min(255, 100 + pulse))
+        self.batch.draw()
     
     def on_key_press(self, key, modifiers):
         if key == arcade.key.SPACE:
-            game_view = GameView(8)
+            game_view = new_game_view(self.window, 8)
             self.window.show_view(game_view)
         elif key == arcade.key.ESCAPE:
             menu_view = MenuView()
             self.window.show_view(menu_view)
 
 class MenuView(arcade.View):
-    def __init__(self):
+    def __init__(self, on_first_frame=None):
         super().__init__()
+        self.on_first_frame = on_first_frame
         self.difficulty = 1  # 0=Easy, 1=Normal, 2=Hard, 3=Insane
-        self.difficulties = [
-            {"name": "EASY", "speed": 5, "color": (0, 255, 0)},
-            {"name": "NORMAL", "speed": 8, "color": (255, 255, 0)},
-            {"name": "HARD", "speed": 12, "color": (255, 165, 0)},
-            {"name": "INSANE", "speed": 16, "color": (255, 0, 0)}
-        ]
+        self.difficulties = DIFFICULTIES
         self.glow_phase = 0
-        self.high_score = load_high_score()
-    
-    def on_draw(self):
-        self.clear()
-        self.glow_phase += 0.05
+        self.high_scores = get_high_score_store()
         
         # Background gradient
-        for y in range(0, SCREEN_HEIGHT, 10):
-            color_val = int(20 + 10 * math.sin(y * 0.01 + self.glow_phase))
-            arcade.draw_lrbt_rectangle_filled(0, SCREEN_WIDTH, y, y+10, (0, color_val, color_val//2))
+        self.background = GradientBackground(band=10, base=20, amplitude=10, frequency=0.01, tint=(0, 1, 0.5))
+        self.boxes = None
+        
+        # Every label is laid out once; the animation only recolours them
+        self.batch = Batch()
+        center = SCREEN_WIDTH//2
         
         # Title with glow effect
         title_y = SCREEN_HEIGHT - 150
-        for offset in range(5, 0, -1):
-            arcade.draw_text("Q_SNAKE", SCREEN_WIDTH//2, title_y + offset, 
-                           (200-offset*20, 150-offset*20, 0), 72, anchor_x="center")
-        arcade.draw_text("Q_SNAKE", SCREEN_WIDTH//2, title_y, 
-                        (255, 215, 0), 72, anchor_x="center")
+        self.title = [arcade.Text("Q_SNAKE", center, title_y + offset, (200-offset*20, 150-offset*20, 0), 72,
+                                  anchor_x="center", batch=self.batch) for offset in range(5, 0, -1)]
+        self.title.append(arcade.Text("Q_SNAKE", center, title_y, (255, 215, 0), 72,
+                                      anchor_x="center", batch=self.batch))
         
-        # Subtitle
-        arcade.draw_text("THE ULTIMATE SNAKE EXPERIENCE", SCREEN_WIDTH//2, title_y - 60, 
-                        (200, 200, 200), 24, anchor_x="center")
+        # Subtitle and difficulty selection header
+        self.subtitle = arcade.Text("THE ULTIMATE SNAKE EXPERIENCE", center, title_y - 60, (200, 200, 200), 24,
+                                    anchor_x="center", batch=self.batch)
+        self.header = arcade.Text("SELECT DIFFICULTY", center, SCREEN_HEIGHT//2 + 20, (255, 255, 255), 36,
+                                  anchor_x="center", batch=self.batch)
         
-        # Difficulty selection header
-        arcade.draw_text("SELECT DIFFICULTY", SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 20, 
-                        (255, 255, 255), 36, anchor_x="center")
-        
-        # Display difficulties in a clean layout
+        # Each difficulty has a plain and a highlighted pair of labels; selecting
+        # one only swaps which pair is visible
+        self.options = []
         for i, diff in enumerate(self.difficulties):
             y_pos = SCREEN_HEIGHT//2 - 20 - i * 60  # Moved up for more space
-            
-            # Background for selected difficulty
-            if i == self.difficulty:
-                # Draw selection box
-                arcade.draw_lrbt_rectangle_filled(SCREEN_WIDTH//2 - 180, SCREEN_WIDTH//2 + 180, 
-                                               y_pos - 20, y_pos + 20, (30, 30, 30))
-            
-            # Highlight selected difficulty
-            if i == self.difficulty:
-                glow = int(30 + 30 * math.sin(self.glow_phase * 3))
-                r = min(255, diff['color'][0] + glow)
-                g = min(255, diff['color'][1] + glow)
-                b = min(255, diff['color'][2] + glow)
-                
-                # Name on left side
-                arcade.draw_text(diff['name'], SCREEN_WIDTH//2 - 120, y_pos, 
-                               (r, g, b), 32, anchor_y="center")
-                               
-                # Speed on right side
-                arcade.draw_text(f"Speed: {diff['speed']}", SCREEN_WIDTH//2 + 60, y_pos, 
-                               (255, 255, 255), 24, anchor_y="center")
-            else:
-                # Unselected options
-                arcade.draw_text(diff['name'], SCREEN_WIDTH//2 - 120, y_pos, 
-                               diff['color'], 28, anchor_y="center")
-                arcade.draw_text(f"Speed: {diff['speed']}", SCREEN_WIDTH//2 + 60, y_pos, 
-                               (180, 180, 180), 20, anchor_y="center")
+            plain = (arcade.Text(diff['name'], center - 120, y_pos, diff['color'], 28,
+                                 anchor_y="center", batch=self.batch),
+                     arcade.Text(f"Speed: {diff['speed']}", center + 60, y_pos, (180, 180, 180), 20,
+                                 anchor_y="center", batch=self.batch))
+            # Name on left side, speed on right side
+            selected = (arcade.Text(diff['name'], center - 120, y_pos, diff['color'], 32,
+                                    anchor_y="center", batch=self.batch),
+                        arcade.Text(f"Speed: {diff['speed']}", center + 60, y_pos, (255, 255, 255), 24,
+                                    anchor_y="center", batch=self.batch))
+            self.options.append((plain, selected))
+        self.select(self.difficulty)
         
-        # High Score section with box - moved down to avoid overlap
+        # High Score section - moved down to avoid overlap
         score_y = SCREEN_HEIGHT//2 - 300
-        arcade.draw_lrbt_rectangle_filled(SCREEN_WIDTH//2 - 150, SCREEN_WIDTH//2 + 150, 
-                                       score_y - 25, score_y + 25, (30, 30, 30))
-        arcade.draw_lrbt_rectangle_outline(SCREEN_WIDTH//2 - 150, SCREEN_WIDTH//2 + 150, 
-                                        score_y - 25, score_y + 25, (255, 215, 0), 2)
-        arcade.draw_text(f"HIGH SCORE: {self.high_score}", SCREEN_WIDTH//2, score_y, 
-                        (255, 215, 0), 32, anchor_x="center", anchor_y="center")
+        self.high_score = arcade.Text(f"HIGH SCORE: {self.high_scores.high_score}", center, score_y,
+                                      (255, 215, 0), 32, anchor_x="center", anchor_y="center", batch=self.batch)
         
         # Instructions with better spacing and visual separation
-        arcade.draw_text("↑↓ ARROWS: Change Difficulty", SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 370, 
-                        (200, 200, 200), 22, anchor_x="center")
+        self.instructions = arcade.Text("", center, SCREEN_HEIGHT//2 - 370, (200, 200, 200), 22,
+                                        anchor_x="center", batch=self.batch)
+        self.autopilot_shown = None
         
         # Start prompt with pulse effect
+        self.start = arcade.Text("PRESS SPACE TO START", center, SCREEN_HEIGHT//2 - 420, (150, 255, 150), 28,
+                                 anchor_x="center", batch=self.batch)
+    
+    def select(self, index):
+        self.difficulty = index
+        for i, (plain, selected) in enumerate(self.options):
+            for label in plain:
+                label.visible = i != index
+            for label in selected:
+                label.visible = i == index
+    
+    def build_boxes(self):
+        # One selection box per difficulty and the high score box, baked once
+        center = SCREEN_WIDTH//2
+        self.boxes = []
+        for i in range(len(self.difficulties)):
+            y_pos = SCREEN_HEIGHT//2 - 20 - i * 60
+            box = StaticLayer()
+            box.add_rectangle(center - 180, center + 180, y_pos - 20, y_pos + 20, (30, 30, 30))
+            self.boxes.append(box.build())
+        score_y = SCREEN_HEIGHT//2 - 300
+        self.score_box = StaticLayer()
+        self.score_box.add_rectangle(center - 150, center + 150, score_y - 25, score_y + 25, (30, 30, 30))
+        self.score_box.add_rectangle_outline(center - 150, center + 150, score_y - 25, score_y + 25,
+                                             (255, 215, 0), 2)
+        self.score_box.build()
+    
+    def on_draw(self):
+        self.clear()
+        self.glow_phase += 0.05
+        self.background.draw(self.glow_phase)
+        
+        if self.boxes is None:
+            self.build_boxes()
+        self.boxes[self.difficulty].draw()
+        self.score_box.draw()
+        
+        # Highlight selected difficulty
+        diff = self.difficulties[self.difficulty]
+        glow = int(30 + 30 * math.sin(self.glow_phase * 3))
+        self.options[self.difficulty][1][0].color = tuple(min(255, c + glow) for c in diff['color'])
+        
         pulse = int(40 * math.sin(self.glow_phase * 2))
-        start_color = (min(255, 150 + pulse), 255, min(255, 150 + pulse))
-        arcade.draw_text("PRESS SPACE TO START", SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 420, 
-                        start_color, 28, anchor_x="center")
+        self.start.color = (min(255, 150 + pulse), 255, min(255, 150 + pulse))
+        
+        # The autopilot toggle is remembered on the window, so it is read back here
+        autopilot = "ON" if getattr(self.window, "autopilot", False) else "OFF"
+        if autopilot != self.autopilot_shown:
+            self.autopilot_shown = autopilot
+            self.instructions.text = f"↑↓ ARROWS: Change Difficulty    A: Autopilot {autopilot}"
+        self.batch.draw()
+        
+        if self.on_first_frame:
+            callback, self.on_first_frame = self.on_first_frame, None
+            callback()
     
     def on_key_press(self, key, modifiers):
         if key == arcade.key.SPACE:
             selected_speed = self.difficulties[self.difficulty]["speed"]
-            game_view = GameView(selected_speed)
+            game_view = new_game_view(self.window, selected_speed)
             self.window.show_view(game_view)
+        elif key == arcade.key.A:
+            # Remembered on the window so it survives returning to the menu
+            self.window.autopilot = not getattr(self.window, "autopilot", False)
         elif key == arcade.key.UP:
-            self.difficulty = (self.difficulty - 1) % len(self.difficulties)
+            self.select((self.difficulty - 1) % len(self.difficulties))
         elif key == arcade.key.DOWN:
-            self.difficulty = (self.difficulty + 1) % len(self.difficulties)
+            self.select((self.difficulty + 1) % len(self.difficulties))
+
+class StartupProfiler:
+    """Times the startup path up to the first finished MenuView frame.
+    
+    Phases: module imports, window creation, and building and drawing the
+    first menu frame. The clock starts when Snake_game begins importing its
+    dependencies, so interpreter startup itself is not included.
+    """
+    def __init__(self, budget_ms=STARTUP_BUDGET_MS):
+        self.budget_ms = budget_ms
+        self.phases = [("imports", _import_finished - _import_started)]
+        self.phase_started = _import_finished
+        self.total_ms = None
+    
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.phase_started))
+        self.phase_started = now
+    
+    def finish(self):
+        self.mark("first menu frame")
+        self.total_ms = (self.phase_started - _import_started) * 1000
+    
+    @property
+    def over_budget(self):
+        return self.total_ms is not None and self.total_ms > self.budget_ms
+    
+    def report(self):
+        lines = ["Startup profile:"]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<20} {seconds * 1000:8.1f} ms")
+        verdict = "OVER BUDGET" if self.over_budget else "ok"
+        lines.append(f"  {'time to first frame':<20} {self.total_ms:8.1f} ms "
+                     f"(budget {self.budget_ms} ms, {verdict})")
+        return "\n".join(lines)
+
+def positive_float(text):
+    value = float(text)
+    if not 0 < value < math.inf:  # Also rejects nan
+        raise argparse.ArgumentTypeError(f"must be a finite number greater than 0, not {text}")
+    return value
+
+def replay_file(path):
+    # Loaded while parsing, so a bad file is reported before any window opens
+    try:
+        return Replay.load(path)
+    except (OSError, ReplayError) as e:
+        raise argparse.ArgumentTypeError(f"cannot load {path}: {e}")
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Q_SNAKE")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report import, window and first-frame times, then exit")
+    parser.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET_MS, metavar="MS",
+                        help="time-to-first-frame budget for --profile-startup (exit status 1 if exceeded)")
+    parser.add_argument("--record-dir", metavar="DIR",
+                        help="save a replay of every finished game into DIR")
+    parser.add_argument("--replay", type=replay_file, metavar="FILE",
+                        help="watch a recorded replay instead of starting at the menu")
+    parser.add_argument("--playback-speed", type=positive_float, default=1.0, metavar="X",
+                        help="replay speed multiplier (default 1.0)")
+    parser.add_argument("--profile-export", metavar="FILE",
+                        help="record per-frame phase timings and write them to FILE (.csv or .json) on exit")
+    parser.add_argument("--world", type=parse_board, metavar="WxH",
+                        help="play on a WxH-cell board with a camera that follows the snake, e.g. 1000x1000")
+    parser.add_argument("--arena", type=int, metavar="BOTS",
+                        help="play against BOTS computer snakes on one board")
+    parser.add_argument("--connect", metavar="HOST[:PORT]",
+                        help="join the arena hosted by snake_server.py on HOST")
+    parser.add_argument("--event-log", default=EVENT_LOG_FILE, metavar="FILE",
+                        help=f"append gameplay events to FILE as JSON Lines (default {EVENT_LOG_FILE}, rotated at 1 MB)")
+    parser.add_argument("--no-event-log", action="store_true", help="do not record gameplay events")
+    parser.add_argument("--suspend-file", metavar="FILE",
+                        help="save the game to FILE when the window loses focus and resume it on the next start")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    profiler = StartupProfiler(args.startup_budget) if args.profile_startup else None
+    if profiler:
+        profiler.mark("startup")
+    
     window = arcade.Window(SCREEN_WIDTH, SCREEN_HEIGHT, "Q_Snake")
     window.center_window()  # Center on screen
-    menu_view = MenuView()
-    window.show_view(menu_view)
+    window.replay_dir = args.record_dir
+    window.profiler = None
+    window.world = args.world
+    window.arena = args.arena
+    window.suspend_path = args.suspend_file
+    window.event_log = None if args.no_event_log else EventLog(args.event_log)
+    if args.profile_export:
+        from frame_profiler import FrameProfiler
+        window.profiler = FrameProfiler().install()
+    if profiler:
+        profiler.mark("window creation")
+    
+    def first_frame_drawn():
+        profiler.finish()
+        print(profiler.report())
+        window.close()
+    
+    if args.connect:
+        from snake_server import SnapshotClient, DEFAULT_PORT
+        host, _, port = args.connect.partition(":")
+        window.show_view(ArenaView(client=SnapshotClient(host, int(port or DEFAULT_PORT))))
+    elif args.replay:
+        window.show_view(GameView(0, replay=args.replay, playback_speed=args.playback_speed))
+    elif args.suspend_file and os.path.exists(args.suspend_file) and not profiler:
+        try:
+            save_state = SaveState.load(args.suspend_file)
+        except (OSError, SnapshotError) as e:
+            print(f"Could not resume {args.suspend_file}: {e}")
+            window.show_view(MenuView())
+        else:
+            # Later games keep the autopilot setting of the resumed one
+            window.autopilot = save_state.autopilot
+            window.show_view(GameView(0, save_state=save_state))
+        # Resumed or unreadable, the file has served its purpose; the game saves itself again
+        remove_file(args.suspend_file)
+    else:
+        menu_view = MenuView(on_first_frame=first_frame_drawn if profiler else None)
+        window.show_view(menu_view)
     arcade.run()
+    if window.event_log:
+        window.event_log.close()
+    if args.profile_export:
+        window.profiler.export(args.profile_export)
+        print(f"Frame profile written to {args.profile_export}")
+    if profiler and profiler.over_budget:
+        sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,370 @@
+"""Many snakes and many food items on one board.
+
+Every body lives in one shared occupancy grid (segments per cell) with an
+owner grid beside it (which snake is on each cell), and food sits in a grid
+of its own. A tick resolves every collision in one pass over the snakes:
+walls and bodies are single grid lookups, and head-to-head crashes are new
+heads that land on the same cell. Nothing ever walks a body, so a tick costs
+O(snakes); a death touches its body once, to turn it into food.
+
+The rules otherwise match SnakeEngine: a snake cannot reverse, the cell its
+tail is leaving still counts as occupied, and each food item grows it by one.
+
+    python arena.py --snakes 200 --board 300x300 --ticks 2000
+"""
+import argparse
+import random
+import sys
+import time
+from array import array
+from collections import namedtuple
+
+import numpy as np
+
+from autopilot import parse_board
+from snake_engine import (SnakeBody, FreeCells, DIRECTION_CODES, FOOD_POINTS,
+                          UP, DOWN, LEFT, RIGHT, GRID_WIDTH, GRID_HEIGHT)
+
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+# Each cell of a dead snake becomes food worth this much
+CORPSE_POINTS = FOOD_POINTS // 2
+BOT_TARGET_SAMPLES = 4
+
+ArenaTickResult = namedtuple("ArenaTickResult", [
+    "moves",       # (snake index, grew) for every snake that moved, in snake order
+    "deaths",      # (snake index, cause) for every snake that died this tick
+    "eaten",       # (snake index, cell, points) for every food item eaten this tick
+    "spawns",      # Indices of the bots that respawned this tick
+    "food_added",  # Cells of the regular food placed this tick
+])
+
+
+class ArenaSnake:
+    """One snake in an ArenaEngine.
+
+    It has the segments, direction, ticks and vacated_tail attributes of a
+    SnakeEngine, so RealisticSnake can draw it unchanged.
+    """
+
+    def __init__(self, index, human=False):
+        self.index = index
+        self.human = human
+        self.segments = SnakeBody()
+        self.direction = RIGHT
+        self.alive = False
+        self.death_cause = None  # "wall", "self", "snake", "head-on" or "left"
+        self.score = 0
+        self.deaths = 0
+        self.ticks = 0
+        self.vacated_tail = None
+
+    @property
+    def length(self):
+        return len(self.segments)
+
+
+class ArenaEngine:
+    def __init__(self, snakes=4, humans=1, speed=8, seed=None, width=GRID_WIDTH, height=GRID_HEIGHT,
+                 food=None, respawn_ticks=None, spawn_humans=True):
+        self.speed = speed
+        self.tick_seconds = 1.0 / speed
+        self.width = width
+        self.height = height
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+        self.ticks = 0
+        # Dead bots come back after respawn_ticks; None leaves them dead
+        self.respawn_ticks = respawn_ticks
+        self.respawn_at = {}
+
+        size = width * height
+        self.occupancy = bytearray(size)
+        self.owner = array("i", [-1]) * size
+        self.food = bytearray(size)  # Points of the food item on each cell, 0 for none
+        self.food_cells = FreeCells(size)
+        self.food_version = 0  # Bumped on every food change, for renderers that cache it
+        self.regular_food = 0
+        self.food_target = snakes if food is None else food
+        xs = np.arange(2, width - 2)
+        ys = np.arange(2, height - 2)
+        self.free_cells = FreeCells(size, (ys[:, None] * width + xs).ravel().tolist())
+
+        self.snakes = [ArenaSnake(i, human=i < humans) for i in range(snakes)]
+        for snake in self.snakes:
+            if spawn_humans or not snake.human:
+                self.spawn_snake(snake)
+        self._top_up_food()
+
+    def in_bounds(self, pos):
+        # Same playable area as SnakeEngine
+        return 1 <= pos[0] < self.width - 1 and 1 <= pos[1] <= self.height - 2
+
+    def is_occupied(self, pos):
+        return self.occupancy[pos[1] * self.width + pos[0]] > 0
+
+    @property
+    def alive_count(self):
+        return sum(snake.alive for snake in self.snakes)
+
+    def spawn_snake(self, snake, attempts=32):
+        # A one-cell snake on a free cell, facing the centre with room to move
+        for _ in range(attempts):
+            cell = self.free_cells.choice(self.rng)
+            if cell is None:
+                return False
+            x, y = cell % self.width, cell // self.width
+            dx, dy = self.width // 2 - x, self.height // 2 - y
+            if abs(dx) >= abs(dy):
+                direction = RIGHT if dx >= 0 else LEFT
+            else:
+                direction = UP if dy >= 0 else DOWN
+            ahead = (x + direction[0], y + direction[1])
+            if self.in_bounds(ahead) and not self.is_occupied(ahead):
+                break
+        else:
+            return False
+        snake.segments.clear()
+        snake.ticks += 1  # A new body, even if it happens to match the old one's length
+        snake.direction = direction
+        snake.alive = True
+        snake.death_cause = None
+        snake.score = 0
+        snake.vacated_tail = None
+        self._push_head(snake, (x, y))
+        return True
+
+    def _push_head(self, snake, pos):
+        snake.segments.push_head(pos, DIRECTION_CODES[snake.direction])
+        cell = pos[1] * self.width + pos[0]
+        self.occupancy[cell] += 1
+        self.owner[cell] = snake.index
+        self.free_cells.discard(cell)
+
+    def _vacate(self, pos):
+        # One segment leaves pos; returns the cell index once nothing is left on it
+        cell = pos[1] * self.width + pos[0]
+        self.occupancy[cell] -= 1
+        if self.occupancy[cell]:
+            return None
+        self.owner[cell] = -1
+        return cell
+
+    def _release(self, cell):
+        # Hand a cell back to the spawner once nothing is on it
+        x, y = cell % self.width, cell // self.width
+        if 2 <= x < self.width - 2 and 2 <= y < self.height - 2 and not self.food[cell]:
+            self.free_cells.add(cell)
+
+    def _place_food(self, cell, points):
+        self.food[cell] = points
+        self.food_cells.add(cell)
+        self.food_version += 1
+        self.free_cells.discard(cell)
+
+    def _top_up_food(self):
+        added = []
+        while self.regular_food < self.food_target:
+            cell = self.free_cells.choice(self.rng)
+            if cell is None:
+                break
+            self._place_food(cell, FOOD_POINTS)
+            self.regular_food += 1
+            added.append(cell)
+        return added
+
+    def retire(self, snake):
+        # Take a snake out of play, e.g. when its player leaves; it dies like any other
+        if snake.alive:
+            self._kill(snake, "left")
+        self.respawn_at.pop(snake.index, None)
+
+    def _kill(self, snake, cause):
+        # The body turns into food where it lay
+        snake.alive = False
+        snake.death_cause = cause
+        snake.deaths += 1
+        snake.vacated_tail = None
+        for x, y in snake.segments.view().tolist():
+            cell = self._vacate((x, y))
+            if cell is not None and not self.food[cell]:
+                self._place_food(cell, CORPSE_POINTS)
+        snake.segments.clear()
+        if self.respawn_ticks is not None and not snake.human:
+            self.respawn_at[snake.index] = self.ticks + self.respawn_ticks
+
+    def step(self, directions=()):
+        # directions[i] steers snake i (None or missing keeps its heading)
+        self.ticks += 1
+        width = self.width
+        occupancy = self.occupancy
+
+        # Pass 1: every live snake's next head against walls and bodies as
+        # they stand, counting how many heads land on each cell
+        moves = []
+        heads = {}
+        for snake in self.snakes:
+            if not snake.alive:
+                continue
+            direction = directions[snake.index] if snake.index < len(directions) else None
+            if direction is not None and (-direction[0], -direction[1]) != snake.direction:
+                snake.direction = direction
+            x, y = snake.segments[0]
+            pos = (x + snake.direction[0], y + snake.direction[1])
+            cell = pos[1] * width + pos[0]
+            if not self.in_bounds(pos):
+                cause = "wall"
+            elif occupancy[cell]:
+                cause = "self" if self.owner[cell] == snake.index else "snake"
+            else:
+                cause = None
+                heads[cell] = heads.get(cell, 0) + 1
+            moves.append((snake, pos, cell, cause))
+
+        # Pass 2: apply the outcomes; the order of the snakes no longer matters
+        moved = []
+        deaths = []
+        eaten = []
+        for snake, pos, cell, cause in moves:
+            if cause is None and heads[cell] > 1:
+                cause = "head-on"
+            if cause:
+                deaths.append((snake, cause))
+                continue
+            snake.ticks += 1
+            self._push_head(snake, pos)
+            points = self.food[cell]
+            moved.append((snake.index, points > 0))
+            if points:
+                # Keep the tail: the snake grows by one
+                self.food[cell] = 0
+                self.food_cells.discard(cell)
+                self.food_version += 1
+                if points == FOOD_POINTS:
+                    self.regular_food -= 1
+                snake.score += points
+                snake.vacated_tail = None
+                eaten.append((snake.index, pos, points))
+            else:
+                tail = snake.segments.pop_tail()
+                snake.vacated_tail = tail
+                freed = self._vacate(tail)
+                if freed is not None:
+                    self._release(freed)
+
+        # Bodies only turn into food once every move is settled, so a snake
+        # can never eat a cell another one died on in the same tick
+        for snake, cause in deaths:
+            self._kill(snake, cause)
+        spawns = []
+        for index, at in list(self.respawn_at.items()):
+            if self.ticks >= at and self.spawn_snake(self.snakes[index]):
+                del self.respawn_at[index]
+                spawns.append(index)
+        food_added = self._top_up_food()
+        return ArenaTickResult(moved, [(snake.index, cause) for snake, cause in deaths], eaten,
+                               spawns, food_added)
+
+
+class GreedyBot:
+    """Heads for a nearby food item, avoiding moves that die at once.
+
+    The target is the closest of a few randomly sampled food cells and is
+    kept until it is eaten, so a decision costs O(1) whatever the number of
+    snakes or food items. Of the safe moves it avoids dead ends and cells
+    another head could also move into, then prefers the one that gets
+    closest to the target, then the one with the most free cells around it.
+    """
+
+    def __init__(self, engine, snake, rng=None):
+        self.engine = engine
+        self.snake = snake
+        self.rng = rng or random.Random(engine.seed + snake.index)
+        self.target = None
+
+    def choose(self):
+        engine = self.engine
+        snake = self.snake
+        x, y = snake.segments[0]
+        width = engine.width
+        if self.target is None or not engine.food[self.target]:
+            self.target = self._pick_target(x, y)
+
+        reverse = (-snake.direction[0], -snake.direction[1])
+        best = None
+        for direction in DIRECTIONS:
+            pos = (x + direction[0], y + direction[1])
+            if direction == reverse or not engine.in_bounds(pos) or engine.is_occupied(pos):
+                continue
+            space = 0
+            contested = False
+            for dx, dy in DIRECTIONS:
+                around = (pos[0] + dx, pos[1] + dy)
+                if not engine.in_bounds(around):
+                    continue
+                cell = around[1] * width + around[0]
+                if not engine.occupancy[cell]:
+                    space += 1
+                elif around != (x, y) and engine.snakes[engine.owner[cell]].segments[0] == around:
+                    # Another head is next to it and could take the same cell
+                    contested = True
+            distance = 0
+            if self.target is not None:
+                distance = abs(pos[0] - self.target % width) + abs(pos[1] - self.target // width)
+            # Dead ends and head-on risks only win if nothing else is left
+            key = (space == 0, contested, distance, -space)
+            if best is None or key < best[0]:
+                best = (key, direction)
+        return best[1] if best else None
+
+    def _pick_target(self, x, y):
+        cells = self.engine.food_cells
+        if not len(cells):
+            return None
+        width = self.engine.width
+        samples = [cells.choice(self.rng) for _ in range(BOT_TARGET_SAMPLES)]
+        return min(samples, key=lambda cell: abs(cell % width - x) + abs(cell // width - y))
+
+
+def bot_directions(engine, bots, directions=None):
+    # Directions for one step(): each live bot's choice, None for everyone else
+    directions = directions or [None] * len(engine.snakes)
+    for bot in bots:
+        if bot.snake.alive:
+            directions[bot.snake.index] = bot.choose()
+    return directions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run an all-bot arena headless and report the cost of a tick")
+    parser.add_argument("--snakes", type=int, default=50)
+    parser.add_argument("--board", type=parse_board, default=(200, 200), metavar="WxH")
+    parser.add_argument("--food", type=int, help="regular food items kept on the board (default: one per snake)")
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--respawn-ticks", type=int, default=20, help="ticks before a dead bot comes back")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    width, height = args.board
+    engine = ArenaEngine(args.snakes, humans=0, seed=args.seed, width=width, height=height,
+                         food=args.food, respawn_ticks=args.respawn_ticks)
+    bots = [GreedyBot(engine, snake) for snake in engine.snakes]
+    step_times = np.zeros(args.ticks)
+    deaths = 0
+    for tick in range(args.ticks):
+        directions = bot_directions(engine, bots)
+        started = time.perf_counter()
+        result = engine.step(directions)
+        step_times[tick] = time.perf_counter() - started
+        deaths += len(result.deaths)
+
+    p50, p99 = np.percentile(step_times * 1e6, (50, 99))
+    lengths = [snake.length for snake in engine.snakes if snake.alive]
+    print(f"{args.snakes} snakes on {width}x{height}, {args.ticks} ticks: step p50 {p50:.1f} us, "
+          f"p99 {p99:.1f} us ({p50 / args.snakes:.2f} us per snake); {deaths} deaths, "
+          f"{len(lengths)} alive, longest {max(lengths, default=0)}, "
+          f"{len(engine.food_cells)} food items")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
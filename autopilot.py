@@ -0,0 +1,380 @@
+"""Computer player for SnakeEngine, for attract-mode demos and soak tests.
+
+Each decision follows a cached A* shortest path to the food (or the bonus, if
+one is out). A path is only searched for when the target moves or the next
+cell on it is blocked, and it is only taken if the snake could still reach
+its own tail after eating. Otherwise the snake stalls along a Hamiltonian
+cycle of the board, or failing that any move that keeps its tail reachable.
+Searches stop at a per-tick deadline and fall back to the cheapest safe move;
+one that runs out of time carries on from the target end on later ticks.
+
+    python autopilot.py --games 20 --speed 16 --board 60x40
+"""
+import argparse
+import heapq
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from snake_engine import SnakeEngine, UP, DOWN, LEFT, RIGHT, GRID_WIDTH, GRID_HEIGHT
+
+DEFAULT_BUDGET_MS = 2.0
+# Share of the budget searches may use; the rest covers the fallback move
+SEARCH_SHARE = 0.8
+LATENCY_SAMPLES = 4096
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+# Board sides: the wall ring and a food spawn range ([2, side - 3]) that is not
+# empty, up to what the int16 body coordinates hold
+MIN_BOARD = 5
+MAX_BOARD = 32767
+# Cells in a board; the engine's per-cell tables take about 100 bytes a cell
+MAX_CELLS = 4_000_000
+
+
+def hamiltonian_cycle(width, height):
+    """Cells of a closed path through the playable area, in travel order.
+
+    Serpentine rows from column 2 rightwards, returning down column 1. The
+    number of rows must be even for the path to close, so on a board with
+    an odd number of playable rows the top one is left out; food never
+    spawns there.
+    """
+    rows = height - 2 if height % 2 == 0 else height - 3
+    cells = [(x, 1) for x in range(1, width - 1)]
+    for y in range(2, rows + 1):
+        xs = range(width - 2, 1, -1) if y % 2 == 0 else range(2, width - 1)
+        cells.extend((x, y) for x in xs)
+    cells.extend((1, y) for y in range(rows, 1, -1))
+    return cells
+
+
+def cycle_codes(width, height):
+    """Index into DIRECTIONS of the move along hamiltonian_cycle from each cell, or -1.
+
+    A (height, width) array worked out per row rather than by walking the
+    cycle, so it stays cheap on very large boards.
+    """
+    rows = height - 2 if height % 2 == 0 else height - 3
+    up, down, left, right = range(4)
+    codes = np.full((height, width), -1, dtype=np.int8)
+    codes[1, 1:width - 2] = right
+    codes[1, width - 2] = up
+    codes[2:rows + 1:2, 3:width - 1] = left
+    codes[2:rows + 1:2, 2] = up
+    codes[3:rows:2, 2:width - 2] = right
+    codes[3:rows:2, width - 2] = up
+    codes[rows, 2] = left
+    codes[2:rows + 1, 1] = down
+    return codes
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Autopilot:
+    def __init__(self, engine, budget_ms=DEFAULT_BUDGET_MS):
+        self.engine = engine
+        self.budget = budget_ms / 1000
+        width = engine.width
+        # Playable cells. The wall ring keeps every neighbour of one on the board,
+        # so cell + offset never needs a bounds check
+        inside = np.zeros((engine.height, width), dtype=np.uint8)
+        inside[1:-1, 1:-1] = 1
+        self.inside = bytearray(inside.tobytes())
+        self.steps = tuple((d, d[1] * width + d[0]) for d in DIRECTIONS)
+        self.cycle_code = cycle_codes(width, engine.height).ravel()
+
+        self.path = deque()
+        self.path_target = None
+        # Reverse search (goal, best, parents, heap) from path_target, resumed each tick
+        self.pending = None
+        self.latencies = np.zeros(LATENCY_SAMPLES, dtype=np.float32)
+        self.decisions = 0
+        self.searches = 0  # A* searches started, including safety checks
+        self.fallbacks = 0
+        self.timeouts = 0
+        self.over_budget = 0
+        self.max_latency = 0.0
+
+    def choose(self):
+        # Direction for the next step(); always returns within roughly the budget
+        started = time.perf_counter()
+        try:
+            direction = self._decide(started + self.budget * SEARCH_SHARE)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.latencies[self.decisions % LATENCY_SAMPLES] = elapsed * 1000
+            self.decisions += 1
+            self.max_latency = max(self.max_latency, elapsed)
+            if elapsed > self.budget:
+                self.over_budget += 1
+        return direction
+
+    def _decide(self, deadline):
+        engine = self.engine
+        width = engine.width
+        head = engine.segments[0]
+        head_cell = head[1] * width + head[0]
+        target = engine.bonus_food or engine.food_pos
+
+        if target != self.path_target or not self.path or engine.occupancy[self.path[0]]:
+            self.path = deque()
+            if target != self.path_target:
+                self.pending = None
+            self.path_target = target
+            if target is not None:
+                try:
+                    self.path = self._safe_path(head_cell, target, deadline)
+                except SearchTimeout:
+                    self.timeouts += 1
+        if self.path:
+            return self._direction(head_cell, self.path.popleft())
+
+        self.fallbacks += 1
+        return self._stall(head_cell, deadline)
+
+    def _direction(self, cell, next_cell):
+        for direction, offset in self.steps:
+            if cell + offset == next_cell:
+                return direction
+
+    def _body(self):
+        width = self.engine.width
+        return [y * width + x for x, y in self.engine.segments.view().tolist()]
+
+    def _cell(self, pos):
+        return None if pos is None else pos[1] * self.engine.width + pos[0]
+
+    def _grown(self, cell, body):
+        # Body after the head moves onto cell, growing if it holds food
+        engine = self.engine
+        if cell == self._cell(engine.food_pos):
+            return [cell] + body
+        if cell == self._cell(engine.bonus_food):
+            return [cell] + body + body[-1:]
+        return [cell] + body[:-1]
+
+    def _safe_path(self, start, target, deadline):
+        # Shortest path to target, or an empty deque if taking it could trap the snake
+        engine = self.engine
+        goal = self._cell(target)
+        body = self._body()
+        if len(body) == 1:
+            # The engine refuses to reverse, so treat the cell behind the head as a neck
+            body.append(self._cell((start % engine.width - engine.direction[0],
+                                    start // engine.width - engine.direction[1])))
+        # Going over the other food on the way would grow the snake early
+        other = engine.food_pos if target == engine.bonus_food else engine.bonus_food
+        if self.pending is None:
+            try:
+                path = self._search(start, goal, body, deadline, avoid=self._cell(other))
+            except SearchTimeout:
+                # The head moves before the next tick, but the goal stays put
+                self.pending = (goal, {goal: 0}, {goal: None}, [(0, 0, goal)])
+                raise
+        else:
+            path = self._resume(start, body, deadline, avoid=self._cell(other))
+        if path is None:
+            return deque()
+        virtual = self._grown(path[-1], (path[-2::-1] + body)[:len(body)])
+        if self._tail_path(virtual, deadline) is None:
+            return deque()
+        self.pending = None
+        return deque(path)
+
+    def _free_after(self, body, goal, avoid):
+        # Moves after which each body cell is clear, counted from the tail end
+        length = len(body)
+        free_after = {}
+        for i in range(length - 1, -1, -1):
+            # A doubled-up tail cell stays until its first copy has gone
+            free_after[body[i]] = length - i
+        if avoid is not None and avoid != goal:
+            free_after[avoid] = length + 1
+        return free_after
+
+    def _search(self, start, goal, body, deadline, avoid=None):
+        # A* over the board that knows body cells clear from the tail end: the
+        # segment i places from the head has gone after len(body) - i moves,
+        # so a cell is open to a path that reaches it later than that
+        self.searches += 1
+        free_after = self._free_after(body, goal, avoid)
+
+        width = self.engine.width
+        goal_x, goal_y = goal % width, goal // width
+        inside = self.inside
+        steps = self.steps
+        clock = time.perf_counter
+        best = {start: 0}
+        parents = {start: None}
+        heap = [(0, 0, start)]
+        while heap:
+            if clock() > deadline:
+                raise SearchTimeout()
+            _, cost, cell = heapq.heappop(heap)
+            if cell == goal:
+                path = []
+                while cell != start:
+                    path.append(cell)
+                    cell = parents[cell]
+                return path[::-1]
+            cost = -cost
+            if cost > best[cell]:
+                continue
+            cost += 1
+            for _, offset in steps:
+                neighbour = cell + offset
+                if (not inside[neighbour] or free_after.get(neighbour, 0) >= cost
+                        or cost >= best.get(neighbour, cost + 1)):
+                    continue
+                best[neighbour] = cost
+                parents[neighbour] = cell
+                estimate = cost + abs(neighbour % width - goal_x) + abs(neighbour // width - goal_y)
+                # Ties go to the deeper node, which keeps straight runs cheap
+                heapq.heappush(heap, (estimate, -cost, neighbour))
+        return None
+
+    def _resume(self, start, body, deadline, avoid=None):
+        # Grow the pending search from the goal until it reaches the head, wherever
+        # the head has got to by now. Cells the body covers when they come up are
+        # walls; the finished path is checked against the body as it is then
+        goal, best, parents, heap = self.pending
+        width = self.engine.width
+        occupancy = self.engine.occupancy
+        inside = self.inside
+        steps = self.steps
+        clock = time.perf_counter
+        while start not in parents:
+            if not heap:
+                self.pending = None
+                return None
+            if clock() > deadline:
+                raise SearchTimeout()
+            _, cost, cell = heapq.heappop(heap)
+            cost = -cost
+            if cost > best[cell]:
+                continue
+            cost += 1
+            # The head moves while the search runs, so the estimate aims at where it is now
+            start_x, start_y = start % width, start // width
+            for _, offset in steps:
+                neighbour = cell + offset
+                if (not inside[neighbour] or (occupancy[neighbour] and neighbour != start)
+                        or neighbour == avoid or cost >= best.get(neighbour, cost + 1)):
+                    continue
+                best[neighbour] = cost
+                parents[neighbour] = cell
+                estimate = cost + abs(neighbour % width - start_x) + abs(neighbour // width - start_y)
+                heapq.heappush(heap, (estimate, -cost, neighbour))
+
+        path = []
+        cell = parents[start]
+        while cell is not None:
+            path.append(cell)
+            cell = parents[cell]
+        free_after = self._free_after(body, goal, avoid)
+        if any(free_after.get(cell, 0) >= step for step, cell in enumerate(path, 1)):
+            # The snake has since moved across the path; start over
+            self.pending = None
+            return None
+        return path
+
+    def _tail_path(self, body, deadline):
+        # Path from the head of a (virtual) body to its tail cell, or None
+        if len(body) < 3:
+            return [body[-1]]
+        return self._search(body[0], body[-1], body, deadline)
+
+    def _stall(self, head_cell, deadline):
+        # No safe way to the food: keep to the cycle, else any move that keeps the tail in reach
+        body = self._body()
+        reverse = (-self.engine.direction[0], -self.engine.direction[1])
+        moves = [(d, head_cell + offset) for d, offset in self.steps
+                 if self.inside[head_cell + offset] and not self.engine.occupancy[head_cell + offset]
+                 and d != reverse]
+        if not moves:
+            return self.engine.direction
+        code = self.cycle_code[head_cell]
+        cycle = DIRECTIONS[code] if code >= 0 else None
+        moves.sort(key=lambda move: move[0] != cycle)
+        # Of the moves that keep the tail reachable, take the one furthest from it
+        best = None
+        try:
+            for direction, cell in moves:
+                path = self._tail_path(self._grown(cell, body), deadline)
+                if path is not None and (best is None or len(path) > best[0]):
+                    best = (len(path), direction)
+        except SearchTimeout:
+            self.timeouts += 1
+        return best[1] if best else moves[0][0]
+
+    def stats(self):
+        # Decision latency in ms: percentiles over the last LATENCY_SAMPLES decisions, max over all
+        samples = self.latencies[:min(self.decisions, LATENCY_SAMPLES)]
+        if not len(samples):
+            return {"decisions": 0}
+        p50, p99 = np.percentile(samples, (50, 99))
+        return {
+            "decisions": self.decisions,
+            "p50_ms": round(float(p50), 4),
+            "p99_ms": round(float(p99), 4),
+            "max_ms": round(self.max_latency * 1000, 4),
+            "budget_ms": self.budget * 1000,
+            "over_budget": self.over_budget,
+            "searches": self.searches,
+            "timeouts": self.timeouts,
+            "fallbacks": self.fallbacks,
+        }
+
+
+def play(engine, autopilot, max_ticks=None):
+    # Run one game to the end (or max_ticks) with the autopilot in control
+    while engine.alive and (max_ticks is None or engine.ticks < max_ticks):
+        engine.step(autopilot.choose())
+    return engine
+
+
+def parse_board(text):
+    # "WxH" in cells, as an argparse type
+    try:
+        width, height = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WxH, e.g. 60x40, not {text!r}") from None
+    if not (MIN_BOARD <= width <= MAX_BOARD and MIN_BOARD <= height <= MAX_BOARD):
+        raise argparse.ArgumentTypeError(f"width and height must be {MIN_BOARD} to {MAX_BOARD} cells, not {text}")
+    if (width - 4) * (height - 4) < 2:
+        # The one spawn cell of a 5x5 board is where the snake starts
+        raise argparse.ArgumentTypeError(f"{text} leaves no cell for the first food")
+    if width * height > MAX_CELLS:
+        raise argparse.ArgumentTypeError(f"a board can have at most {MAX_CELLS:,} cells, not {width * height:,}")
+    return width, height
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run autopilot games headless and report decision latency")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--speed", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game; later games count up")
+    parser.add_argument("--board", type=parse_board, default=(GRID_WIDTH, GRID_HEIGHT), metavar="WxH")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--max-ticks", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    width, height = args.board
+    for game in range(args.games):
+        engine = SnakeEngine(args.speed, args.seed + game, width, height)
+        autopilot = Autopilot(engine, args.budget_ms)
+        play(engine, autopilot, args.max_ticks)
+        stats = autopilot.stats()
+        print(f"seed {engine.seed}: score {engine.score}, length {engine.length}, {engine.ticks} ticks, "
+              f"{engine.death_cause or 'alive'}; decision p50 {stats['p50_ms']:.3f} ms, "
+              f"p99 {stats['p99_ms']:.3f} ms, max {stats['max_ms']:.3f} ms, "
+              f"{stats['over_budget']} over budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
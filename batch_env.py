@@ -0,0 +1,284 @@
+"""Many independent snake boards stepped together with NumPy.
+
+BatchSnakeEnv keeps every board as rows of shared arrays (occupancy counts,
+a ring buffer of body cells with head and length, food, bonus, scores and
+clocks) and advances all of them with one step() call made of whole-array
+operations, for training and evaluating policies without a window. A board
+that ends is reset within the same step.
+
+The rules are SnakeEngine's: the same wall bounds and spawn area, no
+reversing, the cell the tail is leaving still counts as occupied, food
+grows the snake by one, the bonus grows it by two and appears and expires
+on the same clock. Only the random numbers differ, since all boards draw
+from one NumPy generator.
+
+    python batch_env.py --boards 4096 --ticks 1000 --policy greedy
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from autopilot import parse_board
+from snake_engine import (FOOD_POINTS, BONUS_POINTS, BONUS_LIFETIME, FIRST_BONUS_DELAY, NEXT_BONUS_DELAY,
+                          DIRECTION_CODES, GRID_WIDTH, GRID_HEIGHT)
+
+# Direction code -> (dx, dy), codes as in DIRECTION_CODES (0 right, 1 up, 2 left, 3 down)
+DX = np.zeros(4, dtype=np.int32)
+DY = np.zeros(4, dtype=np.int32)
+for (dx, dy), code in DIRECTION_CODES.items():
+    DX[code], DY[code] = dx, dy
+
+NO_CELL = -1
+# death_cause codes
+ALIVE, WALL, SELF = 0, 1, 2
+# observe() cell values
+EMPTY, BODY, HEAD, FOOD, BONUS = 0, 1, 2, 3, 4
+# Random spawn cells tried per board before scanning the whole board
+SPAWN_TRIES = 4
+
+
+class BatchSnakeEnv:
+    def __init__(self, boards, speed=8, seed=None, width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.boards = boards
+        self.speed = speed
+        self.tick_seconds = 1.0 / speed
+        self.width = width
+        self.height = height
+        self.cells = width * height
+        self.rng = np.random.default_rng(seed)
+        self.rows = np.arange(boards)
+
+        xs = np.arange(2, width - 2)
+        ys = np.arange(2, height - 2)
+        self.spawn_cells = (ys[:, None] * width + xs).ravel()
+        self.spawn_mask = np.zeros(self.cells, dtype=bool)
+        self.spawn_mask[self.spawn_cells] = True
+
+        # Body cells in a ring buffer per board; the head moves towards lower
+        # slots and the tail is length - 1 slots after it
+        self.capacity = self.cells
+        self.body = np.zeros((boards, self.capacity), dtype=np.int32)
+        self.head = np.zeros(boards, dtype=np.int64)
+        self.length = np.zeros(boards, dtype=np.int64)
+        self.occupancy = np.zeros((boards, self.cells), dtype=np.uint8)
+        self.direction = np.zeros(boards, dtype=np.int64)
+        self.food = np.full(boards, NO_CELL, dtype=np.int64)
+        self.bonus = np.full(boards, NO_CELL, dtype=np.int64)
+        self.bonus_spawn_time = np.zeros(boards)
+        self.clock = np.zeros(boards)
+        self.ticks = np.zeros(boards, dtype=np.int64)
+        self.score = np.zeros(boards, dtype=np.int64)
+
+        # Outcome of the last step for boards that finished in it (and were reset)
+        self.death_cause = np.zeros(boards, dtype=np.int8)
+        self.final_score = np.zeros(boards, dtype=np.int64)
+        self.final_length = np.zeros(boards, dtype=np.int64)
+        self.episodes = 0
+        self.reset()
+
+    def reset(self, mask=None):
+        # Start the boards in mask (all by default) over: one segment in the middle, facing right
+        rows = self.rows if mask is None else np.flatnonzero(mask)
+        if not len(rows):
+            return
+        start = (self.height // 2) * self.width + self.width // 2
+        self.occupancy[rows] = 0
+        self.occupancy[rows, start] = 1
+        self.head[rows] = 0
+        self.body[rows, 0] = start
+        self.length[rows] = 1
+        self.direction[rows] = DIRECTION_CODES[(1, 0)]
+        self.score[rows] = 0
+        self.clock[rows] = 0.0
+        self.ticks[rows] = 0
+        self.bonus[rows] = NO_CELL
+        self.food[rows] = NO_CELL
+        self.food[rows] = self._take_free_cells(rows)
+        self.bonus_spawn_time[rows] = self.rng.uniform(*FIRST_BONUS_DELAY, size=len(rows))
+
+    def _take_free_cells(self, rows):
+        # A uniformly random empty spawn cell for each row, NO_CELL where the board is full
+        cells = np.full(len(rows), NO_CELL, dtype=np.int64)
+        pending = np.arange(len(rows))
+        for _ in range(SPAWN_TRIES):
+            if not len(pending):
+                return cells
+            r = rows[pending]
+            candidates = self.spawn_cells[self.rng.integers(len(self.spawn_cells), size=len(pending))]
+            free = ((self.occupancy[r, candidates] == 0)
+                    & (candidates != self.food[r]) & (candidates != self.bonus[r]))
+            cells[pending[free]] = candidates[free]
+            pending = pending[~free]
+        if len(pending):
+            # Crowded boards: pick among all their free cells at once
+            r = rows[pending]
+            free = self.spawn_mask & (self.occupancy[r] == 0)
+            for items in (self.food[r], self.bonus[r]):
+                has = items >= 0
+                free[np.flatnonzero(has), items[has]] = False
+            counts = free.sum(axis=1)
+            picks = (self.rng.random(len(r)) * counts).astype(np.int64)
+            chosen = (free.cumsum(axis=1) > picks[:, None]).argmax(axis=1)
+            cells[pending] = np.where(counts > 0, chosen, NO_CELL)
+        return cells
+
+    def step(self, actions):
+        """Advance every board by one move.
+
+        actions holds a direction code per board, or -1 to keep going
+        straight. Returns (rewards, dones): points scored this step and which
+        boards ended. Ended boards are already reset; their death_cause,
+        final_score and final_length are set until their next ending.
+        """
+        rows = self.rows
+        width, height = self.width, self.height
+        actions = np.asarray(actions)
+        turn = (actions >= 0) & (actions != (self.direction + 2) % 4)
+        self.direction = np.where(turn, actions, self.direction)
+        self.ticks += 1
+        self.clock += self.tick_seconds
+        rewards = np.zeros(self.boards, dtype=np.int64)
+
+        # Retry food that could not be placed on a full board
+        missing = np.flatnonzero(self.food < 0)
+        if len(missing):
+            self.food[missing] = self._take_free_cells(missing)
+
+        # Bonus food appears on schedule and disappears after its lifetime
+        due = np.flatnonzero((self.bonus < 0) & (self.clock >= self.bonus_spawn_time))
+        if len(due):
+            self.bonus[due] = self._take_free_cells(due)
+        expired = np.flatnonzero((self.bonus >= 0) & (self.clock >= self.bonus_spawn_time + BONUS_LIFETIME))
+        if len(expired):
+            self.bonus[expired] = NO_CELL
+            self.bonus_spawn_time[expired] = self.clock[expired] + self.rng.uniform(
+                *NEXT_BONUS_DELAY, size=len(expired))
+
+        # Walls, then bodies as they stand before the tail moves
+        head_cell = self.body[rows, self.head]
+        x = head_cell % width + DX[self.direction]
+        y = head_cell // width + DY[self.direction]
+        wall = (x < 1) | (x >= width - 1) | (y < 1) | (y > height - 2)
+        new_cell = np.where(wall, 0, y * width + x)
+        hit = ~wall & (self.occupancy[rows, new_cell] > 0)
+        dead = wall | hit
+
+        alive = np.flatnonzero(~dead)
+        cells = new_cell[alive]
+        self.head[alive] = (self.head[alive] - 1) % self.capacity
+        self.body[alive, self.head[alive]] = cells
+        self.occupancy[alive, cells] += 1
+        self.length[alive] += 1
+
+        ate_food = cells == self.food[alive]
+        ate_bonus = ~ate_food & (cells == self.bonus[alive])
+        fed = alive[ate_food]
+        if len(fed):
+            # Keep the tail: the snake grows by one
+            rewards[fed] = FOOD_POINTS
+            self.food[fed] = NO_CELL
+            self.food[fed] = self._take_free_cells(fed)
+        treated = alive[ate_bonus]
+        if len(treated):
+            # Keep the tail and double it up: the snake grows by two
+            rewards[treated] = BONUS_POINTS
+            tail = self.body[treated, (self.head[treated] + self.length[treated] - 1) % self.capacity]
+            self.body[treated, (self.head[treated] + self.length[treated]) % self.capacity] = tail
+            self.occupancy[treated, tail] += 1
+            self.length[treated] += 1
+            self.bonus[treated] = NO_CELL
+            self.bonus_spawn_time[treated] = self.clock[treated] + self.rng.uniform(
+                *NEXT_BONUS_DELAY, size=len(treated))
+        moved = alive[~ate_food & ~ate_bonus]
+        if len(moved):
+            tail = self.body[moved, (self.head[moved] + self.length[moved] - 1) % self.capacity]
+            self.occupancy[moved, tail] -= 1
+            self.length[moved] -= 1
+        self.score += rewards
+
+        ended = np.flatnonzero(dead)
+        if len(ended):
+            self.death_cause[ended] = np.where(wall[ended], WALL, SELF)
+            self.final_score[ended] = self.score[ended]
+            self.final_length[ended] = self.length[ended]
+            self.episodes += len(ended)
+            self.reset(dead)
+        return rewards, dead
+
+    def observe(self, out=None):
+        # (boards, height, width) uint8 grids of EMPTY, BODY, HEAD, FOOD and BONUS
+        grid = out if out is not None else np.empty((self.boards, self.cells), dtype=np.uint8)
+        grid = grid.reshape(self.boards, self.cells)
+        np.minimum(self.occupancy, BODY, out=grid)
+        rows = self.rows
+        for items, value in ((self.food, FOOD), (self.bonus, BONUS)):
+            has = items >= 0
+            grid[rows[has], items[has]] = value
+        grid[rows, self.body[rows, self.head]] = HEAD
+        return grid.reshape(self.boards, self.height, self.width)
+
+    def heads(self):
+        # (x, y) of every board's head
+        cells = self.body[self.rows, self.head]
+        return cells % self.width, cells // self.width
+
+
+def random_actions(env):
+    return env.rng.integers(4, size=env.boards)
+
+
+def greedy_actions(env):
+    # Per board, the move closest to the bonus (else the food) that does not die at once
+    x, y = env.heads()
+    target = np.where(env.bonus >= 0, env.bonus, env.food)
+    tx, ty = target % env.width, target // env.width
+    costs = np.empty((4, env.boards), dtype=np.int64)
+    for code in range(4):
+        nx, ny = x + DX[code], y + DY[code]
+        inside = (nx >= 1) & (nx < env.width - 1) & (ny >= 1) & (ny <= env.height - 2)
+        cell = np.where(inside, ny * env.width + nx, 0)
+        safe = inside & (env.occupancy[env.rows, cell] == 0) & (code != (env.direction + 2) % 4)
+        costs[code] = np.where(safe, np.abs(nx - tx) + np.abs(ny - ty), env.cells)
+    return costs.argmin(axis=0)
+
+
+POLICIES = {"random": random_actions, "greedy": greedy_actions}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the batch environment")
+    parser.add_argument("--boards", type=int, default=4096)
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="greedy")
+    parser.add_argument("--board", type=parse_board, default=(GRID_WIDTH, GRID_HEIGHT), metavar="WxH")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    width, height = args.board
+    env = BatchSnakeEnv(args.boards, seed=args.seed, width=width, height=height)
+    policy = POLICIES[args.policy]
+    scores = []
+    step_time = 0.0
+    started = time.perf_counter()
+    for _ in range(args.ticks):
+        actions = policy(env)
+        step_started = time.perf_counter()
+        _, dones = env.step(actions)
+        step_time += time.perf_counter() - step_started
+        if dones.any():
+            scores.append(env.final_score[dones])
+    elapsed = time.perf_counter() - started
+
+    board_steps = args.boards * args.ticks
+    finished = np.concatenate(scores) if scores else np.zeros(0)
+    print(f"{board_steps} board-steps in {elapsed:.2f} s: {board_steps / elapsed:,.0f} per second with the "
+          f"{args.policy} policy, {board_steps / step_time:,.0f} per second in step() alone")
+    if len(finished):
+        print(f"{len(finished)} games finished, mean score {finished.mean():.1f}, max {finished.max()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
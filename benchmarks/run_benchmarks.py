@@ -0,0 +1,310 @@
+"""Benchmarks for the engine and renderer hot paths.
+
+Pure-logic microbenchmarks time SnakeEngine.step(), spawn_food(), snapshot()
+and from_snapshot() against snake length. The render benchmarks open an
+offscreen arcade window (set LIBGL_ALWAYS_SOFTWARE=1 for Mesa's software GL)
+and time GameView.on_update, whole frames (also on a 1000x1000 scrolling
+board and on the menu and game over screens), the snake, the frame, the
+environment at several densities and the particle pool at several sizes,
+counting GL draw calls as they go.
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json
+
+With --baseline the exit status is 1 if any p50 time is more than
+--tolerance slower than the baseline, or any benchmark issues more draw
+calls than it used to.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+os.environ.setdefault("ARCADE_HEADLESS", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from autopilot import hamiltonian_cycle
+from snake_engine import SnakeEngine, GRID_WIDTH, GRID_HEIGHT
+
+LENGTHS = (1, 10, 50, 100, 200, None)  # None: as long as the board allows
+DENSITIES = (0, 100, 400, 1600)
+PARTICLE_COUNTS = (0, 100, 1000, 10000)
+WORLD = (1000, 1000)
+WORLD_LENGTHS = (100, 10000, 100000)
+# Slowdowns smaller than this are timer noise, whatever the percentage
+NOISE_FLOOR_US = 1.0
+
+
+class CycleRunner:
+    """Keeps a snake of fixed length circling the board without dying or eating."""
+
+    def __init__(self, engine, length):
+        self.engine = engine
+        self.cycle = hamiltonian_cycle(engine.width, engine.height)
+        self.length = min(length, len(self.cycle) - 1)
+        self.index = self.length - 1
+        body = [self.cycle[i] for i in range(self.index, -1, -1)]
+        engine.reset_body(body, self.move(self.index))
+
+        # Park the food on a cell the cycle never visits and hold off the bonus
+        spare = (1, engine.height - 2)
+        if spare not in self.cycle:
+            old = engine.food_pos
+            engine.food_pos = spare
+            if old and not engine.is_occupied(old):
+                engine.free_cells.add(old[1] * engine.width + old[0])
+        engine.bonus_spawn_time = float("inf")
+
+    def move(self, index):
+        head = self.cycle[index % len(self.cycle)]
+        nxt = self.cycle[(index + 1) % len(self.cycle)]
+        return (nxt[0] - head[0], nxt[1] - head[1])
+
+    def next_direction(self):
+        direction = self.move(self.index)
+        self.index += 1
+        return direction
+
+
+def full_length():
+    return len(hamiltonian_cycle(GRID_WIDTH, GRID_HEIGHT)) - 1
+
+
+def sweep_lengths():
+    return [length or full_length() for length in LENGTHS]
+
+
+def summarize(samples_ns, draw_calls=None):
+    samples = np.asarray(samples_ns, dtype=np.float64) / 1000.0
+    result = {
+        "unit": "us",
+        "samples": len(samples),
+        "p50": round(float(np.percentile(samples, 50)), 3),
+        "p99": round(float(np.percentile(samples, 99)), 3),
+    }
+    if draw_calls is not None:
+        result["draw_calls"] = int(np.median(draw_calls))
+    return result
+
+
+def bench_engine(results, samples):
+    for length in sweep_lengths():
+        engine = SnakeEngine(8, seed=1)
+        runner = CycleRunner(engine, length)
+        step = engine.step
+        timings = []
+        for _ in range(samples):
+            direction = runner.next_direction()
+            started = time.perf_counter_ns()
+            step(direction)
+            timings.append(time.perf_counter_ns() - started)
+        assert engine.alive and engine.length == runner.length
+        results[f"engine.step/len={runner.length}"] = summarize(timings)
+
+        # Save and restore the mid-game state just reached
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter_ns()
+            snapshot = engine.snapshot()
+            timings.append(time.perf_counter_ns() - started)
+        results[f"engine.snapshot/len={runner.length}"] = summarize(timings)
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter_ns()
+            SnakeEngine.from_snapshot(snapshot)
+            timings.append(time.perf_counter_ns() - started)
+        results[f"engine.from_snapshot/len={runner.length}"] = summarize(timings)
+
+        engine = SnakeEngine(8, seed=1)
+        CycleRunner(engine, length)
+        if not len(engine.free_cells):
+            continue
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter_ns()
+            pos = engine.spawn_food()
+            timings.append(time.perf_counter_ns() - started)
+            engine.free_cells.add(pos[1] * engine.width + pos[0])
+        results[f"engine.spawn_food/len={runner.length}"] = summarize(timings)
+
+
+def timed_draws(window, counter, draw, samples, warmup=3):
+    # Each sample waits for the GPU so queued work is not billed to the next one
+    ctx = window.ctx
+    for _ in range(warmup):
+        draw()
+    ctx.finish()
+    counter.take()
+    timings = []
+    draw_calls = []
+    for _ in range(samples):
+        started = time.perf_counter_ns()
+        draw()
+        ctx.finish()
+        timings.append(time.perf_counter_ns() - started)
+        draw_calls.append(counter.take())
+    return summarize(timings, draw_calls)
+
+
+def bench_render(results, samples):
+    import arcade
+    import Snake_game as game
+    from gl_stats import DrawCallCounter
+
+    window = arcade.Window(game.SCREEN_WIDTH, game.SCREEN_HEIGHT, "Q_Snake benchmarks", visible=False)
+    counter = DrawCallCounter().install()
+    results["_renderer"] = window.ctx.info.RENDERER
+    try:
+        for length in sweep_lengths():
+            view = game.GameView(8, seed=1)
+            window.show_view(view)
+            runner = CycleRunner(view.engine, length)
+            label = f"len={runner.length}"
+
+            def tick():
+                view.snake.target_direction = runner.next_direction()
+                view.on_update(view.move_delay)
+
+            timings = []
+            for _ in range(samples):
+                started = time.perf_counter_ns()
+                tick()
+                timings.append(time.perf_counter_ns() - started)
+            assert view.engine.alive and view.engine.length == runner.length
+            results[f"GameView.on_update/{label}"] = summarize(timings)
+
+            results[f"frame/{label}"] = timed_draws(window, counter, view.on_draw, samples)
+            results[f"RealisticSnake.draw_realistic/{label}"] = timed_draws(
+                window, counter, view.snake.draw_realistic, samples)
+
+        # Large-board frames should cost the same whatever the snake's length
+        for length in WORLD_LENGTHS:
+            view = game.GameView(8, seed=1, world=WORLD)
+            window.show_view(view)
+            runner = CycleRunner(view.engine, length)
+            view.world.segment_index.rebuild()
+            for _ in range(3):
+                view.snake.target_direction = runner.next_direction()
+                view.on_update(view.move_delay)
+            results[f"frame/world={WORLD[0]}x{WORLD[1]}/len={runner.length}"] = timed_draws(
+                window, counter, view.on_draw, samples)
+
+        for view in (game.MenuView(), game.GameOverView(120, 13, submit=False)):
+            window.show_view(view)
+            results[f"frame/{type(view).__name__}"] = timed_draws(window, counter, view.on_draw, samples)
+
+        view = game.GameView(8, seed=1)
+        window.show_view(view)
+        results["GameView.draw_ornate_frame"] = timed_draws(window, counter, view.draw_ornate_frame, samples)
+
+        for density in DENSITIES:
+            environment = game.ProceduralEnvironment(seed=1, density=density)
+
+            def draw_environment():
+                environment.update(1 / 60)
+                environment.draw()
+
+            results[f"ProceduralEnvironment.draw/density={density}"] = timed_draws(
+                window, counter, draw_environment, samples)
+
+        for count in PARTICLE_COUNTS:
+            particles = game.ParticleSystem(capacity=max(count, 1))
+            particles.emit(game.SCREEN_WIDTH / 2, game.SCREEN_HEIGHT / 2, count, (0, 1), 1e9)
+
+            def draw_particles():
+                particles.update(1 / 60)
+                particles.draw()
+
+            results[f"ParticleSystem.update+draw/count={count}"] = timed_draws(
+                window, counter, draw_particles, samples)
+    finally:
+        counter.uninstall()
+        window.close()
+
+
+def compare(results, baseline, tolerance):
+    # Returns a list of human-readable regressions
+    regressions = []
+    for name, old in baseline.get("results", {}).items():
+        new = results.get(name)
+        if not isinstance(old, dict) or not isinstance(new, dict):
+            continue
+        if new["p50"] > old["p50"] * (1 + tolerance) and new["p50"] - old["p50"] > NOISE_FLOOR_US:
+            regressions.append(f"{name}: p50 {old['p50']:.1f} -> {new['p50']:.1f} us")
+        if new.get("draw_calls", 0) > old.get("draw_calls", new.get("draw_calls", 0)):
+            regressions.append(f"{name}: draw calls {old['draw_calls']} -> {new['draw_calls']}")
+    return regressions
+
+
+def report(results, baseline=None):
+    old_results = baseline.get("results", {}) if baseline else {}
+    print(f"{'benchmark':<48} {'p50 us':>10} {'p99 us':>10} {'draws':>6} {'vs base':>8}")
+    for name, result in results.items():
+        if not isinstance(result, dict):
+            continue
+        draws = result.get("draw_calls", "")
+        change = ""
+        old = old_results.get(name)
+        if isinstance(old, dict) and old["p50"]:
+            change = f"{(result['p50'] / old['p50'] - 1) * 100:+.0f}%"
+        print(f"{name:<48} {result['p50']:>10.1f} {result['p99']:>10.1f} {draws:>6} {change:>8}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Q_SNAKE benchmarks")
+    parser.add_argument("--samples", type=int, default=300, help="timed samples per benchmark")
+    parser.add_argument("--quick", action="store_true", help="30 samples per benchmark")
+    parser.add_argument("--no-render", action="store_true", help="only run the pure-logic benchmarks")
+    parser.add_argument("--output", metavar="FILE", help="write the results as JSON")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against a previous --output file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed p50 slowdown against the baseline (default 0.25 = 25%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    samples = 30 if args.quick else args.samples
+    results = {}
+    bench_engine(results, samples)
+    if not args.no_render:
+        bench_render(results, samples)
+
+    renderer = results.pop("_renderer", None)
+    import arcade
+    output = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "numpy": np.__version__,
+            "arcade": arcade.version.VERSION,
+            "renderer": renderer,
+            "samples": samples,
+        },
+        "results": results,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    report(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION  {line}")
+        if regressions:
+            return 1
+        print("no regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""Render games offscreen and save them as PNG frames or an animated GIF.
+
+Frames are drawn in a headless arcade window, so no display is needed (set
+LIBGL_ALWAYS_SOFTWARE=1 for Mesa's software GL on machines without a GPU).
+Each frame is read back with glReadPixels into one of a few preallocated
+arrays and handed to a thread pool that flips, scales and encodes it. The
+render loop only waits when every array is still queued for encoding. The
+seed, the time step and the autopilot's decisions are all fixed, so a run
+draws the same frames every time and can produce golden images.
+
+    python capture.py --seed 7 --frames 300 --output frames/          # frames/frame_00000.png ...
+    python capture.py --seed 7 --frames 240 --output clip.gif --scale 0.5
+    python capture.py --replay replays/FILE.qsr --output replay.gif
+
+The game is played by the autopilot unless a replay is given. Capture stops
+after --frames frames, or one second into the game over screen.
+"""
+import argparse
+import ctypes
+import os
+import queue
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("ARCADE_HEADLESS", "1")
+
+import arcade
+import numpy as np
+from PIL import Image
+from pyglet import gl
+
+import Snake_game as game
+from highscores import HighScoreStore, set_high_score_store
+from replay import Replay
+
+
+class FrameGrabber:
+    """Reads the window's framebuffer into a fixed pool of reusable arrays."""
+
+    def __init__(self, window, buffers):
+        self.window = window
+        self.width, self.height = window.get_framebuffer_size()
+        self.free = queue.Queue()
+        for _ in range(buffers):
+            self.free.put(np.empty((self.height, self.width, 3), dtype=np.uint8))
+        self.waited = 0.0
+
+    def grab(self):
+        # Bottom row first, as GL stores it; blocks only while every array is in use
+        started = time.perf_counter()
+        frame = self.free.get()
+        self.waited += time.perf_counter() - started
+        self.window.ctx.screen.use()
+        gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 1)
+        gl.glReadPixels(0, 0, self.width, self.height, gl.GL_RGB, gl.GL_UNSIGNED_BYTE,
+                        frame.ctypes.data_as(ctypes.c_void_p))
+        return frame
+
+    def to_image(self, frame, scale=1.0):
+        # Copies (and flips) the pixels, so the array goes straight back to the pool
+        image = Image.frombuffer("RGB", (self.width, self.height), frame, "raw", "RGB", 0, -1)
+        self.free.put(frame)
+        if scale != 1.0:
+            size = (max(1, round(self.width * scale)), max(1, round(self.height * scale)))
+            image = image.resize(size, Image.Resampling.BILINEAR)
+        return image
+
+
+class PngSequence:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def encode(self, index, image):
+        image.save(os.path.join(self.directory, f"frame_{index:05d}.png"), compress_level=1)
+
+    def finish(self, fps):
+        pass
+
+
+class GifWriter:
+    """Frames are quantized to 256 colours in the pool and written in order at the end."""
+
+    def __init__(self, path):
+        self.path = path
+        self.frames = {}
+
+    def encode(self, index, image):
+        self.frames[index] = image.quantize(256, method=Image.Quantize.FASTOCTREE)
+
+    def finish(self, fps):
+        frames = [self.frames[i] for i in sorted(self.frames)]
+        if frames:
+            frames[0].save(self.path, save_all=True, append_images=frames[1:], duration=round(1000 / fps), loop=0)
+
+
+def capture(view, writer, frames, fps, scale=1.0, workers=None, buffers=None):
+    window = arcade.get_window()
+    workers = workers or os.cpu_count()
+    grabber = FrameGrabber(window, buffers or 2 * workers + 1)
+    dt = 1 / fps
+    window.show_view(view)
+
+    def encode(index, frame):
+        writer.encode(index, grabber.to_image(frame, scale))
+
+    started = time.perf_counter()
+    rendering = 0.0
+    after_game_over = 0
+    with ThreadPoolExecutor(workers, thread_name_prefix="capture-encoder") as pool:
+        jobs = []
+        for index in range(frames):
+            frame_started = time.perf_counter()
+            window.current_view.on_update(dt)
+            window.current_view.on_draw()
+            frame = grabber.grab()
+            rendering += time.perf_counter() - frame_started
+            jobs.append(pool.submit(encode, index, frame))
+            if window.current_view is not view:
+                after_game_over += 1
+                if after_game_over >= fps:
+                    break
+        for job in jobs:
+            job.result()  # Re-raise any encoding error
+    writer.finish(fps)
+    elapsed = time.perf_counter() - started
+    return {"frames": len(jobs), "seconds": elapsed, "rendering": rendering - grabber.waited,
+            "waiting": grabber.waited}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Capture Q_SNAKE gameplay offscreen")
+    parser.add_argument("--output", required=True,
+                        help="a .gif file for an animated GIF, anything else is a directory of PNG frames")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--speed", type=int, default=8, help="game speed (moves per second)")
+    parser.add_argument("--replay", metavar="FILE", help="play back a recorded replay instead of the autopilot")
+    parser.add_argument("--frames", type=int, default=300, help="maximum number of frames")
+    parser.add_argument("--fps", type=int, default=30, help="frames per second of game time")
+    parser.add_argument("--scale", type=float, default=1.0, help="resize frames by this factor before encoding")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="encoding threads")
+    parser.add_argument("--buffers", type=int, default=0, help="readback buffers (default 2 per worker + 1)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Nothing drawn may depend on this machine: global randomness, high scores or CPU speed
+    random.seed(args.seed)
+    set_high_score_store(HighScoreStore(os.path.join(tempfile.mkdtemp(), "highscore.json")))
+    window = arcade.Window(game.SCREEN_WIDTH, game.SCREEN_HEIGHT, "Q_Snake capture", visible=False)
+    try:
+        if args.replay:
+            view = game.GameView(0, replay=Replay.load(args.replay))
+        else:
+            view = game.GameView(args.speed, seed=args.seed, autopilot=True)
+            view.autopilot.budget = float("inf")
+        if args.output.lower().endswith(".gif"):
+            writer = GifWriter(args.output)
+        else:
+            writer = PngSequence(args.output)
+        stats = capture(view, writer, args.frames, args.fps, args.scale, args.workers, args.buffers)
+    finally:
+        window.close()
+    frames, seconds = stats["frames"], stats["seconds"]
+    print(f"{frames} frames in {seconds:.2f} s ({frames / seconds:.1f} frames/s) to {args.output}; "
+          f"rendering {stats['rendering']:.2f} s, waiting for encoders {stats['waiting']:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""Board cells grouped into square chunks, for drawing only what is on screen."""
+from collections import defaultdict
+
+import numpy as np
+
+CHUNK_CELLS = 16
+
+
+def chunk_of(x, y):
+    return (x // CHUNK_CELLS, y // CHUNK_CELLS)
+
+
+def chunks_in_rect(left, bottom, right, top):
+    # Keys of every chunk overlapping the inclusive cell rectangle
+    for cy in range(bottom // CHUNK_CELLS, top // CHUNK_CELLS + 1):
+        for cx in range(left // CHUNK_CELLS, right // CHUNK_CELLS + 1):
+            yield (cx, cy)
+
+
+class SegmentIndex:
+    """Snake segments bucketed by chunk under a sequence number each.
+
+    The head takes the next number on every move and the tail always holds
+    the lowest one, so a segment's body index is head_seq - seq. A move only
+    touches the buckets of the new head and the old tail, whatever the
+    length of the snake.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.chunks = defaultdict(set)
+        self.rebuild()
+
+    def rebuild(self):
+        self.chunks.clear()
+        body = self.engine.segments.view().tolist()
+        self.head_seq = len(body) - 1
+        self.tail_seq = 0
+        for i, (x, y) in enumerate(body):
+            self.chunks[chunk_of(x, y)].add(self.head_seq - i)
+
+    def update(self, result):
+        # Call after every step() that left the snake alive
+        engine = self.engine
+        self.head_seq += 1
+        self.chunks[chunk_of(*engine.segments[0])].add(self.head_seq)
+        if result.ate_bonus:
+            # The tail was doubled up on its own cell
+            self.tail_seq -= 1
+            self.chunks[chunk_of(*engine.segments[-1])].add(self.tail_seq)
+        elif not result.ate_food:
+            key = chunk_of(*engine.vacated_tail)
+            bucket = self.chunks[key]
+            bucket.discard(self.tail_seq)
+            if not bucket:
+                del self.chunks[key]
+            self.tail_seq += 1
+
+    def visible(self, left, bottom, right, top):
+        # Sorted body indices of the segments in chunks overlapping the cell
+        # rectangle, always starting with the head
+        seqs = [0]
+        for key in chunks_in_rect(left, bottom, right, top):
+            bucket = self.chunks.get(key)
+            if bucket:
+                seqs.extend(self.head_seq - seq for seq in bucket)
+        return np.unique(np.array(seqs, dtype=np.int64))
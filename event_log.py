@@ -0,0 +1,152 @@
+"""Gameplay events (starts, spawns, food eaten, deaths) as rotating JSON Lines files.
+
+Each line is one event with its name, a Unix timestamp and the fields the
+game passed in. Writing happens on a background thread so that logging
+costs the game loop a few microseconds:
+
+    log = EventLog("snake_events.jsonl")
+    log.log("eat", item="food", score=10)
+    log.close()
+"""
+import json
+import os
+import threading
+import time
+
+EVENT_LOG_FILE = "snake_events.jsonl"
+MAX_BYTES = 1024 * 1024
+BACKUPS = 3
+CAPACITY = 4096
+FLUSH_INTERVAL = 0.5
+
+
+class EventLog:
+    """Gameplay events appended to rotating JSON Lines files by a background thread.
+
+    log() only puts the event in a bounded in-memory buffer. When the buffer
+    is full the event is dropped and counted instead of waiting, and the
+    count is written as a "dropped" event once there is room again. The
+    writer takes the whole buffer every FLUSH_INTERVAL seconds (or sooner
+    when it is half full) and writes it in one go. When the file grows past
+    max_bytes it becomes FILE.1, older files shift up to FILE.<backups>, and
+    the oldest is deleted.
+    """
+
+    def __init__(self, path=EVENT_LOG_FILE, max_bytes=MAX_BYTES, backups=BACKUPS, capacity=CAPACITY,
+                 flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self.last_error = None
+
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._events = []
+        self._unreported_drops = 0
+        self._logged = 0
+        self._done = 0
+        self._closed = False
+        self._file = None
+        self._writer = threading.Thread(target=self._write_loop, name="event-log-writer", daemon=True)
+        self._writer.start()
+
+    def log(self, event, **fields):
+        # Never blocks on the disk; False when the event was dropped
+        record = {"event": event, "time": round(time.time(), 3), **fields}
+        with self._lock:
+            if len(self._events) >= self.capacity:
+                self.dropped += 1
+                self._unreported_drops += 1
+                return False
+            self._events.append(record)
+            self._logged += 1
+            if len(self._events) * 2 >= self.capacity:
+                self._wake.notify_all()
+        return True
+
+    def flush(self, timeout=None):
+        # Block until everything logged so far has been written (or timeout)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            target = self._logged
+            self._wake.notify_all()
+            while self._done < target and self._writer.is_alive():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._wake.wait(remaining)
+        return self._done >= target
+
+    def close(self, timeout=2.0):
+        self.flush(timeout)
+        with self._lock:
+            self._closed = True
+            self._wake.notify_all()
+        self._writer.join(timeout)
+
+    def _write_loop(self):
+        while True:
+            with self._lock:
+                if not self._closed and len(self._events) * 2 < self.capacity:
+                    # Woken early by a half-full buffer, flush() or close()
+                    self._wake.wait(self.flush_interval)
+                if self._closed and not self._events:
+                    break
+                events, self._events = self._events, []
+                drops, self._unreported_drops = self._unreported_drops, 0
+            if drops:
+                events.append({"event": "dropped", "time": round(time.time(), 3), "count": drops})
+            if events:
+                try:
+                    self.written += self._write(events)
+                except Exception as e:
+                    # Logging must never stop the game or this thread; the batch is lost
+                    self.last_error = e
+                    self._close_file()
+            with self._lock:
+                self._done += len(events) - (1 if drops else 0)
+                self._wake.notify_all()
+        self._close_file()
+
+    def _write(self, events):
+        # Returns how many events were written
+        lines = []
+        for event in events:
+            try:
+                # Values json cannot encode are written as their str()
+                lines.append(json.dumps(event, separators=(",", ":"), default=str) + "\n")
+            except (TypeError, ValueError) as e:
+                # e.g. a circular reference; only this event is lost
+                self.last_error = e
+        data = "".join(lines).encode()
+        if self._file is None:
+            self._file = open(self.path, "ab")
+        if self._file.tell() and self._file.tell() + len(data) > self.max_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        return len(lines)
+
+    def _rotate(self):
+        self._close_file()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "ab")
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
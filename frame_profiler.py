@@ -0,0 +1,99 @@
+"""Per-frame phase timings kept in a fixed-size ring buffer.
+
+The game calls start() at the top of on_update/on_draw, lap(phase) after
+each phase and end_frame() once a frame is drawn. Every frame becomes one
+row of milliseconds per phase plus the GL draw calls it issued; the last
+`capacity` rows are kept. Views only call into the profiler when one is
+installed on the window, so a game without one pays a single attribute
+lookup per callback.
+"""
+import csv
+import json
+import time
+
+import numpy as np
+
+from gl_stats import DrawCallCounter
+
+PHASES = ("update", "clear", "frame", "environment", "snake", "food", "particles", "hud")
+PERCENTILES = (50, 95, 99)
+
+
+class FrameProfiler:
+    def __init__(self, phases=PHASES, capacity=600):
+        self.phases = phases
+        self.columns = {name: i for i, name in enumerate(phases)}
+        self.capacity = capacity
+        self.samples = np.zeros((capacity, len(phases)), dtype=np.float32)
+        self.draw_calls = np.zeros(capacity, dtype=np.int32)
+        self.frames = 0
+        self.pending = np.zeros(len(phases), dtype=np.float64)
+        self.overlay_visible = False
+        self.draw_counter = DrawCallCounter()
+        self._last = time.perf_counter()
+
+    def install(self):
+        # Needs pyglet's GL modules loaded, i.e. a window
+        self.draw_counter.install()
+        self.draw_counter.take()
+        return self
+
+    def uninstall(self):
+        self.draw_counter.uninstall()
+
+    def start(self):
+        self._last = time.perf_counter()
+
+    def lap(self, phase):
+        # Time since start() or the previous lap, added to the current frame's phase
+        now = time.perf_counter()
+        self.pending[self.columns[phase]] += (now - self._last) * 1000
+        self._last = now
+
+    def end_frame(self):
+        row = self.frames % self.capacity
+        self.samples[row] = self.pending
+        self.draw_calls[row] = self.draw_counter.take()
+        self.pending[:] = 0
+        self.frames += 1
+
+    def recent(self):
+        # (samples, draw_calls) for the buffered frames, oldest first
+        if self.frames <= self.capacity:
+            return self.samples[:self.frames], self.draw_calls[:self.frames]
+        order = np.roll(np.arange(self.capacity), -(self.frames % self.capacity))
+        return self.samples[order], self.draw_calls[order]
+
+    def summary(self):
+        # {phase: (p50, p95, p99)} in ms, plus "total" and "draw calls"
+        samples, draw_calls = self.recent()
+        if not len(samples):
+            return {}
+        table = np.percentile(samples, PERCENTILES, axis=0)
+        result = {name: tuple(table[:, i]) for i, name in enumerate(self.phases)}
+        result["total"] = tuple(np.percentile(samples.sum(axis=1), PERCENTILES))
+        result["draw calls"] = tuple(np.percentile(draw_calls, PERCENTILES))
+        return result
+
+    def export(self, path):
+        # CSV (one row per frame) or JSON (frames plus summary), by file extension
+        samples, draw_calls = self.recent()
+        first = self.frames - len(samples)
+        if path.endswith(".json"):
+            data = {
+                "phases": list(self.phases),
+                "unit": "ms",
+                "first_frame": first,
+                "frames": [[round(float(v), 4) for v in row] + [int(calls)]
+                           for row, calls in zip(samples, draw_calls)],
+                "summary": {name: [round(float(v), 4) for v in values]
+                            for name, values in self.summary().items()},
+            }
+            with open(path, "w") as f:
+                json.dump(data, f)
+            return
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", *(f"{name}_ms" for name in self.phases), "draw_calls"])
+            for i, (row, calls) in enumerate(zip(samples, draw_calls)):
+                writer.writerow([first + i, *(f"{v:.4f}" for v in row), int(calls)])
@@ -0,0 +1,50 @@
+import importlib
+
+# Every GL entry point arcade and pyglet issue draws through, by the module
+# whose globals they are looked up in at call time
+_DRAW_FUNCTIONS = {
+    "pyglet.gl": ("glDrawArrays", "glDrawElements", "glDrawArraysInstanced", "glDrawElementsInstanced"),
+    "pyglet.graphics": ("glDrawArrays", "glDrawElements"),
+    "pyglet.graphics.vertexdomain": ("glDrawArrays", "glDrawElements",
+                                     "glDrawArraysInstanced", "glDrawElementsInstanced"),
+}
+
+
+class DrawCallCounter:
+    """Counts GL draw calls issued by arcade and pyglet while installed.
+
+    install() wraps the draw functions in place; uninstall() puts the
+    originals back. Import pyglet's GL modules (create the window) first.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._originals = []
+
+    def _counted(self, function):
+        def draw(*args):
+            self.count += 1
+            return function(*args)
+        return draw
+
+    def install(self):
+        if self._originals:
+            return self
+        for module_name, names in _DRAW_FUNCTIONS.items():
+            module = importlib.import_module(module_name)
+            for name in names:
+                original = getattr(module, name, None)
+                if original is not None:
+                    self._originals.append((module, name, original))
+                    setattr(module, name, self._counted(original))
+        return self
+
+    def uninstall(self):
+        for module, name, original in self._originals:
+            setattr(module, name, original)
+        self._originals = []
+
+    def take(self):
+        # Draw calls since the last take()
+        count, self.count = self.count, 0
+        return count
@@ -0,0 +1,170 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+HIGH_SCORE_FILE = "snake_highscore.json"
+LEADERBOARD_SIZE = 10
+
+
+class HighScoreStore:
+    """High scores held in memory and written to disk by a background thread.
+
+    The file is read once when the store is created. submit() only updates
+    memory and wakes the writer, which replaces the file atomically (write to
+    a temporary file, then os.replace), so nothing on the game loop touches
+    the disk. Errors reading or writing the file are kept in last_error and
+    printed once by close().
+    """
+
+    def __init__(self, path=HIGH_SCORE_FILE, leaderboard_size=LEADERBOARD_SIZE):
+        self.path = path
+        self.leaderboard_size = leaderboard_size
+        self.high_score = 0
+        self.leaderboards = {}
+        self.last_error = None
+
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._version = 0
+        self._written_version = 0
+        self._closed = False
+        self._load()
+        self._writer = threading.Thread(target=self._write_loop, name="highscore-writer", daemon=True)
+        self._writer.start()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            # Keep playing with an empty table; the next save rewrites the file
+            self.last_error = e
+            return
+        if not isinstance(data, dict):
+            self.last_error = ValueError(f"expected a JSON object, not {type(data).__name__}")
+            return
+        high_score = data.get("high_score", 0)
+        if _is_int(high_score):
+            self.high_score = high_score
+        else:
+            self.last_error = ValueError(f"high_score is not a whole number: {high_score!r}")
+        leaderboards = data.get("leaderboards", {})
+        if not isinstance(leaderboards, dict):
+            self.last_error = ValueError("leaderboards is not a JSON object")
+            return
+        for difficulty, entries in leaderboards.items():
+            if not isinstance(entries, list):
+                entries = [entries]
+            # Entries submit() could not sort are dropped, the rest kept
+            valid = [dict(entry) for entry in entries if _is_entry(entry)]
+            if len(valid) < len(entries):
+                self.last_error = ValueError(f"dropped {len(entries) - len(valid)} malformed {difficulty} entries")
+            if valid:
+                self.leaderboards[difficulty] = valid[:self.leaderboard_size]
+
+    def leaderboard(self, difficulty):
+        return list(self.leaderboards.get(difficulty, ()))
+
+    def submit(self, score, length, difficulty):
+        # Returns True when the score beats the overall high score
+        entry = {"score": score, "length": length, "timestamp": time.time()}
+        with self._lock:
+            is_new_high_score = score > self.high_score
+            if is_new_high_score:
+                self.high_score = score
+            board = self.leaderboards.setdefault(difficulty, [])
+            board.append(entry)
+            board.sort(key=lambda e: (-e["score"], -e["length"], e["timestamp"]))
+            del board[self.leaderboard_size:]
+            self._version += 1
+            self._wake.notify_all()
+        return is_new_high_score
+
+    def flush(self, timeout=None):
+        # Block until everything submitted so far is on disk (or timeout)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            target = self._version
+            while self._written_version < target and self._writer.is_alive():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._wake.wait(remaining)
+        return self._written_version >= target
+
+    def close(self, timeout=2.0):
+        saved = self.flush(timeout)
+        with self._lock:
+            already_closed = self._closed
+            self._closed = True
+            self._wake.notify_all()
+        self._writer.join(timeout)
+        if self.last_error is not None and not already_closed:
+            # The game never waits on the file, so this is where a problem with it shows
+            unsaved = "" if saved else "; the latest scores were not saved"
+            print(f"High score file {self.path}: {self.last_error}{unsaved}")
+
+    def _write_loop(self):
+        while True:
+            with self._lock:
+                while self._version == self._written_version and not self._closed:
+                    self._wake.wait()
+                if self._closed:
+                    return
+                version = self._version
+                data = {
+                    "high_score": self.high_score,
+                    "leaderboards": {k: [dict(e) for e in v] for k, v in self.leaderboards.items()},
+                }
+            try:
+                self._write(data)
+            except OSError as e:
+                # Leave the version unwritten and retry shortly
+                self.last_error = e
+                with self._lock:
+                    self._wake.wait(1.0)
+                continue
+            with self._lock:
+                self._written_version = version
+                # The file on disk is good now, whatever went wrong before
+                self.last_error = None
+                self._wake.notify_all()
+
+    def _write(self, data):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_entry(entry):
+    return (isinstance(entry, dict) and _is_int(entry.get("score")) and _is_int(entry.get("length"))
+            and isinstance(entry.get("timestamp"), (int, float)) and not isinstance(entry["timestamp"], bool))
+
+
+_store = None
+
+
+def get_high_score_store():
+    # One store per process, shared by every view
+    global _store
+    if _store is None:
+        _store = HighScoreStore()
+        atexit.register(_store.close)
+    return _store
+
+
+def set_high_score_store(store):
+    # Replace the shared store, e.g. with one on a scratch file for batch jobs
+    global _store
+    _store = store
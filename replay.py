@@ -0,0 +1,176 @@
+"""Record games as seed + tick-indexed inputs and re-simulate them headless.
+
+A SnakeEngine run depends only on its seed, speed, board size and the
+direction passed to each step(), so that is all a replay stores. Inputs are
+kept only on the ticks where the requested direction changes.
+
+    python replay.py replays/*.qsr    # verify every file at full speed
+"""
+import argparse
+import struct
+import sys
+
+from snake_engine import SnakeEngine, DIRECTION_CODES
+
+MAGIC = b"QSRP"
+VERSION = 1
+# magic, version, speed, seed, width, height, ticks, score, length, input count
+HEADER = struct.Struct("<4sBHQHHIIII")
+DIRECTIONS = {code: direction for direction, code in DIRECTION_CODES.items()}
+
+
+class ReplayError(ValueError):
+    pass
+
+
+class Replay:
+    def __init__(self, seed, speed, width, height, inputs=None, ticks=0, score=0, length=1):
+        self.seed = seed
+        self.speed = speed
+        self.width = width
+        self.height = height
+        # (tick, direction) pairs in tick order
+        self.inputs = inputs if inputs is not None else []
+        self.ticks = ticks
+        self.score = score
+        self.length = length
+
+    def to_bytes(self):
+        out = bytearray(HEADER.pack(MAGIC, VERSION, self.speed, self.seed, self.width, self.height,
+                                    self.ticks, self.score, self.length, len(self.inputs)))
+        previous = 0
+        for tick, direction in self.inputs:
+            _write_varint(out, tick - previous)
+            out.append(DIRECTION_CODES[direction])
+            previous = tick
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < HEADER.size:
+            raise ReplayError("replay is truncated")
+        magic, version, speed, seed, width, height, ticks, score, length, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ReplayError("not a Q_SNAKE replay")
+        if version != VERSION:
+            raise ReplayError(f"unsupported replay version {version}")
+        inputs = []
+        offset = HEADER.size
+        tick = 0
+        try:
+            for _ in range(count):
+                delta, offset = _read_varint(data, offset)
+                tick += delta
+                inputs.append((tick, DIRECTIONS[data[offset]]))
+                offset += 1
+        except (IndexError, KeyError):
+            raise ReplayError("replay input stream is corrupt") from None
+        return cls(seed, speed, width, height, inputs, ticks, score, length)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def new_engine(self):
+        return SnakeEngine(self.speed, self.seed, self.width, self.height)
+
+    def directions(self):
+        # The direction passed to step() on each tick, starting at tick 0
+        current = None
+        inputs = iter(self.inputs)
+        pending = next(inputs, None)
+        for tick in range(self.ticks):
+            while pending is not None and pending[0] <= tick:
+                current = pending[1]
+                pending = next(inputs, None)
+            yield current
+
+
+class ReplayRecorder:
+    """Collects the inputs of a live engine; call record() before each step()."""
+
+    def __init__(self, engine, replay=None):
+        # replay: inputs recorded before the engine was suspended, to carry on from
+        self.engine = engine
+        self.replay = replay or Replay(engine.seed, engine.speed, engine.width, engine.height)
+        self.last_direction = self.replay.inputs[-1][1] if self.replay.inputs else None
+
+    def record(self, direction):
+        if direction != self.last_direction:
+            self.replay.inputs.append((self.engine.ticks, direction))
+            self.last_direction = direction
+
+    def finish(self):
+        self.replay.ticks = self.engine.ticks
+        self.replay.score = self.engine.score
+        self.replay.length = self.engine.length
+        return self.replay
+
+
+def simulate(replay):
+    # Re-run the whole game headless, as fast as the engine can step
+    engine = replay.new_engine()
+    step = engine.step
+    for direction in replay.directions():
+        if not step(direction).alive:
+            break
+    return engine
+
+
+def verify(replay):
+    engine = simulate(replay)
+    ok = (engine.ticks == replay.ticks and engine.score == replay.score
+          and engine.length == replay.length)
+    return ok, engine
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify Q_SNAKE replays by re-simulating them headless")
+    parser.add_argument("replays", nargs="+", help="replay files (.qsr)")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for path in args.replays:
+        try:
+            replay = Replay.load(path)
+        except (OSError, ReplayError) as e:
+            print(f"ERROR     {path}: {e}")
+            failures += 1
+            continue
+        ok, engine = verify(replay)
+        if ok:
+            print(f"OK        {path}: score {replay.score}, length {replay.length}, {replay.ticks} ticks")
+        else:
+            failures += 1
+            print(f"MISMATCH  {path}: claimed score {replay.score} length {replay.length} "
+                  f"ticks {replay.ticks}, got score {engine.score} length {engine.length} ticks {engine.ticks}")
+    print(f"{len(args.replays) - failures}/{len(args.replays)} replays verified")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Suspend a game to a file and resume it later exactly where it stopped.
+
+A save state is an engine snapshot (SnakeEngine.snapshot) plus what the
+window keeps outside the engine: the direction queued for the next move,
+the time already owed towards that move and the inputs recorded so far, so
+that a resumed game still ends with a replay that verifies from its seed.
+"""
+import os
+import struct
+
+from replay import Replay, ReplayError
+from snake_engine import SnakeEngine, SnapshotError, DIRECTION_CODES, DIRECTIONS_BY_CODE
+
+MAGIC = b"QSSV"
+VERSION = 2
+# magic, version, queued direction code, flags, timestep accumulator, engine snapshot
+# size; the snapshot follows, then the replay recorded so far
+HEADER = struct.Struct("<4sBBBdI")
+# Version 1 had no flags byte
+HEADER_V1 = struct.Struct("<4sBBdI")
+FLAG_AUTOPILOT = 1
+
+
+class SaveState:
+    def __init__(self, engine, direction, accumulator=0.0, replay=None, autopilot=False):
+        self.engine = engine
+        self.direction = direction
+        self.accumulator = accumulator
+        # Whether the autopilot was playing, so it takes over again on resume
+        self.autopilot = autopilot
+        self.replay = replay if replay is not None else Replay(engine.seed, engine.speed,
+                                                                engine.width, engine.height)
+
+    def to_bytes(self):
+        snapshot = self.engine.snapshot()
+        flags = FLAG_AUTOPILOT if self.autopilot else 0
+        return b"".join((HEADER.pack(MAGIC, VERSION, DIRECTION_CODES[self.direction], flags, self.accumulator,
+                                     len(snapshot)),
+                         snapshot, self.replay.to_bytes()))
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < HEADER_V1.size:
+            raise SnapshotError("save state is truncated")
+        if bytes(data[:4]) != MAGIC:
+            raise SnapshotError("not a Q_SNAKE save state")
+        version = data[4]
+        if version == 1:
+            header, flags = HEADER_V1, 0
+            _, _, direction, accumulator, size = header.unpack_from(data)
+        elif version == VERSION:
+            header = HEADER
+            if len(data) < header.size:
+                raise SnapshotError("save state is truncated")
+            _, _, direction, flags, accumulator, size = header.unpack_from(data)
+        else:
+            raise SnapshotError(f"unsupported save state version {version}")
+        if direction not in DIRECTIONS_BY_CODE:
+            raise SnapshotError("save state is corrupt")
+        view = memoryview(data)
+        engine = SnakeEngine.from_snapshot(view[header.size:header.size + size])
+        try:
+            replay = Replay.from_bytes(bytes(view[header.size + size:]))
+        except ReplayError as e:
+            raise SnapshotError(f"save state inputs: {e}") from None
+        return cls(engine, DIRECTIONS_BY_CODE[direction], accumulator, replay, bool(flags & FLAG_AUTOPILOT))
+
+    def save(self, path):
+        # Written next to the target and renamed over it, so a crash never leaves half a file
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
@@ -0,0 +1,441 @@
+import random
+import struct
+from array import array
+from collections import namedtuple
+
+import numpy as np
+
+# Board layout shared by the window and the headless engine
+SCREEN_WIDTH = 1024
+SCREEN_HEIGHT = 768
+GRID_SIZE = 35
+GRID_WIDTH = SCREEN_WIDTH // GRID_SIZE
+GRID_HEIGHT = (SCREEN_HEIGHT - 150) // GRID_SIZE
+
+# Game rules
+FOOD_POINTS = 10
+BONUS_POINTS = 50
+BONUS_LIFETIME = 8
+FIRST_BONUS_DELAY = (10, 20)
+NEXT_BONUS_DELAY = (15, 25)
+
+UP = (0, 1)
+DOWN = (0, -1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+
+# Direction byte stored per body segment; the heading angle is code * 90 degrees
+DIRECTION_CODES = {RIGHT: 0, UP: 1, LEFT: 2, DOWN: 3}
+DIRECTIONS_BY_CODE = {code: direction for direction, code in DIRECTION_CODES.items()}
+
+SNAPSHOT_MAGIC = b"QSST"
+SNAPSHOT_VERSION = 1
+# magic, version, speed, seed, width, height, direction code, alive, death cause,
+# ticks, score, clock, bonus spawn time, food, bonus food and vacated tail
+# (x, y pairs, -1 when absent), body length, free cell count, pending Gaussian
+# flag and value. Then the RNG words (uint32), body x, y pairs (int16),
+# direction codes (uint8) and free cells in spawn order (int32).
+SNAPSHOT_HEADER = struct.Struct("<4sBHQHHBBBIIdd6hIIBd")
+RNG_WORDS = 625
+DEATH_CAUSES = (None, "wall", "self")
+
+TickResult = namedtuple("TickResult", [
+    "alive",          # False once the snake has hit a wall or itself
+    "death_cause",    # None, "wall" or "self"
+    "ate_food",       # Cell of the regular food eaten this tick, else None
+    "ate_bonus",      # Cell of the bonus food eaten this tick, else None
+    "bonus_spawned",  # Cell of a bonus food that appeared this tick, else None
+    "bonus_expired",  # True if the bonus food timed out this tick
+    "score",
+    "length",
+])
+
+
+class SnakeBody:
+    """Snake segments in a ring buffer of int16 (x, y) pairs plus a direction byte.
+
+    Every slot is written twice, at i and i + capacity, so the live segments
+    are always one contiguous run and view() can hand out a zero-copy NumPy
+    array in head-to-tail order. The head moves towards lower indices.
+    """
+
+    def __init__(self, capacity=16):
+        self._allocate(capacity)
+        self._head = 0
+        self._len = 0
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self._xy = array("h", bytes(8 * capacity))
+        self._dirs = bytearray(2 * capacity)
+        self._xy_view = np.frombuffer(self._xy, dtype=np.int16).reshape(-1, 2)
+        self._dir_view = np.frombuffer(self._dirs, dtype=np.uint8)
+
+    def _grow(self):
+        xy = self._xy_view[self._head:self._head + self._len].copy()
+        dirs = self._dir_view[self._head:self._head + self._len].copy()
+        self._allocate(self.capacity * 2)
+        self._head = 0
+        self._xy_view[:self._len] = xy
+        self._xy_view[self.capacity:self.capacity + self._len] = xy
+        self._dir_view[:self._len] = dirs
+        self._dir_view[self.capacity:self.capacity + self._len] = dirs
+
+    def _write(self, slot, x, y, code):
+        mirror = slot + self.capacity
+        xy = self._xy
+        xy[2 * slot] = xy[2 * mirror] = x
+        xy[2 * slot + 1] = xy[2 * mirror + 1] = y
+        self._dirs[slot] = self._dirs[mirror] = code
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return iter(map(tuple, self.view().tolist()))
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("snake body index out of range")
+        slot = 2 * (self._head + index)
+        return (self._xy[slot], self._xy[slot + 1])
+
+    def clear(self):
+        self._head = 0
+        self._len = 0
+
+    def load(self, xy, dirs):
+        # Replace the body with (length, 2) positions and direction codes, head first
+        length = len(xy)
+        capacity = 16
+        while capacity < length:
+            capacity *= 2
+        self._allocate(capacity)
+        self._head = 0
+        self._len = length
+        self._xy_view[:length] = self._xy_view[capacity:capacity + length] = xy
+        self._dir_view[:length] = self._dir_view[capacity:capacity + length] = dirs
+
+    def push_head(self, pos, code):
+        if self._len == self.capacity:
+            self._grow()
+        self._head = (self._head - 1) % self.capacity
+        self._write(self._head, pos[0], pos[1], code)
+        self._len += 1
+
+    def push_tail(self, pos, code):
+        if self._len == self.capacity:
+            self._grow()
+        self._write((self._head + self._len) % self.capacity, pos[0], pos[1], code)
+        self._len += 1
+
+    def pop_tail(self):
+        self._len -= 1
+        slot = 2 * (self._head + self._len)
+        return (self._xy[slot], self._xy[slot + 1])
+
+    def tail_direction(self):
+        return self._dirs[self._head + self._len - 1]
+
+    def view(self):
+        # Zero-copy (length, 2) int16 array, head first; valid until the next push
+        return self._xy_view[self._head:self._head + self._len]
+
+    def directions(self):
+        # Zero-copy uint8 direction codes matching view()
+        return self._dir_view[self._head:self._head + self._len]
+
+
+class FreeCells:
+    """Set of cell indices with O(1) add, discard and uniform random choice.
+
+    Cells live in a dense array; a removed cell is swapped with the last one
+    so the array never has holes. slots maps a cell to its array position,
+    or -1 when the cell is not in the set.
+    """
+
+    def __init__(self, size, cells=()):
+        self.cells = list(cells)
+        slots = np.full(size, -1, dtype=np.int64)
+        slots[self.cells] = np.arange(len(self.cells))
+        self.slots = slots.tolist()
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return self.slots[cell] >= 0
+
+    def add(self, cell):
+        if self.slots[cell] < 0:
+            self.slots[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell):
+        slot = self.slots[cell]
+        if slot >= 0:
+            last = self.cells.pop()
+            if last != cell:
+                self.cells[slot] = last
+                self.slots[last] = slot
+            self.slots[cell] = -1
+
+    def choice(self, rng):
+        if not self.cells:
+            return None
+        return self.cells[rng.randrange(len(self.cells))]
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _pack_cell(pos):
+    return pos if pos is not None else (-1, -1)
+
+
+def _unpack_cell(x, y):
+    return (x, y) if x >= 0 else None
+
+
+class SnakeEngine:
+    """Game rules without any window: one call to step() is one snake move.
+
+    Time only advances through step(), by tick_seconds (1 / speed) per call,
+    so a run is fully determined by the seed and the directions passed in.
+    """
+
+    def __init__(self, speed=8, seed=None, width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.speed = speed
+        self.tick_seconds = 1.0 / speed
+        self.width = width
+        self.height = height
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+
+        # Head first. occupancy holds how many segments sit on each cell so
+        # collision checks never scan the body.
+        self.segments = SnakeBody()
+        self.occupancy = bytearray(width * height)
+        # Food spawn cells holding neither a segment nor a food item, row by row
+        xs = np.arange(2, width - 2)
+        ys = np.arange(2, height - 2)
+        self.free_cells = FreeCells(width * height, (ys[:, None] * width + xs).ravel().tolist())
+        self.food_pos = None
+        self.bonus_food = None
+        self.direction = RIGHT
+        self._push_head((width // 2, height // 2))
+        self.score = 0
+        self.alive = True
+        self.death_cause = None
+        self.ticks = 0
+        # Cell the tail left on the last tick (None if the snake grew), for interpolation
+        self.vacated_tail = None
+
+        self.clock = 0.0
+        self.food_pos = self.spawn_food()
+        self.bonus_spawn_time = self.rng.uniform(*FIRST_BONUS_DELAY)
+
+    @property
+    def length(self):
+        return len(self.segments)
+
+    def in_bounds(self, pos):
+        # The outermost ring of cells is covered by the frame
+        return 1 <= pos[0] < self.width - 1 and 1 <= pos[1] <= self.height - 2
+
+    def is_occupied(self, pos):
+        return self.occupancy[pos[1] * self.width + pos[0]] > 0
+
+    def reset_body(self, cells, direction):
+        # Replace the body with cells given head first, e.g. to set up a test position
+        while len(self.segments):
+            self._pop_tail()
+        self.direction = direction
+        for pos in reversed(cells):
+            self._push_head(pos)
+        if self.food_pos and self.is_occupied(self.food_pos):
+            self.food_pos = self.spawn_food()
+        if self.bonus_food and self.is_occupied(self.bonus_food):
+            self.bonus_food = self.spawn_bonus()
+
+    def snapshot(self):
+        # The whole game state as bytes; from_snapshot() continues exactly from here
+        _, words, gauss = self.rng.getstate()
+        body = self.segments.view()
+        header = SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self.speed, self.seed, self.width, self.height,
+            DIRECTION_CODES[self.direction], self.alive, DEATH_CAUSES.index(self.death_cause),
+            self.ticks, self.score, self.clock, self.bonus_spawn_time,
+            *_pack_cell(self.food_pos), *_pack_cell(self.bonus_food), *_pack_cell(self.vacated_tail),
+            len(body), len(self.free_cells), gauss is not None, gauss or 0.0)
+        return b"".join((header, array("I", words).tobytes(), body.tobytes(),
+                         self.segments.directions().tobytes(), array("i", self.free_cells.cells).tobytes()))
+
+    @classmethod
+    def from_snapshot(cls, data):
+        if len(data) < SNAPSHOT_HEADER.size:
+            raise SnapshotError("snapshot is truncated")
+        (magic, version, speed, seed, width, height, direction, alive, death_cause, ticks, score,
+         clock, bonus_spawn_time, food_x, food_y, bonus_x, bonus_y, tail_x, tail_y,
+         length, free, has_gauss, gauss) = SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError("not a Q_SNAKE snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError(f"unsupported snapshot version {version}")
+        offset = SNAPSHOT_HEADER.size
+        if len(data) != offset + 4 * RNG_WORDS + 5 * length + 4 * free:
+            raise SnapshotError("snapshot size does not match its header")
+        if direction not in DIRECTIONS_BY_CODE or death_cause >= len(DEATH_CAUSES):
+            raise SnapshotError("snapshot is corrupt")
+
+        # Arrays are read in place from data; only the body is copied, into its ring buffer
+        words = np.frombuffer(data, "<u4", RNG_WORDS, offset)
+        offset += 4 * RNG_WORDS
+        xy = np.frombuffer(data, "<i2", 2 * length, offset).reshape(-1, 2)
+        offset += 4 * length
+        dirs = np.frombuffer(data, np.uint8, length, offset)
+        offset += length
+        free_cells = np.frombuffer(data, "<i4", free, offset)
+
+        engine = cls.__new__(cls)
+        engine.speed = speed
+        engine.tick_seconds = 1.0 / speed
+        engine.width = width
+        engine.height = height
+        engine.seed = seed
+        engine.rng = random.Random()
+        try:
+            engine.rng.setstate((3, tuple(words.tolist()), gauss if has_gauss else None))
+        except (ValueError, TypeError):
+            raise SnapshotError("snapshot RNG state is corrupt") from None
+        engine.segments = SnakeBody()
+        engine.segments.load(xy, dirs)
+        cells = xy[:, 1].astype(np.int64) * width + xy[:, 0]
+        engine.occupancy = bytearray(np.bincount(cells, minlength=width * height).astype(np.uint8))
+        engine.free_cells = FreeCells(width * height, free_cells.tolist())
+        engine.food_pos = _unpack_cell(food_x, food_y)
+        engine.bonus_food = _unpack_cell(bonus_x, bonus_y)
+        engine.direction = DIRECTIONS_BY_CODE[direction]
+        engine.score = score
+        engine.alive = bool(alive)
+        engine.death_cause = DEATH_CAUSES[death_cause]
+        engine.ticks = ticks
+        engine.vacated_tail = _unpack_cell(tail_x, tail_y)
+        engine.clock = clock
+        engine.bonus_spawn_time = bonus_spawn_time
+        return engine
+
+    def _push_head(self, pos):
+        self.segments.push_head(pos, DIRECTION_CODES[self.direction])
+        cell = pos[1] * self.width + pos[0]
+        self.occupancy[cell] += 1
+        self.free_cells.discard(cell)
+
+    def _push_tail(self, pos):
+        self.segments.push_tail(pos, self.segments.tail_direction())
+        self.occupancy[pos[1] * self.width + pos[0]] += 1
+
+    def _pop_tail(self):
+        pos = self.segments.pop_tail()
+        cell = pos[1] * self.width + pos[0]
+        self.occupancy[cell] -= 1
+        if not self.occupancy[cell]:
+            self._release(pos)
+        return pos
+
+    def _release(self, pos):
+        # Hand a cell back to the spawner once nothing is on it
+        x, y = pos
+        if (2 <= x < self.width - 2 and 2 <= y < self.height - 2
+                and not self.occupancy[y * self.width + x]
+                and pos != self.food_pos and pos != self.bonus_food):
+            self.free_cells.add(y * self.width + x)
+
+    def _take_free_cell(self):
+        # Uniform over all empty spawn cells; None once the board is full
+        cell = self.free_cells.choice(self.rng)
+        if cell is None:
+            return None
+        self.free_cells.discard(cell)
+        return (cell % self.width, cell // self.width)
+
+    def spawn_food(self):
+        return self._take_free_cell()
+
+    def spawn_bonus(self):
+        return self._take_free_cell()
+
+    def bonus_time_left(self):
+        if not self.bonus_food:
+            return 0.0
+        return max(0.0, BONUS_LIFETIME - (self.clock - self.bonus_spawn_time))
+
+    def step(self, direction=None):
+        if not self.alive:
+            return self._result(None, None, None, False)
+
+        # Prevent 180-degree turns
+        if direction is not None and (-direction[0], -direction[1]) != self.direction:
+            self.direction = direction
+
+        self.ticks += 1
+        self.clock += self.tick_seconds
+        self.vacated_tail = None
+        bonus_spawned = None
+        bonus_expired = False
+
+        # Retry food that could not be placed on a full board
+        if self.food_pos is None:
+            self.food_pos = self.spawn_food()
+
+        # Spawn bonus food
+        if not self.bonus_food and self.clock >= self.bonus_spawn_time:
+            self.bonus_food = self.spawn_bonus()
+            bonus_spawned = self.bonus_food
+
+        # Remove bonus food after its lifetime
+        if self.bonus_food and self.clock >= self.bonus_spawn_time + BONUS_LIFETIME:
+            expired, self.bonus_food = self.bonus_food, None
+            self._release(expired)
+            self.bonus_spawn_time = self.clock + self.rng.uniform(*NEXT_BONUS_DELAY)
+            bonus_expired = True
+
+        head = self.segments[0]
+        new_head = (head[0] + self.direction[0], head[1] + self.direction[1])
+
+        if not self.in_bounds(new_head):
+            self.alive = False
+            self.death_cause = "wall"
+        elif self.is_occupied(new_head):
+            self.alive = False
+            self.death_cause = "self"
+        if not self.alive:
+            return self._result(None, None, bonus_spawned, bonus_expired)
+
+        self._push_head(new_head)
+        ate_food = None
+        ate_bonus = None
+
+        if new_head == self.food_pos:
+            # Keep the tail: the snake grows by one
+            ate_food = new_head
+            self.score += FOOD_POINTS
+            self.food_pos = self.spawn_food()
+        elif self.bonus_food and new_head == self.bonus_food:
+            # Keep the tail and double it up: the snake grows by two
+            ate_bonus = new_head
+            self._push_tail(self.segments[-1])
+            self.score += BONUS_POINTS
+            self.bonus_food = None
+            self.bonus_spawn_time = self.clock + self.rng.uniform(*NEXT_BONUS_DELAY)
+        else:
+            self.vacated_tail = self._pop_tail()
+
+        return self._result(ate_food, ate_bonus, bonus_spawned, bonus_expired)
+
+    def _result(self, ate_food, ate_bonus, bonus_spawned, bonus_expired):
+        return TickResult(self.alive, self.death_cause, ate_food, ate_bonus,
+                          bonus_spawned, bonus_expired, self.score, len(self.segments))
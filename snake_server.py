@@ -0,0 +1,555 @@
+"""Authoritative multiplayer server for the arena, plus its client side.
+
+The server runs an ArenaEngine at a fixed tick rate under asyncio. Every
+player connection gets a snake slot, sends direction inputs and receives
+the game as length-prefixed binary frames: a keyframe with the full state
+when it joins, then one delta per tick holding only what changed (which way
+each snake moved and whether it kept its tail, deaths, spawns and new
+food). Eating and corpses are worked out by the client from the same rules.
+A tick's delta is encoded once and the same bytes are written to every
+socket; a client that cannot keep up stops getting deltas and is sent a
+fresh keyframe once its buffer has drained.
+
+    python snake_server.py serve --port 7777 --bots 10
+    python Snake_game.py --connect localhost:7777
+    python snake_server.py swarm --port 7777 --clients 300 --duration 20
+
+Frames are a little-endian u32 payload length followed by the payload,
+whose first byte is the message type. Cells are y * width + x.
+"""
+import argparse
+import asyncio
+import queue
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from arena import ArenaEngine, ArenaSnake, GreedyBot, bot_directions, CORPSE_POINTS
+from autopilot import parse_board
+from snake_engine import DIRECTION_CODES, FreeCells, FOOD_POINTS
+
+PROTOCOL_VERSION = 1
+DEFAULT_PORT = 7777
+
+FRAME = struct.Struct("<I")
+# Server to client
+MSG_WELCOME = 1
+MSG_KEYFRAME = 2
+MSG_DELTA = 3
+# Client to server
+MSG_INPUT = 16
+MSG_RESPAWN = 17
+
+# type, protocol version, player slot, width, height, speed, snake count, seed
+WELCOME = struct.Struct("<BBHHHHHQ")
+# type, tick, food items, live snakes
+KEYFRAME = struct.Struct("<BIII")
+KEYFRAME_FOOD = struct.Struct("<IB")
+# index, direction code, score, head cell, length; then one direction code per segment
+KEYFRAME_SNAKE = struct.Struct("<HBIII")
+# type, tick, server send time, event count
+DELTA = struct.Struct("<BIdI")
+
+# Delta events, each starting with its kind byte
+EV_MOVE = 1    # snake, direction code | GREW
+EV_DEATH = 2   # snake, cause code
+EV_SPAWN = 3   # snake, cell, direction code
+EV_FOOD = 4    # cell, points
+MOVE_EVENT = struct.Struct("<BHB")
+DEATH_EVENT = struct.Struct("<BHB")
+SPAWN_EVENT = struct.Struct("<BHIB")
+FOOD_EVENT = struct.Struct("<BIB")
+GREW = 0x80
+
+CAUSES = ("wall", "self", "snake", "head-on", "left")
+CAUSE_CODES = {cause: code for code, cause in enumerate(CAUSES)}
+DIRECTIONS = {code: direction for direction, code in DIRECTION_CODES.items()}
+
+# A client with this much unsent data is skipped until it catches up
+MAX_BUFFER = 256 * 1024
+MAX_QUEUED_INPUTS = 3
+# Client messages are a byte or two; anything longer is not a client speaking the protocol
+MAX_CLIENT_FRAME = 64
+
+
+def frame(payload):
+    return FRAME.pack(len(payload)) + payload
+
+
+def encode_keyframe(engine):
+    width = engine.width
+    food = engine.food_cells.cells
+    live = [snake for snake in engine.snakes if snake.alive]
+    out = bytearray(KEYFRAME.pack(MSG_KEYFRAME, engine.ticks, len(food), len(live)))
+    for cell in food:
+        out += KEYFRAME_FOOD.pack(cell, engine.food[cell])
+    for snake in live:
+        x, y = snake.segments[0]
+        out += KEYFRAME_SNAKE.pack(snake.index, DIRECTION_CODES[snake.direction], snake.score,
+                                   y * width + x, snake.length)
+        # Each segment's code is the move that brought it there, so the body
+        # can be walked back from the head
+        out += snake.segments.directions().tobytes()
+    return frame(out)
+
+
+class ArenaMirror:
+    """Client-side copy of an arena, kept in step by keyframes and deltas.
+
+    It has the attributes ArenaView draws from (snakes, food, food_cells,
+    food_version, width, height, seed, tick_seconds), so the view cannot
+    tell it from a local ArenaEngine.
+    """
+
+    def __init__(self, welcome):
+        _, version, self.player, self.width, self.height, self.speed, count, self.seed = \
+            WELCOME.unpack_from(welcome)
+        if version != PROTOCOL_VERSION:
+            raise ValueError(f"server speaks protocol {version}, this client {PROTOCOL_VERSION}")
+        self.tick_seconds = 1.0 / self.speed
+        self.ticks = 0
+        self.latency = 0.0
+        self.snakes = [ArenaSnake(i, human=i == self.player) for i in range(count)]
+        self.food = bytearray(self.width * self.height)
+        self.food_cells = FreeCells(self.width * self.height)
+        self.food_version = 0
+
+    def apply(self, payload):
+        # Returns the (snake index, cell, points) items eaten, like ArenaTickResult.eaten
+        if payload[0] == MSG_DELTA:
+            return self.apply_delta(payload)
+        if payload[0] == MSG_KEYFRAME:
+            self.load_keyframe(payload)
+        return []
+
+    def load_keyframe(self, payload):
+        self.ticks, food_count, live = KEYFRAME.unpack_from(payload)[1:]
+        for cell in list(self.food_cells.cells):
+            self._remove_food(cell)
+        for snake in self.snakes:
+            snake.segments.clear()
+            snake.alive = False
+        offset = KEYFRAME.size
+        for _ in range(food_count):
+            cell, points = KEYFRAME_FOOD.unpack_from(payload, offset)
+            offset += KEYFRAME_FOOD.size
+            self._add_food(cell, points)
+        for _ in range(live):
+            index, code, score, cell, length = KEYFRAME_SNAKE.unpack_from(payload, offset)
+            offset += KEYFRAME_SNAKE.size
+            codes = payload[offset:offset + length]
+            offset += length
+            snake = self.snakes[index]
+            snake.direction = DIRECTIONS[code]
+            snake.score = score
+            snake.alive = True
+            snake.vacated_tail = None
+            snake.ticks += 1
+            x, y = cell % self.width, cell // self.width
+            for code in codes:
+                snake.segments.push_tail((x, y), code)
+                dx, dy = DIRECTIONS[code]
+                x, y = x - dx, y - dy
+
+    def apply_delta(self, payload):
+        _, self.ticks, sent_at, count = DELTA.unpack_from(payload)
+        self.latency = time.time() - sent_at
+        eaten = []
+        offset = DELTA.size
+        width = self.width
+        for _ in range(count):
+            kind = payload[offset]
+            if kind == EV_MOVE:
+                _, index, code = MOVE_EVENT.unpack_from(payload, offset)
+                offset += MOVE_EVENT.size
+                snake = self.snakes[index]
+                snake.direction = dx, dy = DIRECTIONS[code & 3]
+                x, y = snake.segments[0]
+                pos = (x + dx, y + dy)
+                snake.segments.push_head(pos, code & 3)
+                snake.ticks += 1
+                cell = pos[1] * width + pos[0]
+                points = self.food[cell]
+                if points:
+                    self._remove_food(cell)
+                    snake.score += points
+                    eaten.append((index, pos, points))
+                if code & GREW:
+                    snake.vacated_tail = None
+                else:
+                    snake.vacated_tail = snake.segments.pop_tail()
+            elif kind == EV_DEATH:
+                _, index, cause = DEATH_EVENT.unpack_from(payload, offset)
+                offset += DEATH_EVENT.size
+                snake = self.snakes[index]
+                snake.alive = False
+                snake.death_cause = CAUSES[cause]
+                snake.deaths += 1
+                for x, y in snake.segments.view().tolist():
+                    if not self.food[y * width + x]:
+                        self._add_food(y * width + x, CORPSE_POINTS)
+                snake.segments.clear()
+            elif kind == EV_SPAWN:
+                _, index, cell, code = SPAWN_EVENT.unpack_from(payload, offset)
+                offset += SPAWN_EVENT.size
+                snake = self.snakes[index]
+                snake.segments.clear()
+                snake.segments.push_head((cell % width, cell // width), code)
+                snake.direction = DIRECTIONS[code]
+                snake.alive = True
+                snake.death_cause = None
+                snake.score = 0
+                snake.vacated_tail = None
+                snake.ticks += 1
+            elif kind == EV_FOOD:
+                _, cell, points = FOOD_EVENT.unpack_from(payload, offset)
+                offset += FOOD_EVENT.size
+                self._add_food(cell, points)
+            else:
+                raise ValueError(f"unknown delta event {kind}")
+        return eaten
+
+    def _add_food(self, cell, points):
+        self.food[cell] = points
+        self.food_cells.add(cell)
+        self.food_version += 1
+
+    def _remove_food(self, cell):
+        self.food[cell] = 0
+        self.food_cells.discard(cell)
+        self.food_version += 1
+
+
+class Session:
+    def __init__(self, slot, writer):
+        self.slot = slot
+        self.writer = writer
+        self.inputs = deque(maxlen=MAX_QUEUED_INPUTS)
+        self.respawn = False
+        self.lagging = False
+
+
+class GameServer:
+    def __init__(self, engine, bots, slots):
+        self.engine = engine
+        self.bots = bots
+        self.free_slots = list(range(slots - 1, -1, -1))
+        self.sessions = []
+        self.joining = []
+        self.leaving = []
+        self.tick_times = deque(maxlen=1000)
+        self.delta_bytes = deque(maxlen=1000)
+
+    async def handle(self, reader, writer):
+        if not self.free_slots:
+            writer.close()
+            return
+        session = Session(self.free_slots.pop(), writer)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Snakes only change inside tick(), so joining waits for the next one
+        self.joining.append(session)
+        try:
+            while True:
+                length, = FRAME.unpack(await reader.readexactly(FRAME.size))
+                if not 0 < length <= MAX_CLIENT_FRAME:
+                    # Dropped before reading, so a bad length cannot make us buffer it
+                    break
+                payload = await reader.readexactly(length)
+                if payload[0] == MSG_INPUT and length >= 2:
+                    session.inputs.append(DIRECTIONS[payload[1] & 3])
+                elif payload[0] == MSG_RESPAWN:
+                    session.respawn = True
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.leaving.append(session)
+            writer.close()
+
+    async def run(self, stats_interval=0):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        next_report = next_tick + stats_interval
+        while True:
+            next_tick += self.engine.tick_seconds
+            delay = next_tick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif delay < -self.engine.tick_seconds:
+                # Too far behind to catch up: skip the missed ticks
+                next_tick = loop.time()
+            started = time.perf_counter()
+            self.tick()
+            self.tick_times.append(time.perf_counter() - started)
+            if stats_interval and loop.time() >= next_report:
+                next_report += stats_interval
+                print(self.report(), flush=True)
+
+    def tick(self):
+        engine = self.engine
+        events = bytearray()
+        count = 0
+
+        # Leaves, joins and respawn requests that arrived since the last tick
+        for session in self.leaving:
+            snake = engine.snakes[session.slot]
+            if snake.alive:
+                events += DEATH_EVENT.pack(EV_DEATH, snake.index, CAUSE_CODES["left"])
+                count += 1
+            engine.retire(snake)
+            if session in self.sessions:
+                self.sessions.remove(session)
+            if session in self.joining:
+                self.joining.remove(session)
+            self.free_slots.append(session.slot)
+        self.leaving.clear()
+        for session in self.joining + self.sessions:
+            snake = engine.snakes[session.slot]
+            if (session in self.joining or session.respawn) and not snake.alive and engine.spawn_snake(snake):
+                x, y = snake.segments[0]
+                events += SPAWN_EVENT.pack(EV_SPAWN, snake.index, y * engine.width + x,
+                                           DIRECTION_CODES[snake.direction])
+                count += 1
+            session.respawn = False
+
+        directions = [None] * len(engine.snakes)
+        for session in self.sessions:
+            if session.inputs:
+                directions[session.slot] = session.inputs.popleft()
+        result = engine.step(bot_directions(engine, self.bots, directions))
+
+        # Same order as the engine applied them: moves, deaths, respawns, food
+        snakes = engine.snakes
+        for index, grew in result.moves:
+            code = DIRECTION_CODES[snakes[index].direction]
+            events += MOVE_EVENT.pack(EV_MOVE, index, code | GREW if grew else code)
+        for index, cause in result.deaths:
+            events += DEATH_EVENT.pack(EV_DEATH, index, CAUSE_CODES[cause])
+        for index in result.spawns:
+            x, y = snakes[index].segments[0]
+            events += SPAWN_EVENT.pack(EV_SPAWN, index, y * engine.width + x,
+                                       DIRECTION_CODES[snakes[index].direction])
+        for cell in result.food_added:
+            events += FOOD_EVENT.pack(EV_FOOD, cell, FOOD_POINTS)
+        count += len(result.moves) + len(result.deaths) + len(result.spawns) + len(result.food_added)
+
+        delta = frame(DELTA.pack(MSG_DELTA, engine.ticks, time.time(), count) + events)
+        self.delta_bytes.append(len(delta))
+        self.broadcast(delta)
+
+    def broadcast(self, delta):
+        # One encoded delta for everybody; a keyframe only if someone needs one
+        keyframe = None
+        for session in self.sessions:
+            transport = session.writer.transport
+            if transport.is_closing():
+                continue
+            buffered = transport.get_write_buffer_size()
+            if session.lagging:
+                if buffered > MAX_BUFFER // 4:
+                    continue
+                keyframe = keyframe or encode_keyframe(self.engine)
+                session.writer.write(keyframe)
+                session.lagging = False
+            elif buffered > MAX_BUFFER:
+                session.lagging = True
+            else:
+                session.writer.write(delta)
+        if self.joining:
+            keyframe = keyframe or encode_keyframe(self.engine)
+            engine = self.engine
+            for session in self.joining:
+                session.writer.write(frame(WELCOME.pack(
+                    MSG_WELCOME, PROTOCOL_VERSION, session.slot, engine.width, engine.height,
+                    engine.speed, len(engine.snakes), engine.seed)))
+                session.writer.write(keyframe)
+                self.sessions.append(session)
+            self.joining.clear()
+
+    def report(self):
+        if not self.tick_times:
+            return "no ticks yet"
+        times = np.array(self.tick_times) * 1000
+        lagging = sum(session.lagging for session in self.sessions)
+        return (f"tick {self.engine.ticks}: {len(self.sessions)} clients ({lagging} lagging), "
+                f"{self.engine.alive_count} snakes alive; tick p50 {np.percentile(times, 50):.2f} ms, "
+                f"p99 {np.percentile(times, 99):.2f} ms; delta {int(np.mean(self.delta_bytes))} bytes")
+
+
+async def serve(args):
+    width, height = args.board
+    engine = ArenaEngine(args.bots + args.slots, humans=args.slots, speed=args.speed, seed=args.seed,
+                         width=width, height=height, food=args.food, respawn_ticks=3 * args.speed,
+                         spawn_humans=False)
+    bots = [GreedyBot(engine, snake) for snake in engine.snakes[args.slots:]]
+    server = GameServer(engine, bots, args.slots)
+    listener = await asyncio.start_server(server.handle, args.host, args.port)
+    print(f"Serving a {width}x{height} arena on {args.host}:{args.port} at {args.speed} ticks/s "
+          f"({args.slots} player slots, {args.bots} bots)", flush=True)
+    async with listener:
+        await server.run(args.stats_interval)
+
+
+class SnapshotClient:
+    """Blocking connection to a GameServer for a windowed client.
+
+    The welcome and first keyframe are read in the constructor; later frames
+    are read on a background thread and queued until the game loop polls
+    for them, so rendering never waits on the network.
+    """
+
+    def __init__(self, host, port=DEFAULT_PORT):
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.mirror = ArenaMirror(self._read_frame())
+        self.mirror.apply(self._read_frame())
+        self.frames = queue.SimpleQueue()
+        self.connected = True
+        self.thread = threading.Thread(target=self._read_loop, daemon=True)
+        self.thread.start()
+
+    def _read_exactly(self, size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("server closed the connection")
+            data += chunk
+        return bytes(data)
+
+    def _read_frame(self):
+        length, = FRAME.unpack(self._read_exactly(FRAME.size))
+        return self._read_exactly(length)
+
+    def _read_loop(self):
+        try:
+            while True:
+                self.frames.put(self._read_frame())
+        except OSError:
+            self.connected = False
+
+    def poll(self):
+        # Payloads received since the last call, oldest first
+        payloads = []
+        while not self.frames.empty():
+            payloads.append(self.frames.get())
+        return payloads
+
+    def send_direction(self, direction):
+        self._send(bytes((MSG_INPUT, DIRECTION_CODES[direction])))
+
+    def request_respawn(self):
+        self._send(bytes((MSG_RESPAWN,)))
+
+    def _send(self, payload):
+        try:
+            self.sock.sendall(frame(payload))
+        except OSError:
+            self.connected = False
+
+    def close(self):
+        self.sock.close()
+
+
+async def swarm_client(host, port, deadline, stats, rng, mirror):
+    # A stand-in player: turns at random, respawns when dead, times every delta
+    reader, writer = await asyncio.open_connection(host, port)
+
+    async def read_payload():
+        length, = FRAME.unpack(await reader.readexactly(FRAME.size))
+        return await reader.readexactly(length)
+
+    welcome = await read_payload()
+    slot = WELCOME.unpack_from(welcome)[2]
+    local = ArenaMirror(welcome) if mirror else None
+    deltas = 0
+    try:
+        while time.time() < deadline:
+            payload = await read_payload()
+            stats["bytes"] += len(payload) + FRAME.size
+            if local:
+                local.apply(payload)
+            if payload[0] != MSG_DELTA:
+                continue
+            deltas += 1
+            stats["latency"].append(time.time() - DELTA.unpack_from(payload)[2])
+            if rng.random() < 0.2:
+                code = rng.randrange(4)
+                writer.write(frame(bytes((MSG_INPUT, code))))
+            if local is None and deltas % 20 == 0 or local is not None and not local.snakes[slot].alive:
+                writer.write(frame(bytes((MSG_RESPAWN,))))
+    except (asyncio.IncompleteReadError, ConnectionError):
+        stats["dropped"] += 1
+    finally:
+        stats["deltas"].append(deltas)
+        writer.close()
+
+
+async def swarm(args):
+    deadline = time.time() + args.duration
+    stats = {"bytes": 0, "latency": [], "deltas": [], "dropped": 0}
+    rng = random.Random(args.seed)
+    clients = []
+    for i in range(args.clients):
+        clients.append(asyncio.create_task(swarm_client(
+            args.host, args.port, deadline, stats, random.Random(rng.random()), i < args.mirror)))
+        if args.ramp:
+            await asyncio.sleep(args.ramp / args.clients)
+    await asyncio.gather(*clients, return_exceptions=True)
+
+    latency = np.array(stats["latency"]) * 1000
+    deltas = np.array(stats["deltas"])
+    print(f"{args.clients} clients for {args.duration:.0f} s: {int(deltas.sum())} deltas "
+          f"(per client min {deltas.min()}, median {int(np.median(deltas))}), "
+          f"{stats['bytes'] / args.duration / 1024:.0f} KiB/s received, {stats['dropped']} dropped")
+    if len(latency):
+        print(f"delta latency p50 {np.percentile(latency, 50):.2f} ms, p99 {np.percentile(latency, 99):.2f} ms, "
+              f"max {latency.max():.2f} ms")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Q_SNAKE arena server and load tester")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    server = commands.add_parser("serve", help="host an arena")
+    server.add_argument("--host", default="127.0.0.1")
+    server.add_argument("--port", type=int, default=DEFAULT_PORT)
+    server.add_argument("--board", type=parse_board, default=(120, 80), metavar="WxH")
+    server.add_argument("--speed", type=int, default=8, help="ticks per second")
+    server.add_argument("--slots", type=int, default=512, help="most players at once")
+    server.add_argument("--bots", type=int, default=8)
+    server.add_argument("--food", type=int, default=64, help="regular food items kept on the board")
+    server.add_argument("--seed", type=int)
+    server.add_argument("--stats-interval", type=float, default=5.0, metavar="S",
+                        help="print server stats every S seconds (0 for never)")
+
+    load = commands.add_parser("swarm", help="connect many stand-in clients to a server")
+    load.add_argument("--host", default="127.0.0.1")
+    load.add_argument("--port", type=int, default=DEFAULT_PORT)
+    load.add_argument("--clients", type=int, default=200)
+    load.add_argument("--duration", type=float, default=10.0, help="seconds")
+    load.add_argument("--mirror", type=int, default=5,
+                      help="clients that also rebuild the full game state from the snapshots")
+    load.add_argument("--ramp", type=float, default=1.0, help="seconds over which to connect the clients")
+    load.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        asyncio.run(serve(args) if args.command == "serve" else swarm(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
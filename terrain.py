@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+
+# Noise is sampled every TERRAIN_STEP pixels; features are 1 / FREQUENCY pixels apart
+TERRAIN_STEP = 4
+FREQUENCY = 0.04
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".terrain_cache")
+# Distinct terrains a game seed maps onto, so the cache keeps getting hits
+TERRAIN_VARIANTS = 16
+# Most .npy files kept in the cache directory; the least recently used go first
+CACHE_FILES = 32
+
+_grids = {}
+
+
+def perlin_grid(width, height, seed, frequency=FREQUENCY, step=TERRAIN_STEP):
+    """2D gradient noise for a width x height pixel area, sampled every `step` pixels.
+
+    Returns a float32 array indexed [y // step, x // step] with values in
+    roughly [-0.7, 0.7], evaluated for the whole grid at once.
+    """
+    xs = np.arange(0, width, step, dtype=np.float64) * frequency
+    ys = np.arange(0, height, step, dtype=np.float64) * frequency
+    rng = np.random.default_rng(seed)
+    angles = rng.uniform(0, 2 * np.pi, (int(ys[-1]) + 2, int(xs[-1]) + 2))
+    gx, gy = np.cos(angles), np.sin(angles)
+
+    x0 = xs.astype(np.int64)[None, :]
+    y0 = ys.astype(np.int64)[:, None]
+    fx = (xs - np.floor(xs))[None, :]
+    fy = (ys - np.floor(ys))[:, None]
+
+    def corner(dx, dy):
+        # Dot product of each corner's gradient with the offset to the sample
+        return gx[y0 + dy, x0 + dx] * (fx - dx) + gy[y0 + dy, x0 + dx] * (fy - dy)
+
+    u = fx * fx * fx * (fx * (fx * 6 - 15) + 10)
+    v = fy * fy * fy * (fy * (fy * 6 - 15) + 10)
+    bottom = corner(0, 0) + u * (corner(1, 0) - corner(0, 0))
+    top = corner(0, 1) + u * (corner(1, 1) - corner(0, 1))
+    return (bottom + v * (top - bottom)).astype(np.float32)
+
+
+def noise_field(seed, width, height, cache_dir=CACHE_DIR):
+    """Terrain noise for a board, memory-mapped from an on-disk .npy cache.
+
+    The first call for a (seed, width, height) computes the grid and saves
+    it; later calls in the same process reuse it and later runs only map
+    the file. Callers pass one of a few terrain seeds (see TERRAIN_VARIANTS)
+    rather than a game seed. The directory holds at most CACHE_FILES grids.
+    If it is not writable the grid is simply kept in memory.
+    """
+    key = (seed, width, height, cache_dir)
+    if key not in _grids:
+        _grids[key] = _load_or_build(seed, width, height, cache_dir)
+    return _grids[key]
+
+
+def _load_or_build(seed, width, height, cache_dir):
+    path = os.path.join(cache_dir, f"terrain_{seed}_{width}x{height}_{TERRAIN_STEP}.npy")
+    try:
+        grid = np.load(path, mmap_mode="r")
+        os.utime(path)  # Marks it as recently used for eviction
+        return grid
+    except (OSError, ValueError):
+        pass
+    grid = perlin_grid(width, height, seed)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, grid)
+        os.replace(tmp_path, path)
+        _evict(cache_dir)
+        return np.load(path, mmap_mode="r")
+    except OSError:
+        return grid
+
+
+def _evict(cache_dir, keep=CACHE_FILES):
+    paths = [entry.path for entry in os.scandir(cache_dir)
+             if entry.name.startswith("terrain_") and entry.name.endswith(".npy")]
+    if len(paths) <= keep:
+        return
+    paths.sort(key=os.path.getmtime)
+    for path in paths[:-keep]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
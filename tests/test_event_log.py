@@ -0,0 +1,26 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_log import EventLog
+
+
+def test_a_bad_event_only_loses_itself(tmp_path):
+    path = tmp_path / "events.jsonl"
+    log = EventLog(str(path))
+    circular = []
+    circular.append(circular)
+    for i in range(100):
+        log.log("tick", n=i)
+        if i == 50:
+            log.log("odd", value=object())
+            log.log("broken", value=circular)
+    log.close()
+    events = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [e["n"] for e in events if e["event"] == "tick"] == list(range(100))
+    assert [e["event"] for e in events if e["event"] != "tick"] == ["odd"]
+    assert log.written == 101
+    assert isinstance(log.last_error, ValueError)
+    assert log._writer.is_alive() is False
@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from highscores import HighScoreStore
+
+
+@pytest.mark.parametrize("content", ["[]", "5", '{"high_score": "x"}', '{"leaderboards": []}', "{bad"])
+def test_malformed_file_starts_an_empty_table(tmp_path, content):
+    path = tmp_path / "highscore.json"
+    path.write_text(content)
+    store = HighScoreStore(str(path))
+    assert store.high_score == 0 and store.leaderboards == {}
+    assert store.last_error is not None
+    store.submit(10, 3, "NORMAL")
+    assert store.flush(2)
+    assert store.last_error is None
+    store.close()
+    assert json.loads(path.read_text())["high_score"] == 10
+
+
+def test_malformed_entries_are_dropped(tmp_path):
+    path = tmp_path / "highscore.json"
+    good = {"score": 20, "length": 4, "timestamp": 1.0}
+    path.write_text(json.dumps({"high_score": 20, "leaderboards": {
+        "NORMAL": [{"score": 5}, good, "x", {"score": True, "length": 1, "timestamp": 2}]}}))
+    store = HighScoreStore(str(path))
+    assert store.leaderboard("NORMAL") == [good]
+    assert isinstance(store.last_error, ValueError)
+    store.submit(30, 5, "NORMAL")  # Sorting must not trip over what was loaded
+    assert [e["score"] for e in store.leaderboard("NORMAL")] == [30, 20]
+    store.close()
+
+
+def test_close_reports_only_a_current_error(tmp_path, capsys):
+    path = tmp_path / "highscore.json"
+    path.write_text("[]")
+    store = HighScoreStore(str(path))
+    store.submit(10, 3, "NORMAL")
+    store.close()
+    assert capsys.readouterr().out == ""
+
+    store = HighScoreStore(str(tmp_path / "missing" / "highscore.json"))
+    store.submit(10, 3, "NORMAL")
+    store.close(timeout=0.2)
+    assert "not saved" in capsys.readouterr().out
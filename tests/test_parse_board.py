@@ -0,0 +1,30 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from autopilot import parse_board, MIN_BOARD, MAX_BOARD, MAX_CELLS
+
+
+@pytest.mark.parametrize("text, board", [("60x40", (60, 40)), ("5X6", (5, 6)), ("1000x1000", (1000, 1000)),
+                                         (f"{MAX_BOARD}x100", (MAX_BOARD, 100))])
+def test_accepts(text, board):
+    assert parse_board(text) == board
+
+
+@pytest.mark.parametrize("text", ["", "abc", "60", "60x40x2", "0x10", "-5x10", "4x40", "40x4", "5x5",
+                                  f"{MAX_BOARD + 1}x10", f"{MAX_BOARD}x{MAX_BOARD}", "2001x2000"])
+def test_rejects(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_board(text)
+
+
+@pytest.mark.parametrize("board", [(5, 6), (6, 5), (6, 6), (5, 40)])
+def test_smallest_boards_get_food(board):
+    from snake_engine import SnakeEngine
+    parse_board("%dx%d" % board)
+    for seed in range(20):
+        assert SnakeEngine(8, seed, *board).food_pos is not None
@@ -0,0 +1,77 @@
+import os
+import sys
+
+os.environ.setdefault("ARCADE_HEADLESS", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from highscores import HighScoreStore, set_high_score_store
+from savestate import SaveState, HEADER, HEADER_V1, MAGIC
+from snake_engine import SnakeEngine, UP, RIGHT
+
+
+def played_engine(ticks=30):
+    engine = SnakeEngine(16, seed=3)
+    for _ in range(ticks):
+        engine.step(None)
+    return engine
+
+
+def test_round_trip_keeps_the_autopilot():
+    engine = played_engine()
+    for autopilot in (False, True):
+        state = SaveState.from_bytes(SaveState(engine, RIGHT, 0.01, autopilot=autopilot).to_bytes())
+        assert state.autopilot is autopilot
+        assert state.direction == RIGHT
+        assert state.accumulator == 0.01
+        assert state.engine.snapshot() == engine.snapshot()
+
+
+def test_version_1_files_resume_without_the_autopilot():
+    engine = played_engine()
+    data = SaveState(engine, UP).to_bytes()
+    magic, _, direction, _, accumulator, size = HEADER.unpack_from(data)
+    old = HEADER_V1.pack(MAGIC, 1, direction, accumulator, size) + data[HEADER.size:]
+    state = SaveState.from_bytes(old)
+    assert not state.autopilot
+    assert state.engine.snapshot() == engine.snapshot()
+
+
+@pytest.fixture(scope="module")
+def window():
+    arcade = pytest.importorskip("arcade")
+    try:
+        window = arcade.Window(800, 600, "test", visible=False)
+    except Exception as e:  # No GL context on this machine
+        pytest.skip(f"no window: {e}")
+    window.replay_dir = None
+    window.event_log = None
+    yield window
+    window.close()
+
+
+def test_suspended_autopilot_game_resumes_under_the_autopilot(window, tmp_path):
+    import Snake_game as game
+
+    window.suspend_path = str(tmp_path / "suspend.qss")
+    view = game.GameView(8, seed=5, autopilot=True)
+    window.show_view(view)
+    for _ in range(40):
+        view.on_update(0.05)
+    view.on_deactivate()
+
+    resumed = game.GameView(0, save_state=SaveState.load(window.suspend_path))
+    assert resumed.autopilot is not None
+    assert resumed.engine.snapshot() == view.engine.snapshot()
+    window.show_view(resumed)
+    resumed.paused = False
+    for _ in range(400):
+        resumed.on_update(0.05)
+    # Left to itself the snake would have hit a wall long ago
+    assert resumed.engine.alive and resumed.engine.ticks > view.engine.ticks + 100
+
+    store = HighScoreStore(str(tmp_path / "highscore.json"))
+    set_high_score_store(store)
+    resumed.game_over()
+    assert store.leaderboards == {}
@@ -0,0 +1,215 @@
+"""Play many seeded headless games per bot policy across all CPU cores.
+
+Games run on SnakeEngine, so they follow exactly the rules of the real
+game. Seeds are handed to a ProcessPoolExecutor in chunks to keep
+inter-process traffic low. Every finished game is appended to a JSON Lines
+file as soon as its chunk comes back, and a per-policy summary is printed
+at the end.
+
+    python tournament.py --games 2000 --policies autopilot greedy random
+    python tournament.py --policies mybots:wall_hugger --speed 16 --output hard.jsonl
+
+A policy is a factory called with a fresh engine that returns a function
+giving the direction for the next step(). Besides the built-in names below,
+"module:function" imports a factory from any module on the path.
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from autopilot import Autopilot, hamiltonian_cycle, parse_board
+from snake_engine import SnakeEngine, UP, DOWN, LEFT, RIGHT, GRID_WIDTH, GRID_HEIGHT
+
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+
+
+def _safe_moves(engine):
+    # Moves that do not hit a wall or the body on the next step
+    x, y = engine.segments[0]
+    reverse = (-engine.direction[0], -engine.direction[1])
+    moves = []
+    for direction in DIRECTIONS:
+        pos = (x + direction[0], y + direction[1])
+        if direction != reverse and engine.in_bounds(pos) and not engine.is_occupied(pos):
+            moves.append((direction, pos))
+    return moves
+
+
+def autopilot_policy(engine):
+    # No wall-clock budget: a timed-out search would make results depend on machine load
+    return Autopilot(engine, budget_ms=float("inf")).choose
+
+
+def greedy_policy(engine):
+    # Straight for the food, only avoiding moves that die at once
+    def choose():
+        target = engine.bonus_food or engine.food_pos
+        moves = _safe_moves(engine)
+        if not moves:
+            return None
+        if target is None:
+            return moves[0][0]
+        return min(moves, key=lambda move: abs(move[1][0] - target[0]) + abs(move[1][1] - target[1]))[0]
+    return choose
+
+
+def random_policy(engine):
+    rng = random.Random(engine.seed)
+
+    def choose():
+        moves = _safe_moves(engine)
+        return rng.choice(moves)[0] if moves else None
+    return choose
+
+
+def cycle_policy(engine):
+    # Walk the Hamiltonian cycle forever: slow, but never dies on its own
+    width = engine.width
+    cycle = hamiltonian_cycle(width, engine.height)
+    following = {}
+    for (x, y), (nx, ny) in zip(cycle, cycle[1:] + cycle[:1]):
+        following[y * width + x] = (nx - x, ny - y)
+
+    def choose():
+        x, y = engine.segments[0]
+        direction = following.get(y * width + x)
+        if direction is None or direction == (-engine.direction[0], -engine.direction[1]):
+            # Off the cycle, or a one-cell snake facing the wrong way: step onto it
+            moves = _safe_moves(engine)
+            return moves[0][0] if moves else None
+        return direction
+    return choose
+
+
+POLICIES = {
+    "autopilot": autopilot_policy,
+    "greedy": greedy_policy,
+    "random": random_policy,
+    "cycle": cycle_policy,
+}
+
+
+def resolve_policy(name):
+    if name in POLICIES:
+        return POLICIES[name]
+    module_name, _, attribute = name.partition(":")
+    if not attribute:
+        raise ValueError(f"unknown policy {name!r}; use one of {', '.join(POLICIES)} or module:function")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def play_game(policy, seed, speed, width, height, max_ticks):
+    engine = SnakeEngine(speed, seed, width, height)
+    choose = policy(engine)
+    step = engine.step
+    while engine.alive and engine.ticks < max_ticks:
+        step(choose())
+    return {
+        "seed": seed,
+        "score": engine.score,
+        "length": engine.length,
+        "ticks": engine.ticks,
+        "death_cause": engine.death_cause or "timeout",
+    }
+
+
+def play_chunk(policy_name, seeds, speed, width, height, max_ticks):
+    # Runs in a worker process; only names and plain results cross the process boundary
+    policy = resolve_policy(policy_name)
+    started = time.process_time()
+    results = [play_game(policy, seed, speed, width, height, max_ticks) for seed in seeds]
+    return policy_name, results, time.process_time() - started
+
+
+def chunks(seeds, size):
+    for i in range(0, len(seeds), size):
+        yield seeds[i:i + size]
+
+
+def summarize(results):
+    scores = [r["score"] for r in results]
+    return {
+        "games": len(results),
+        "mean_score": round(statistics.fmean(scores), 2),
+        "median_score": statistics.median(scores),
+        "max_score": max(scores),
+        "mean_length": round(statistics.fmean(r["length"] for r in results), 2),
+        "mean_ticks": round(statistics.fmean(r["ticks"] for r in results), 1),
+        "deaths": dict(Counter(r["death_cause"] for r in results)),
+    }
+
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {text}")
+    return value
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Q_SNAKE bot tournament")
+    parser.add_argument("--policies", nargs="+", default=["autopilot", "greedy"],
+                        help=f"built-in ({', '.join(POLICIES)}) or module:function")
+    parser.add_argument("--games", type=positive_int, default=1000, help="games per policy")
+    parser.add_argument("--seed", type=int, default=0, help="first seed; every policy plays the same seeds")
+    parser.add_argument("--speed", type=int, default=8, help="game speed, which sets the bonus timing in ticks")
+    parser.add_argument("--board", type=parse_board, default=(GRID_WIDTH, GRID_HEIGHT), metavar="WxH")
+    parser.add_argument("--max-ticks", type=int, default=20000, help="stop a game after this many ticks")
+    parser.add_argument("--workers", type=positive_int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=0,
+                        help="games per task (default: about four tasks per worker per policy)")
+    parser.add_argument("--output", default="tournament.jsonl", help="JSON Lines file, one line per game")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        for name in args.policies:
+            resolve_policy(name)  # Fail before starting any workers
+    except (ValueError, ImportError, AttributeError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    width, height = args.board
+    seeds = list(range(args.seed, args.seed + args.games))
+    chunk_size = args.chunk_size or max(1, len(seeds) // (4 * args.workers))
+
+    results = defaultdict(list)
+    started = time.perf_counter()
+    done = 0
+    busy = 0.0
+    total = len(seeds) * len(args.policies)
+    with open(args.output, "w") as out, ProcessPoolExecutor(args.workers) as pool:
+        futures = [pool.submit(play_chunk, name, chunk, args.speed, width, height, args.max_ticks)
+                   for name in args.policies for chunk in chunks(seeds, chunk_size)]
+        for future in as_completed(futures):
+            name, games, seconds = future.result()
+            busy += seconds  # CPU time, so the ratio below is the real speedup
+            for game in games:
+                out.write(json.dumps({"policy": name, **game}) + "\n")
+            out.flush()
+            results[name].extend(games)
+            done += len(games)
+            print(f"\r{done}/{total} games", end="", file=sys.stderr, flush=True)
+    elapsed = time.perf_counter() - started
+    print(f"\r{total} games in {elapsed:.1f} s on {args.workers} workers ({busy / elapsed:.1f}x parallel, "
+          f"{width}x{height} board, speed {args.speed}); results in {args.output}", file=sys.stderr)
+
+    print(f"{'policy':<16} {'games':>6} {'mean':>8} {'median':>8} {'max':>6} {'length':>7} {'ticks':>8}  deaths")
+    for name in args.policies:
+        s = summarize(results[name])
+        deaths = ", ".join(f"{cause} {count}" for cause, count in sorted(s["deaths"].items()))
+        print(f"{name:<16} {s['games']:>6} {s['mean_score']:>8.1f} {s['median_score']:>8.0f} "
+              f"{s['max_score']:>6} {s['mean_length']:>7.1f} {s['mean_ticks']:>8.0f}  {deaths}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())